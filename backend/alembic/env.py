@@ -11,7 +11,12 @@ load_dotenv()
 
 from models.user import User
 from models.issue import Issue
-from models.fix import Fix
+from models.label import IssueLabel
+from models.fingerprint import IssueLshBand
+from models.fix import Fix, FixJob
+from models.repository import TrackedRepository, RepoSyncState, ForkParent
+from models.webhook import WebhookEvent
+from models.job import ScheduledJob
 from config.db import Base
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,49 @@
+"""Per-user issue uniqueness and tracked repositories
+
+Revision ID: 3c1d9e7a5b21
+Revises: 8fbadbf9f751
+Create Date: 2026-10-17 09:12:44.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '3c1d9e7a5b21'
+down_revision: Union[str, None] = '8fbadbf9f751'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Issues are copied per user, so uniqueness is (github_issue_id, user_id)
+    op.drop_index('ix_issues_github_issue_id', table_name='issues')
+    op.create_index('ix_issues_github_issue_id', 'issues', ['github_issue_id'], unique=False)
+    op.create_unique_constraint('uq_issues_github_issue_id_user_id', 'issues', ['github_issue_id', 'user_id'])
+
+    op.create_table(
+        'tracked_repositories',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('repo_full_name', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'repo_full_name', name='uq_tracked_repositories_user_repo')
+    )
+    op.create_index('ix_tracked_repositories_id', 'tracked_repositories', ['id'], unique=False)
+    op.create_index('ix_tracked_repositories_repo_full_name', 'tracked_repositories', ['repo_full_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tracked_repositories_repo_full_name', table_name='tracked_repositories')
+    op.drop_index('ix_tracked_repositories_id', table_name='tracked_repositories')
+    op.drop_table('tracked_repositories')
+
+    op.drop_constraint('uq_issues_github_issue_id_user_id', 'issues', type_='unique')
+    op.drop_index('ix_issues_github_issue_id', table_name='issues')
+    op.create_index('ix_issues_github_issue_id', 'issues', ['github_issue_id'], unique=True)
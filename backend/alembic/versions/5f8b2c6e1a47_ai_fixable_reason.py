@@ -0,0 +1,27 @@
+"""Store the classifier rule that marked an issue AI-fixable
+
+Revision ID: 5f8b2c6e1a47
+Revises: a7e2f04c9d13
+Create Date: 2026-10-17 11:20:05.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '5f8b2c6e1a47'
+down_revision: Union[str, None] = 'a7e2f04c9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('issues', sa.Column('ai_fixable_reason', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('issues', 'ai_fixable_reason')
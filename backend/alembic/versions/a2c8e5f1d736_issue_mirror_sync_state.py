@@ -0,0 +1,38 @@
+"""Issue mirror sync state and issue numbers
+
+Revision ID: a2c8e5f1d736
+Revises: f3b6d8a1c529
+Create Date: 2026-10-17 18:41:06.208314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a2c8e5f1d736'
+down_revision: Union[str, None] = 'f3b6d8a1c529'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('repo_sync_states',
+    sa.Column('repo_full_name', sa.String(), nullable=False),
+    sa.Column('since', sa.String(), nullable=True),
+    sa.Column('last_synced_at', sa.DateTime(), nullable=True),
+    sa.Column('last_status', sa.String(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('issues_synced', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('repo_full_name')
+    )
+    op.add_column('issues', sa.Column('number', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('issues') as batch_op:
+        batch_op.drop_column('number')
+    op.drop_table('repo_sync_states')
@@ -0,0 +1,45 @@
+"""Webhook event outbox
+
+Revision ID: a7e2f04c9d13
+Revises: 3c1d9e7a5b21
+Create Date: 2026-10-17 10:03:27.581940
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a7e2f04c9d13'
+down_revision: Union[str, None] = '3c1d9e7a5b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'webhook_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('delivery_id', sa.String(), nullable=False),
+        sa.Column('event_type', sa.String(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('received_at', sa.DateTime(), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('delivery_id')
+    )
+    op.create_index('ix_webhook_events_id', 'webhook_events', ['id'], unique=False)
+    op.create_index('ix_webhook_events_status_id', 'webhook_events', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_events_status_id', table_name='webhook_events')
+    op.drop_index('ix_webhook_events_id', table_name='webhook_events')
+    op.drop_table('webhook_events')
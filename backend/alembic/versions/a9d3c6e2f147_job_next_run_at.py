@@ -0,0 +1,33 @@
+"""Scheduled jobs: next due time separate from the run lease
+
+Revision ID: a9d3c6e2f147
+Revises: d4f7b2e9a613
+Create Date: 2026-10-18 09:14:52.306118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'a9d3c6e2f147'
+down_revision: Union[str, None] = 'd4f7b2e9a613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('scheduled_jobs', sa.Column('next_run_at', sa.DateTime(), nullable=True))
+    # Finished jobs held the lease until they were next due; move that time to next_run_at
+    op.execute(
+        "UPDATE scheduled_jobs SET next_run_at = locked_until, locked_until = NULL "
+        "WHERE last_status IS NULL OR last_status <> 'running'"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("UPDATE scheduled_jobs SET locked_until = next_run_at WHERE locked_until IS NULL")
+    op.drop_column('scheduled_jobs', 'next_run_at')
@@ -0,0 +1,35 @@
+"""Fork to parent resolution cache
+
+Revision ID: b5d9f3a7c418
+Revises: a2c8e5f1d736
+Create Date: 2026-10-17 20:12:44.390127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b5d9f3a7c418'
+down_revision: Union[str, None] = 'a2c8e5f1d736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fork_parents',
+    sa.Column('fork_full_name', sa.String(), nullable=False),
+    sa.Column('parent_full_name', sa.String(), nullable=True),
+    sa.Column('parent_name', sa.String(), nullable=True),
+    sa.Column('resolved_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('fork_full_name')
+    )
+    op.create_index(op.f('ix_fork_parents_parent_full_name'), 'fork_parents', ['parent_full_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_fork_parents_parent_full_name'), table_name='fork_parents')
+    op.drop_table('fork_parents')
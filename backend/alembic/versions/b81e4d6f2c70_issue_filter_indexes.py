@@ -0,0 +1,43 @@
+"""Composite and trigram indexes for issue filters
+
+Revision ID: b81e4d6f2c70
+Revises: e6c3f1a8b094
+Create Date: 2026-10-17 13:58:02.417765
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'b81e4d6f2c70'
+down_revision: Union[str, None] = 'e6c3f1a8b094'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRIGRAM_COLUMNS = ('title', 'repo_full_name', 'labels')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_issues_user_id_is_ai_fixable', 'issues', ['user_id', 'is_ai_fixable'], unique=False)
+    op.create_index('ix_issues_user_id_repo_full_name', 'issues', ['user_id', 'repo_full_name'], unique=False)
+
+    # SQLite has no trigram indexes; the composite indexes above still apply there
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in TRIGRAM_COLUMNS:
+            op.create_index(
+                f'ix_issues_{column}_trgm', 'issues', [column], unique=False,
+                postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in TRIGRAM_COLUMNS:
+            op.drop_index(f'ix_issues_{column}_trgm', table_name='issues')
+    op.drop_index('ix_issues_user_id_repo_full_name', table_name='issues')
+    op.drop_index('ix_issues_user_id_is_ai_fixable', table_name='issues')
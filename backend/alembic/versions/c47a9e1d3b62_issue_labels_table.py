@@ -0,0 +1,101 @@
+"""Normalized issue labels
+
+Revision ID: c47a9e1d3b62
+Revises: b81e4d6f2c70
+Create Date: 2026-10-17 14:36:51.290114
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c47a9e1d3b62'
+down_revision: Union[str, None] = 'b81e4d6f2c70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 5000
+
+issues = sa.table(
+    'issues',
+    sa.column('id', sa.Integer),
+    sa.column('labels', sa.String),
+)
+issue_labels = sa.table(
+    'issue_labels',
+    sa.column('issue_id', sa.Integer),
+    sa.column('name', sa.String),
+)
+
+
+def _decode(value):
+    try:
+        labels = json.loads(value) if value else []
+    except ValueError:
+        return []
+    if not isinstance(labels, list):
+        return []
+    return sorted({label for label in labels if isinstance(label, str)})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'issue_labels',
+        sa.Column('issue_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['issue_id'], ['issues.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('issue_id', 'name')
+    )
+    op.create_index('ix_issue_labels_name_issue_id', 'issue_labels', ['name', 'issue_id'], unique=False)
+
+    # Backfill in keyset-paginated batches from the JSON column
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(issues.c.id, issues.c.labels)
+            .where(issues.c.id > last_id)
+            .order_by(issues.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        values = [{'issue_id': row.id, 'name': name} for row in rows for name in _decode(row.labels)]
+        if values:
+            bind.execute(issue_labels.insert(), values)
+
+    if bind.dialect.name == 'postgresql':
+        op.drop_index('ix_issues_labels_trgm', table_name='issues')
+    with op.batch_alter_table('issues') as batch_op:
+        batch_op.drop_column('labels')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('issues') as batch_op:
+        batch_op.add_column(sa.Column('labels', sa.String(), nullable=True))
+
+    bind = op.get_bind()
+    labels_by_issue = {}
+    for issue_id, name in bind.execute(
+        sa.select(issue_labels.c.issue_id, issue_labels.c.name).order_by(issue_labels.c.issue_id, issue_labels.c.name)
+    ):
+        labels_by_issue.setdefault(issue_id, []).append(name)
+    if labels_by_issue:
+        bind.execute(
+            issues.update().where(issues.c.id == sa.bindparam('issue_id')).values(labels=sa.bindparam('labels_json')),
+            [{'issue_id': issue_id, 'labels_json': json.dumps(names)} for issue_id, names in labels_by_issue.items()]
+        )
+
+    if bind.dialect.name == 'postgresql':
+        op.create_index(
+            'ix_issues_labels_trgm', 'issues', ['labels'], unique=False,
+            postgresql_using='gin', postgresql_ops={'labels': 'gin_trgm_ops'}
+        )
+    op.drop_index('ix_issue_labels_name_issue_id', table_name='issue_labels')
+    op.drop_table('issue_labels')
@@ -0,0 +1,55 @@
+"""Fix generation job queue
+
+Revision ID: c8e1a4f6d927
+Revises: b5d9f3a7c418
+Create Date: 2026-10-17 21:05:31.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'c8e1a4f6d927'
+down_revision: Union[str, None] = 'b5d9f3a7c418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fix_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('issue_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('progress', sa.String(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('fix_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('worker', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('claimed_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['fix_id'], ['fixes.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['issue_id'], ['issues.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_fix_jobs_id'), 'fix_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_fix_jobs_user_id'), 'fix_jobs', ['user_id'], unique=False)
+    op.create_index('ix_fix_jobs_status_id', 'fix_jobs', ['status', 'id'], unique=False)
+    op.create_index('uq_fix_jobs_active_issue_id', 'fix_jobs', ['issue_id'], unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'running')"),
+                    sqlite_where=sa.text("status IN ('queued', 'running')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_fix_jobs_active_issue_id', table_name='fix_jobs')
+    op.drop_index('ix_fix_jobs_status_id', table_name='fix_jobs')
+    op.drop_index(op.f('ix_fix_jobs_user_id'), table_name='fix_jobs')
+    op.drop_index(op.f('ix_fix_jobs_id'), table_name='fix_jobs')
+    op.drop_table('fix_jobs')
@@ -0,0 +1,29 @@
+"""Track classifier version and content hash per issue
+
+Revision ID: d2a4b7e9c305
+Revises: 5f8b2c6e1a47
+Create Date: 2026-10-17 11:58:41.730256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd2a4b7e9c305'
+down_revision: Union[str, None] = '5f8b2c6e1a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('issues', sa.Column('classifier_version', sa.String(), nullable=True))
+    op.add_column('issues', sa.Column('content_hash', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('issues', 'content_hash')
+    op.drop_column('issues', 'classifier_version')
@@ -0,0 +1,53 @@
+"""Near-duplicate issue clusters: MinHash signatures and LSH bands
+
+Revision ID: d4f7b2e9a613
+Revises: c8e1a4f6d927
+Create Date: 2026-10-17 23:12:08.734120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd4f7b2e9a613'
+down_revision: Union[str, None] = 'c8e1a4f6d927'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing issues start unclustered; the cluster-issues job fingerprints and files them
+    op.add_column('issues', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+    op.add_column('issues', sa.Column('cluster_id', sa.Integer(), nullable=True))
+    op.create_index('ix_issues_cluster_id', 'issues', ['cluster_id'], unique=False)
+    op.create_index('ix_issues_unclustered_id', 'issues', ['id'], unique=False,
+                    postgresql_where=sa.text('cluster_id IS NULL'),
+                    sqlite_where=sa.text('cluster_id IS NULL'))
+    op.create_table('issue_lsh_bands',
+    sa.Column('issue_id', sa.Integer(), nullable=False),
+    sa.Column('band', sa.SmallInteger(), nullable=False),
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['issue_id'], ['issues.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('issue_id', 'band')
+    )
+    op.create_index('ix_issue_lsh_bands_bucket_issue_id', 'issue_lsh_bands', ['bucket', 'issue_id'], unique=False)
+    with op.batch_alter_table('fixes') as batch_op:
+        batch_op.add_column(sa.Column('reused_from_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_fixes_reused_from_id_fixes', 'fixes', ['reused_from_id'], ['id'],
+                                    ondelete='SET NULL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('fixes') as batch_op:
+        batch_op.drop_constraint('fk_fixes_reused_from_id_fixes', type_='foreignkey')
+        batch_op.drop_column('reused_from_id')
+    op.drop_index('ix_issue_lsh_bands_bucket_issue_id', table_name='issue_lsh_bands')
+    op.drop_table('issue_lsh_bands')
+    op.drop_index('ix_issues_unclustered_id', table_name='issues')
+    op.drop_index('ix_issues_cluster_id', table_name='issues')
+    op.drop_column('issues', 'cluster_id')
+    op.drop_column('issues', 'minhash')
@@ -0,0 +1,68 @@
+"""Full-text search over issue titles and descriptions
+
+Revision ID: d91f5c2a7e48
+Revises: c47a9e1d3b62
+Create Date: 2026-10-17 15:20:37.804416
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'd91f5c2a7e48'
+down_revision: Union[str, None] = 'c47a9e1d3b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Stored generated column: filled for existing rows by the ALTER, kept current on write
+        op.execute("""
+            ALTER TABLE issues ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+            ) STORED
+        """)
+        op.execute('CREATE INDEX ix_issues_search_vector ON issues USING gin (search_vector)')
+    elif dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE issues_fts USING fts5(
+                title, description, content='issues', content_rowid='id',
+                tokenize='unicode61', prefix='2 3'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER issues_fts_insert AFTER INSERT ON issues BEGIN
+                INSERT INTO issues_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER issues_fts_delete AFTER DELETE ON issues BEGIN
+                INSERT INTO issues_fts(issues_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER issues_fts_update AFTER UPDATE OF title, description ON issues BEGIN
+                INSERT INTO issues_fts(issues_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO issues_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+            END
+        """)
+        op.execute("INSERT INTO issues_fts(issues_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_issues_search_vector')
+        op.execute('ALTER TABLE issues DROP COLUMN search_vector')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS issues_fts_update')
+        op.execute('DROP TRIGGER IF EXISTS issues_fts_delete')
+        op.execute('DROP TRIGGER IF EXISTS issues_fts_insert')
+        op.execute('DROP TABLE IF EXISTS issues_fts')
@@ -0,0 +1,27 @@
+"""Fix jobs: wait before retrying a failed attempt
+
+Revision ID: e2b7c4d9f316
+Revises: a9d3c6e2f147
+Create Date: 2026-10-18 11:02:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'e2b7c4d9f316'
+down_revision: Union[str, None] = 'a9d3c6e2f147'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('fix_jobs', sa.Column('available_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('fix_jobs', 'available_at')
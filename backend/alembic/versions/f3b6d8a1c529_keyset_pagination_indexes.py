@@ -0,0 +1,35 @@
+"""Keyset pagination indexes for issues and fixes
+
+Revision ID: f3b6d8a1c529
+Revises: d91f5c2a7e48
+Create Date: 2026-10-17 16:02:13.551907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = 'f3b6d8a1c529'
+down_revision: Union[str, None] = 'd91f5c2a7e48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows with no updated_at would sort unpredictably and never match a cursor
+    for table_name in ('issues', 'fixes'):
+        op.execute(
+            f'UPDATE {table_name} SET updated_at = coalesce(created_at, CURRENT_TIMESTAMP) '
+            'WHERE updated_at IS NULL'
+        )
+    op.create_index('ix_issues_user_id_updated_at_id', 'issues', ['user_id', 'updated_at', 'id'], unique=False)
+    op.create_index('ix_fixes_issue_id_updated_at_id', 'fixes', ['issue_id', 'updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_fixes_issue_id_updated_at_id', table_name='fixes')
+    op.drop_index('ix_issues_user_id_updated_at_id', table_name='issues')
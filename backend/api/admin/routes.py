@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import get_async_db
+from models.fix import FixJob
+from models.webhook import WebhookEvent
+from services.webhookService import replay_webhook_events, webhook_consumer
+from services.scheduler import scheduler
+from services.fixJobs import fix_worker_pool
+from services.userCache import user_cache
+from services.githubClient import response_cache
+from services.repoListCache import repo_list_cache
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+import hmac
+import os
+
+router = APIRouter()
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+async def require_admin(x_admin_token: str = Header("")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not hmac.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+    return True
+
+class ReplayRequest(BaseModel):
+    delivery_ids: Optional[List[str]] = None
+    since: Optional[datetime] = None
+    status: Optional[str] = None
+
+@router.get("/webhook-events", dependencies=[Depends(require_admin)])
+async def webhook_event_stats(db: AsyncSession = Depends(get_async_db)):
+    """Outbox event counts by status"""
+    rows = (await db.execute(
+        select(WebhookEvent.status, func.count(WebhookEvent.id)).group_by(WebhookEvent.status)
+    )).all()
+    return {status: count for status, count in rows}
+
+@router.post("/webhook-events/replay", dependencies=[Depends(require_admin)])
+async def replay_webhook_outbox(request: ReplayRequest, db: AsyncSession = Depends(get_async_db)):
+    """Re-queue outbox events by delivery id, receive time and/or status"""
+    if not (request.delivery_ids or request.since or request.status):
+        raise HTTPException(status_code=400, detail="Provide delivery_ids, since or status to select events")
+    
+    replayed = await db.run_sync(replay_webhook_events, request.delivery_ids, request.since, request.status)
+    webhook_consumer.notify()
+    return {"message": f"Replaying {replayed} events"}
+
+@router.get("/jobs", dependencies=[Depends(require_admin)])
+async def list_jobs(db: AsyncSession = Depends(get_async_db)):
+    """Background job status, durations and the cluster-wide last run"""
+    return await db.run_sync(scheduler.status)
+
+@router.post("/jobs/{name}/run", dependencies=[Depends(require_admin)])
+async def run_job(name: str):
+    """Trigger a job now, even if it is not due; it still waits out a run in progress on another worker"""
+    if not scheduler.trigger(name):
+        raise HTTPException(status_code=404, detail="Job not found or scheduler not running")
+    return {"message": f"Triggered {name}"}
+
+@router.get("/user-cache", dependencies=[Depends(require_admin)])
+async def user_cache_stats():
+    """Hit rate and size of the authenticated-user cache"""
+    return user_cache.stats()
+
+
+@router.get("/github-cache", dependencies=[Depends(require_admin)])
+async def github_cache_stats():
+    """Hit/miss/revalidation counters for the GitHub conditional-request cache"""
+    return {**response_cache.stats(), "repo_lists": repo_list_cache.stats()}
+
+@router.get("/fix-jobs", dependencies=[Depends(require_admin)])
+async def fix_job_stats(db: AsyncSession = Depends(get_async_db)):
+    """Fix job counts by status and this process's worker pool"""
+    rows = (await db.execute(
+        select(FixJob.status, func.count(FixJob.id)).group_by(FixJob.status)
+    )).all()
+    return {"jobs": {status: count for status, count in rows}, "workers": fix_worker_pool.stats()}
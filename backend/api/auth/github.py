@@ -1,10 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from config.githubApp import GITHUB_CLIENT_ID, GITHUB_REDIRECT_URI
-from services.githubService import exchange_code_for_token, store_access_token, get_user_repos
-from config.db import get_db
-from models.user import User
+from services.githubService import exchange_code_for_token, store_access_token, get_cached_user_repos
+from config.db import get_async_db
+from api.dependencies import resolve_user
 
 router = APIRouter()
 
@@ -19,7 +19,7 @@ async def github_login():
     return RedirectResponse(url=github_auth_url)
 
 @router.get("/github/callback")
-async def github_callback(code: str, db: Session = Depends(get_db)):
+async def github_callback(code: str, db: AsyncSession = Depends(get_async_db)):
     if not code:
         raise HTTPException(status_code=400, detail="Missing authorization code")
     
@@ -36,15 +36,15 @@ async def github_callback(code: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Authentication error: {str(e)}")
 
 @router.get("/repos/{user_id}")
-async def get_repos(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def get_repos(user_id: int):
+    user = await resolve_user(user_id)
     try:
-        data = await get_user_repos(user.github_access_token)
+        data = await get_cached_user_repos(user.github_access_token, user.id)
         return {
             "username": data["username"],
             "repos": [{"name": repo["name"], "full_name": repo["full_name"]} for repo in data["repos"]]
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching repos: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,30 @@
+from fastapi import Depends, HTTPException, Query
+from config.db import AsyncSessionLocal
+from models.user import User
+from services.userCache import CachedUser, user_cache
+
+async def get_user_id(user_id: int = Query(0, description="User ID")):
+    if user_id == 0:
+        raise HTTPException(status_code=401, detail="Unauthorized - Please provide user_id")
+    return user_id
+
+async def resolve_user(user_id: int) -> CachedUser:
+    """Look the user up through user_cache; only a miss touches the database"""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    # A short-lived session, so handlers that only call GitHub never hold a pooled connection
+    async with AsyncSessionLocal() as db:
+        row = await db.get(User, user_id)
+        if not row:
+            raise HTTPException(status_code=404, detail="User not found")
+        user = CachedUser(row.id, row.github_access_token)
+    user_cache.put(user)
+    return user
+
+async def get_current_user(user_id: int = Depends(get_user_id)) -> CachedUser:
+    return await resolve_user(user_id)
+
+async def get_current_user_id(user: CachedUser = Depends(get_current_user)) -> int:
+    return user.id
@@ -1,72 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from config.db import get_db
-from models.user import User
-import requests
-from services.githubService import get_user_repos, get_repo_issues
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import get_async_db
+from api.dependencies import get_current_user
+from services.userCache import CachedUser
+from services.githubService import (
+    get_cached_user_repos,
+    get_repo_issues,
+    get_issue,
+    get_issue_sources,
+    track_repositories,
+)
+from services.issueMirror import freshness_headers, mirrored_issues, refresh_mirror
+from services.githubClient import rate_limiter, graphql_rate_limiter
+from services.githubGraphQL import graphql_costs
 
 router = APIRouter()
 
-# Dependency to get user_id from query param
-async def get_user_id(user_id: int = 0):  # Default to 0, check below
-    if user_id == 0:
-        raise HTTPException(status_code=401, detail="Unauthorized - Please provide user_id")
-    return user_id
-
 @router.get("/repos")
-async def list_repos(db: Session = Depends(get_db), user_id: int = Depends(get_user_id)):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    repos = await get_user_repos(user.github_access_token)
+async def list_repos(user: CachedUser = Depends(get_current_user)):
+    repos = await get_cached_user_repos(user.github_access_token, user.id)
     return [{"name": repo["name"], "full_name": repo["full_name"]} for repo in repos["repos"]]
 
 @router.get("/repos/issues")
 async def list_issues(
+    response: Response,
     repo_owner: str = Query(..., description="Repository owner"),
     repo_name: str = Query(..., description="Repository name"),
     page: int = Query(1, ge=1, description="Page number"),
     per_page: int = Query(30, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db), 
-    user_id: int = Depends(get_user_id)
+    db: AsyncSession = Depends(get_async_db),
+    user: CachedUser = Depends(get_current_user)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+    """
+    Open issues of one repository, newest first. Pull requests are not
+    included (GitHub's issues endpoint returns both); fetch them from the
+    pulls API instead.
+    """
     repo_full_name = f"{repo_owner}/{repo_name}"
-    issues = await get_repo_issues(user.github_access_token, repo_full_name, page, per_page)
-    return [{"id": issue["id"], "title": issue["title"], "number": issue["number"]} for issue in issues]
+    repos = await get_cached_user_repos(user.github_access_token, user.id)
+    if repo_full_name not in {repo["full_name"] for repo in repos["repos"]}:
+        # Only repositories the user is known to see are served from the shared mirror
+        issues = await get_repo_issues(user.github_access_token, repo_full_name, page, per_page)
+        return [
+            {"id": issue["id"], "title": issue["title"], "number": issue["number"]}
+            for issue in issues if "pull_request" not in issue
+        ]
+
+    freshness = await refresh_mirror(db, user.github_access_token, [repo_full_name])
+    response.headers.update(freshness_headers(freshness))
+    issues = await mirrored_issues(db, user.id, [repo_full_name], offset=(page - 1) * per_page, limit=per_page)
+    return [{"id": issue.github_issue_id, "title": issue.title, "number": issue.number} for issue in issues]
 
 @router.get("/issues/{issue_id}")
 async def get_issue_detail(
     issue_id: int,
     repo_owner: str = Query(..., description="Repository owner"),
     repo_name: str = Query(..., description="Repository name"),
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    user: CachedUser = Depends(get_current_user)
 ):
     """
     Get detailed information about a specific GitHub issue
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     repo_full_name = f"{repo_owner}/{repo_name}"
     
     # Make request to GitHub API to get issue details
     try:
-        response = requests.get(
-            f"https://api.github.com/repos/{repo_full_name}/issues/{issue_id}",
-            headers={"Authorization": f"Bearer {user.github_access_token}"}
-        )
-        
-        if response.status_code != 200:
-            error_message = f"Failed to fetch issue: {response.text}"
-            raise HTTPException(status_code=response.status_code, detail=error_message)
-        
-        issue = response.json()
+        issue = await get_issue(user.github_access_token, repo_full_name, issue_id)
         
         # Format the response to include important issue details
         return {
@@ -93,95 +92,59 @@ async def get_issue_detail(
             ],
             "comments": issue.get("comments", 0)
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching issue details: {str(e)}")
 
 @router.get("/repos/all-issues")
 async def list_all_issues(
-    db: Session = Depends(get_db), 
-    user_id: int = Depends(get_user_id),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db), 
+    user: CachedUser = Depends(get_current_user),
     include_forked_sources: bool = Query(True, description="Include issues from original repositories of forks")
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    all_issues = []
-    processed_repos = set()  # Track which repos we've already processed
-    
-    # First, get all detailed information about user's repositories
+    """Open issues across the user's repositories, served from the local issue mirror; pull requests are not included"""
     try:
-        # Get basic repo info
-        repos_response = requests.get(
-            "https://api.github.com/user/repos?type=all&sort=updated",
-            headers={"Authorization": f"Bearer {user.github_access_token}"}
-        )
-        repos = repos_response.json()
-        
-        # Process each repository
-        for repo in repos:
-            if "full_name" in repo:
-                repo_full_name = repo["full_name"]
-                processed_repos.add(repo_full_name.lower())
-                
-                # Get issues from this repo
-                try:
-                    issues = await get_repo_issues(user.github_access_token, repo_full_name)
-                    for issue in issues:
-                        issue["repository"] = {
-                            "name": repo["name"],
-                            "full_name": repo_full_name,
-                            "is_fork": repo.get("fork", False)
-                        }
-                    all_issues.extend(issues)
-                except Exception as e:
-                    print(f"Error fetching issues for {repo_full_name}: {str(e)}")
-                
-                # If it's a fork and we want to include original repo issues
-                if include_forked_sources and repo.get("fork", False):
-                    # Get detailed fork info to find the parent/source repo
-                    try:
-                        fork_detail_response = requests.get(
-                            f"https://api.github.com/repos/{repo_full_name}",
-                            headers={"Authorization": f"Bearer {user.github_access_token}"}
-                        )
-                        fork_detail = fork_detail_response.json()
-                        
-                        # Check if parent/source info is available
-                        if "parent" in fork_detail and "full_name" in fork_detail["parent"]:
-                            parent_full_name = fork_detail["parent"]["full_name"]
-                            
-                            # Only process if we haven't seen this repo before
-                            if parent_full_name.lower() not in processed_repos:
-                                processed_repos.add(parent_full_name.lower())
-                                
-                                try:
-                                    parent_issues = await get_repo_issues(user.github_access_token, parent_full_name)
-                                    for issue in parent_issues:
-                                        issue["repository"] = {
-                                            "name": fork_detail["parent"]["name"],
-                                            "full_name": parent_full_name,
-                                            "is_fork": False,
-                                            "is_parent_of_fork": True
-                                        }
-                                    all_issues.extend(parent_issues)
-                                except Exception as e:
-                                    print(f"Error fetching issues for parent repo {parent_full_name}: {str(e)}")
-                    except Exception as e:
-                        print(f"Error fetching fork details for {repo_full_name}: {str(e)}")
+        repos = await get_cached_user_repos(user.github_access_token, user.id)
+        sources = await get_issue_sources(user.github_access_token, repos["repos"], include_forked_sources)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error fetching user repos: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching repositories: {str(e)}")
-    
+
+    repo_full_names = [source["full_name"] for source in sources]
+    await track_repositories(db, user.id, repo_full_names)
+    freshness = await refresh_mirror(db, user.github_access_token, repo_full_names)
+    response.headers.update(freshness_headers(freshness))
+
+    issues_by_repo = {}
+    for issue in await mirrored_issues(db, user.id, repo_full_names):
+        issues_by_repo.setdefault(issue.repo_full_name, []).append(issue)
+
     return [
         {
-            "id": issue["id"], 
-            "title": issue["title"], 
-            "number": issue["number"],
-            "repository": issue["repository"],
-            "html_url": issue.get("html_url", ""),
-            "state": issue.get("state", ""),
-            "created_at": issue.get("created_at", "")
+            "id": issue.github_issue_id, 
+            "title": issue.title, 
+            "number": issue.number,
+            "repository": source,
+            "html_url": issue.html_url or "",
+            "state": issue.state or "",
+            "created_at": issue.created_at.isoformat() if issue.created_at else ""
         } 
-        for issue in all_issues
-    ]
\ No newline at end of file
+        for source in sources
+        for issue in issues_by_repo.get(source["full_name"], [])
+    ]
+
+@router.get("/rate-limit")
+async def rate_limit_status(user: CachedUser = Depends(get_current_user)):
+    """Last known GitHub rate-limit budgets (REST and GraphQL points) for the user's token"""
+    return {
+        "budget": rate_limiter.snapshot(user.github_access_token),
+        "scheduler": rate_limiter.stats(),
+        "graphql": {
+            "budget": graphql_rate_limiter.snapshot(user.github_access_token),
+            "costs": graphql_costs.stats()
+        }
+    }
@@ -1,16 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from config.db import get_db
-from models.user import User
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import get_async_db
+from api.dependencies import get_current_user_id
 from models.issue import Issue
+from models.label import IssueLabel
 from models.fix import Fix
-from services.aiService import generate_fix_for_issue, submit_fix_to_github
-from typing import List, Optional
+from services.aiService import submit_fix_to_github
+from services.fixJobs import FIX_MAX_WAIT, enqueue_fix_job, fix_worker_pool, get_fix_job
+from services.issueClusters import issue_cluster_id
+from services.pagination import keyset_paginate, page_rows
+from services.searchService import fulltext_rank, fulltext_search
+from typing import List, Literal, Optional
 from pydantic import BaseModel
-import json
+from datetime import datetime
+import os
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = int(os.getenv("API_DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "200"))
+
 class FixCreate(BaseModel):
     content: str
     submission_message: Optional[str] = None
@@ -19,13 +30,30 @@ class FixResponse(BaseModel):
     id: int
     content: str
     status: str
-    created_at: str
+    created_at: datetime
     is_submitted: bool
     submission_message: Optional[str] = None
     pr_url: Optional[str] = None
+    reused_from_id: Optional[int] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class FixJobResponse(BaseModel):
+    id: int
+    issue_id: int
+    status: str
+    progress: Optional[str] = None
+    attempts: int
+    fix_id: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    available_at: Optional[datetime] = None
+    claimed_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 class IssueResponse(BaseModel):
     id: int
@@ -35,12 +63,25 @@ class IssueResponse(BaseModel):
     description: Optional[str] = None
     state: str
     html_url: Optional[str] = None
-    created_at: str
+    created_at: datetime
     is_ai_fixable: bool
+    ai_fixable_reason: Optional[str] = None
+    cluster_id: Optional[int] = None
     labels: Optional[List[str]] = None
 
     class Config:
-        orm_mode = True
+        from_attributes = True
+
+class IssuePage(BaseModel):
+    items: List[IssueResponse]
+    next_cursor: Optional[str] = None
+
+class ClusterPage(IssuePage):
+    cluster_id: Optional[int] = None
+
+class FixPage(BaseModel):
+    items: List[FixResponse]
+    next_cursor: Optional[str] = None
 
 class GenerateFixRequest(BaseModel):
     issue_id: int
@@ -48,40 +89,31 @@ class GenerateFixRequest(BaseModel):
 class SubmitFixRequest(BaseModel):
     submission_message: str
 
-async def get_user_id(user_id: int = Query(..., description="User ID")):
-    if user_id == 0:
-        raise HTTPException(status_code=401, detail="Unauthorized - Please provide user_id")
-    return user_id
-
-@router.get("/issues/{issue_id}/fixes", response_model=List[FixResponse])
+@router.get("/issues/{issue_id}/fixes", response_model=FixPage)
 async def list_fixes(
     issue_id: int,
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    issue = db.query(Issue).filter(Issue.id == issue_id, Issue.user_id == user_id).first()
+    issue = await db.scalar(select(Issue).where(Issue.id == issue_id, Issue.user_id == user_id))
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
     
-    fixes = db.query(Fix).filter(Fix.issue_id == issue_id).all()
-    return fixes
+    sort_keys = [(Fix.updated_at, True), (Fix.id, True)]
+    query = keyset_paginate(select(Fix).where(Fix.issue_id == issue_id), sort_keys, cursor, limit)
+    rows, next_cursor = page_rows((await db.execute(query)).all(), limit, sort_keys)
+    return {"items": [row.Fix for row in rows], "next_cursor": next_cursor}
 
 @router.post("/issues/{issue_id}/fixes", response_model=FixResponse)
 async def create_fix(
     issue_id: int,
     fix_data: FixCreate,
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    issue = db.query(Issue).filter(Issue.id == issue_id, Issue.user_id == user_id).first()
+    issue = await db.scalar(select(Issue).where(Issue.id == issue_id, Issue.user_id == user_id))
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
     
@@ -92,109 +124,175 @@ async def create_fix(
     )
 
     db.add(fix)
-    db.commit()
-    db.refresh(fix)
+    await db.commit()
+    await db.refresh(fix)
 
     return fix
 
-@router.get("/issues", response_model=List[IssueResponse])
-async def list_issues(
-    search: Optional[str] = None,
-    label: Optional[str] = None,
-    repo_name: Optional[str] = None,
-    is_ai_fixable: Optional[bool] = None,
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
-):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    query = db.query(Issue).filter(Issue.user_id == user_id)
+# IssueResponse fields read straight from the table; labels are attached separately
+ISSUE_RESPONSE_COLUMNS = (
+    Issue.id,
+    Issue.github_issue_id,
+    Issue.title,
+    Issue.repo_full_name,
+    Issue.description,
+    Issue.state,
+    Issue.html_url,
+    Issue.created_at,
+    Issue.is_ai_fixable,
+    Issue.ai_fixable_reason,
+    Issue.cluster_id,
+)
+ISSUE_RESPONSE_FIELDS = tuple(column.key for column in ISSUE_RESPONSE_COLUMNS)
+
+async def issue_payloads(db: AsyncSession, rows) -> List[dict]:
+    """
+    Build IssueResponse-shaped dicts from ISSUE_RESPONSE_COLUMNS rows.
+
+    Read-only fast path: plain rows skip ORM hydration, the identity map and
+    response-model validation, and labels for the whole page come from one query.
+    """
+    payloads = [dict(zip(ISSUE_RESPONSE_FIELDS, row)) for row in rows]
+    labels_by_issue = {payload["id"]: [] for payload in payloads}
+    if labels_by_issue:
+        label_rows = await db.execute(
+            select(IssueLabel.issue_id, IssueLabel.name)
+            .where(IssueLabel.issue_id.in_(list(labels_by_issue)))
+            .order_by(IssueLabel.issue_id, IssueLabel.name)
+        )
+        for issue_id, name in label_rows:
+            labels_by_issue[issue_id].append(name)
+    for payload in payloads:
+        payload["labels"] = labels_by_issue[payload["id"]]
+    return payloads
 
-    if search:
-        query = query.filter(Issue.title.ilike(f"%{search}%"))
+def filter_issues(query, user_id: int, search: Optional[str] = None, label: Optional[str] = None,
+                  repo_name: Optional[str] = None, is_ai_fixable: Optional[bool] = None,
+                  search_mode: str = "title", dialect: Optional[str] = None):
+    """
+    Apply the dashboard filters; backed by the (user_id, ...) and trigram indexes on issues.
+    search_mode="fulltext" searches titles and descriptions; see fulltext_rank() for ordering.
+    """
+    query = query.where(Issue.user_id == user_id)
+
+    if search and search_mode == "fulltext":
+        query = fulltext_search(query, dialect, search)
+    elif search:
+        query = query.where(Issue.title.ilike(f"%{search}%"))
 
     if repo_name:
-        query = query.filter(Issue.repo_full_name.ilike(f"%{repo_name}%"))
+        query = query.where(Issue.repo_full_name.ilike(f"%{repo_name}%"))
 
     if is_ai_fixable is not None:
-        query = query.filter(Issue.is_ai_fixable == is_ai_fixable)
+        query = query.where(Issue.is_ai_fixable == is_ai_fixable)
 
     if label:
-        query = query.filter(Issue.labels.ilike(f"%{label}%"))
+        # Exact match on issue_labels (name, issue_id), so "bug" no longer matches "debug"
+        query = query.where(Issue.label_rows.any(IssueLabel.name == label))
 
-    issues = query.all()
+    return query
 
-    for issue in issues:
-        if issue.labels:
-            try:
-                issue.labels = json.loads(issue.labels)
-            except:
-                issue.labels = []
-        else:
-            issue.labels = []
+@router.get("/issues", response_model=IssuePage)
+async def list_issues(
+    search: Optional[str] = None,
+    label: Optional[str] = None,
+    repo_name: Optional[str] = None,
+    is_ai_fixable: Optional[bool] = None,
+    search_mode: Literal["title", "fulltext"] = "title",
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    dialect = db.get_bind().dialect.name
+    query = filter_issues(
+        select(*ISSUE_RESPONSE_COLUMNS), user_id, search, label, repo_name, is_ai_fixable,
+        search_mode=search_mode, dialect=dialect
+    )
+    # Newest activity first; full-text searches page through results by relevance instead
+    sort_keys = [(Issue.updated_at, True), (Issue.id, True)]
+    if search and search_mode == "fulltext":
+        sort_keys = [fulltext_rank(dialect, search), (Issue.id, True)]
 
-    return issues
+    rows = (await db.execute(keyset_paginate(query, sort_keys, cursor, limit))).all()
+    rows, next_cursor = page_rows(rows, limit, sort_keys)
+    return ORJSONResponse({"items": await issue_payloads(db, rows), "next_cursor": next_cursor})
 
 @router.post("/refresh-ai-status")
 async def refresh_ai_fixable_status(
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    user_id: int = Depends(get_current_user_id)
 ):
     """Refresh AI-fixable status for all user's issues"""
     from services.aiService import update_ai_fixable_status
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    updated_count = await update_ai_fixable_status(db, user_id)
+    updated_count = await update_ai_fixable_status(user_id)
     return {"message": f"Updated {updated_count} issues"}
 
 @router.get("/issues/{issue_id}", response_model=IssueResponse)
 async def get_issue(
     issue_id: int,
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
 ):
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    issue = db.query(Issue).filter(Issue.id == issue_id, Issue.user_id == user_id).first()
-    if not issue:
+    row = (await db.execute(
+        select(*ISSUE_RESPONSE_COLUMNS).where(Issue.id == issue_id, Issue.user_id == user_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
+
+    return ORJSONResponse((await issue_payloads(db, [row]))[0])
+
+@router.get("/issues/{issue_id}/cluster", response_model=ClusterPage)
+async def list_issue_cluster(
+    issue_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
+):
+    """The user's near-duplicates of an issue, the issue itself included"""
+    if not await db.scalar(select(Issue.id).where(Issue.id == issue_id, Issue.user_id == user_id)):
         raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
-    
-    if issue.labels:
-        try:
-            issue.labels = json.loads(issue.labels)
-        except:
-            issue.labels = []
-    else:
-        issue.labels = []
 
-    return issue
+    cluster_id = await issue_cluster_id(db, issue_id)
+    members = Issue.id == issue_id if cluster_id is None else Issue.cluster_id == cluster_id
+    sort_keys = [(Issue.updated_at, True), (Issue.id, True)]
+    query = select(*ISSUE_RESPONSE_COLUMNS).where(members, Issue.user_id == user_id)
+    rows = (await db.execute(keyset_paginate(query, sort_keys, cursor, limit))).all()
+    rows, next_cursor = page_rows(rows, limit, sort_keys)
+    return ORJSONResponse({
+        "cluster_id": cluster_id,
+        "items": await issue_payloads(db, rows),
+        "next_cursor": next_cursor,
+    })
 
-@router.post("/issues/{issue_id}/generate-fix", response_model=FixResponse)
+@router.post("/issues/{issue_id}/generate-fix", response_model=FixJobResponse, status_code=202)
 async def generate_fix(
     issue_id: int,
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
 ):
-    """Generate an AI fix for an issue"""
-    try:
-        fix = await generate_fix_for_issue(db, issue_id, user_id)
-        return fix
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating fix: {str(e)}")
+    """Queue AI fix generation for an issue; repeated requests return the job already in flight"""
+    job, created = await enqueue_fix_job(db, issue_id, user_id)
+    if created:
+        fix_worker_pool.notify()
+    return job
+
+@router.get("/fix-jobs/{job_id}", response_model=FixJobResponse)
+async def get_fix_job_status(
+    job_id: int,
+    wait: float = Query(0, ge=0, le=FIX_MAX_WAIT, description="Long-poll for up to this many seconds"),
+    user_id: int = Depends(get_current_user_id)
+):
+    """Fix job status; once succeeded, fix_id points at the generated fix"""
+    return await get_fix_job(job_id, user_id, wait)
 
 @router.post("/fixes/{fix_id}/submit", response_model=FixResponse)
 async def submit_fix(
     fix_id: int,
     request: SubmitFixRequest,
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
 ):
     """Submit a fix to GitHub as a PR"""
     try:
@@ -206,19 +304,19 @@ async def submit_fix(
 @router.delete("/fixes/{fix_id}")
 async def delete_fix(
     fix_id: int,
-    db: Session = Depends(get_db),
-    user_id: int = Depends(get_user_id)
+    db: AsyncSession = Depends(get_async_db),
+    user_id: int = Depends(get_current_user_id)
 ):
     """Delete a fix"""
-    fix = db.query(Fix).filter(Fix.id == fix_id).first()
+    fix = await db.get(Fix, fix_id)
     if not fix:
         raise HTTPException(status_code=404, detail="Fix not found")
     
-    issue = db.query(Issue).filter(Issue.id == fix.issue_id, Issue.user_id == user_id).first()
+    issue = await db.scalar(select(Issue).where(Issue.id == fix.issue_id, Issue.user_id == user_id))
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
     
-    db.delete(fix)
-    db.commit()
+    await db.delete(fix)
+    await db.commit()
     
     return {"message": "Fix deleted successfully"}
\ No newline at end of file
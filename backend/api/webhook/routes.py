@@ -1,30 +1,43 @@
 # backend/api/webhook/routes.py
 from fastapi import APIRouter, Request, HTTPException, Depends
-from sqlalchemy.orm import Session
-from config.db import get_db
-from models.issue import Issue
-from models.user import User
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import get_async_db
+from services.webhookService import enqueue_webhook_event, webhook_consumer
 import hmac
 import hashlib
 import os
-import json
-from datetime import datetime
 
 router = APIRouter()
 
 # Get the webhook secret from environment variable
 WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
 
-async def verify_github_webhook(request: Request):
-    """Verify the GitHub webhook signature"""
+# GitHub caps deliveries at 25 MB; issue payloads are far smaller
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_MAX_BODY_BYTES", str(2 * 1024 * 1024)))
+
+async def read_webhook_body(request: Request) -> bytes:
+    """Read the delivery body exactly once, refusing oversized payloads early"""
+    content_length = request.headers.get("Content-Length")
+    if content_length and content_length.isdigit() and int(content_length) > WEBHOOK_MAX_BODY_BYTES:
+        raise HTTPException(status_code=413, detail="Webhook payload too large")
+    
+    buffer = bytearray()
+    async for chunk in request.stream():
+        buffer += chunk
+        if len(buffer) > WEBHOOK_MAX_BODY_BYTES:
+            raise HTTPException(status_code=413, detail="Webhook payload too large")
+    return bytes(buffer)
+
+async def verify_github_webhook(request: Request) -> bytes:
+    """Read the body once and verify the GitHub webhook signature over it"""
+    payload_body = await read_webhook_body(request)
     if not WEBHOOK_SECRET:
-        return True  # Skip verification if no secret is set (not recommended for production)
+        return payload_body  # Skip verification if no secret is set (not recommended for production)
     
     signature = request.headers.get("X-Hub-Signature-256", "")
     if not signature:
         raise HTTPException(status_code=401, detail="Missing signature header")
     
-    payload_body = await request.body()
     expected_signature = "sha256=" + hmac.new(
         WEBHOOK_SECRET.encode(),
         payload_body,
@@ -34,82 +47,25 @@ async def verify_github_webhook(request: Request):
     if not hmac.compare_digest(signature, expected_signature):
         raise HTTPException(status_code=401, detail="Invalid signature")
     
-    return True
+    return payload_body
 
-@router.post("/github", dependencies=[Depends(verify_github_webhook)])
-async def github_webhook(request: Request, db: Session = Depends(get_db)):
-    """Handle GitHub webhook events"""
-    payload_body = await request.body()
+@router.post("/github")
+async def github_webhook(
+    request: Request,
+    payload_body: bytes = Depends(verify_github_webhook),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Persist a GitHub webhook delivery to the outbox and acknowledge it"""
+    # The body is stored as-is; parsing is deferred to the outbox consumer
     event_type = request.headers.get("X-GitHub-Event", "ping")
-    payload = json.loads(payload_body)
     
     if event_type == "ping":
         return {"message": "Webhook received successfully"}
     
-    if event_type == "issues":
-        return await handle_issues_event(payload, db)
-    
-    # Add more event handlers as needed
-    
-    return {"message": f"Received {event_type} event"}
-
-async def handle_issues_event(payload: dict, db: Session):
-    """Handle GitHub issues events"""
-    action = payload.get("action")
-    issue_data = payload.get("issue", {})
-    repository = payload.get("repository", {})
-    
-    if action not in ["opened", "edited", "labeled", "unlabeled", "closed", "reopened"]:
-        return {"message": f"Ignoring issues.{action} event"}
-    
-    # Get issue details
-    github_issue_id = issue_data.get("id")
-    title = issue_data.get("title")
-    repo_full_name = repository.get("full_name")
-    state = issue_data.get("state")
-    html_url = issue_data.get("html_url")
-    description = issue_data.get("body")
-    
-    # Get labels
-    labels = [label.get("name") for label in issue_data.get("labels", [])]
-    labels_json = json.dumps(labels)
-    
-    # Check if this is AI fixable (e.g., has bug label)
-    is_ai_fixable = "bug" in labels or "ai-fixable" in labels
-    
-    # Find all users to add this issue for
-    users = db.query(User).all()
-    
-    for user in users:
-        # Check if issue already exists for this user
-        existing_issue = db.query(Issue).filter(
-            Issue.github_issue_id == github_issue_id,
-            Issue.user_id == user.id
-        ).first()
-        
-        if existing_issue:
-            # Update existing issue
-            existing_issue.title = title
-            existing_issue.state = state
-            existing_issue.description = description
-            existing_issue.labels = labels_json
-            existing_issue.is_ai_fixable = is_ai_fixable
-            existing_issue.updated_at = datetime.now()
-        else:
-            # Create new issue
-            new_issue = Issue(
-                github_issue_id=github_issue_id,
-                title=title,
-                repo_full_name=repo_full_name,
-                description=description,
-                state=state,
-                html_url=html_url,
-                is_ai_fixable=is_ai_fixable,
-                labels=labels_json,
-                user_id=user.id
-            )
-            db.add(new_issue)
-        
-    db.commit()
+    delivery_id = request.headers.get("X-GitHub-Delivery")
+    queued = await enqueue_webhook_event(db, delivery_id, event_type, payload_body)
+    if queued:
+        webhook_consumer.notify()
+        return {"message": f"Queued {event_type} event"}
     
-    return {"message": f"Successfully processed {action} event for issue #{issue_data.get('number')}"}
\ No newline at end of file
+    return {"message": f"Ignoring duplicate delivery {delivery_id}"}
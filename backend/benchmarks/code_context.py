@@ -0,0 +1,96 @@
+"""
+Benchmark: code-context indexing and lookups on a large repository.
+
+Builds a synthetic repository of --files Python modules with git fast-import,
+serves it through a file:// remote, and measures the initial clone and index,
+an incremental fetch after a commit touching a few files, and snippet lookups
+for issue descriptions with tracebacks, identifiers and error messages.
+
+    python -m benchmarks.code_context --files 100000 --lookups 200
+"""
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from services.codeContext import CodeContext
+
+MODULE = '''import os
+
+class Model{n}:
+    def save_{n}(self, data):
+        if not data:
+            raise ValueError("empty payload for model {n}")
+        return write_{n}(data)
+
+def write_{n}(data):
+    return len(data) + {n}
+'''
+
+def module_path(n: int) -> str:
+    return f"src/pkg{n // 1000}/mod{n}.py"
+
+def fast_import(repo: str, files, parent: bool):
+    """One commit on main with the given (path, content) pairs"""
+    stream = []
+    for mark, (_, content) in enumerate(files, 1):
+        data = content.encode()
+        stream.append(b"blob\nmark :%d\ndata %d\n%s\n" % (mark, len(data), data))
+    stream.append(b"commit refs/heads/main\ncommitter Bench <bench@example.com> 0 +0000\ndata 6\nupdate\n")
+    if parent:
+        stream.append(b"from refs/heads/main^0\n")
+    stream.extend(b"M 100644 :%d %s\n" % (mark, path.encode()) for mark, (path, _) in enumerate(files, 1))
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=repo, input=b"".join(stream), check=True)
+
+def issue_text(n: int, kind: str) -> str:
+    if kind == "traceback":
+        return (f'Traceback (most recent call last):\n  File "/srv/app/{module_path(n)}", line 6, in save_{n}\n'
+                f"ValueError: empty payload for model {n}")
+    if kind == "identifier":
+        return f"`write_{n}` returns the wrong size"
+    return f"Saving fails with ValueError: empty payload for model {n}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--changed", type=int, default=10, help="Files touched by the incremental commit")
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp()
+    remote = os.path.join(root, "remotes", "bench", "big")
+    os.makedirs(remote)
+    subprocess.run(["git", "init", "--bare", "--quiet", "-b", "main", remote], check=True)
+    started = time.perf_counter()
+    fast_import(remote, [(module_path(n), MODULE.format(n=n)) for n in range(args.files)], parent=False)
+    print(f"Generated {args.files} files in {time.perf_counter() - started:.1f}s")
+
+    context = CodeContext(os.path.join(root, "cache"), f"file://{root}/remotes/{{repo_full_name}}")
+    started = time.perf_counter()
+    stats = context.sync("bench/big")
+    print(f"Initial clone and index: {time.perf_counter() - started:.1f}s ({stats['indexed']} files)")
+
+    rng = random.Random(1)
+    touched = rng.sample(range(args.files), args.changed)
+    fast_import(remote, [(module_path(n), MODULE.format(n=n) + "# changed\n") for n in touched], parent=True)
+    started = time.perf_counter()
+    stats = context.sync("bench/big", force=True)
+    print(f"Incremental fetch and index: {time.perf_counter() - started:.2f}s ({stats['indexed']} files)")
+
+    for kind in ("traceback", "identifier", "message"):
+        timings = []
+        hits = 0
+        for _ in range(args.lookups):
+            n = rng.randrange(args.files)
+            lookup_started = time.perf_counter()
+            snippets = context.find_snippets("bench/big", issue_text(n, kind))
+            timings.append((time.perf_counter() - lookup_started) * 1000)
+            hits += bool(snippets) and snippets[0].path == module_path(n)
+        quantiles = statistics.quantiles(timings, n=20)
+        print(f"{kind:<12} p50 {statistics.median(timings):6.2f}ms  p95 {quantiles[18]:6.2f}ms  "
+              f"top hit {hits}/{args.lookups}")
+
+if __name__ == "__main__":
+    main()
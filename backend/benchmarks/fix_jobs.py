@@ -0,0 +1,88 @@
+"""
+Benchmark: throughput of the fix worker pool.
+
+Queues fix jobs for issues spread over several users in a scratch SQLite
+database and drains them with the deterministic stub backend, which stands
+in for a model taking --delay seconds per fix. Prints wall time, jobs per
+second and how long jobs waited for a worker at each pool size.
+
+    python -m benchmarks.fix_jobs --jobs 200 --users 10 --delay 0.5 --workers 1 4 16
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+async def run(jobs: int, users: int, delay: float, workers: int, per_user: int) -> dict:
+    # config.db reads DATABASE_URL when first imported, so import after it is set
+    from sqlalchemy import delete, func, select
+    from config.db import AsyncSessionLocal, SessionLocal
+    from models.fix import Fix, FixJob
+    from models.issue import Issue
+    from services.fixBackends import StubBackend
+    from services.fixJobs import FINISHED_FIX_JOB_STATUSES, FixWorkerPool, enqueue_fix_job
+
+    with SessionLocal() as db:
+        db.execute(delete(FixJob))
+        db.execute(delete(Fix))
+        db.commit()
+        issues = db.execute(select(Issue.id, Issue.user_id).order_by(Issue.id).limit(jobs)).all()
+
+    pool = FixWorkerPool(workers=workers, per_user=per_user, backend=StubBackend(delay), poll_interval=0.05)
+    pool.start()
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for issue_id, user_id in issues:
+            await enqueue_fix_job(db, issue_id, user_id)
+    pool.notify()
+    async with AsyncSessionLocal() as db:
+        while await db.scalar(select(func.count(FixJob.id)).where(FixJob.status.in_(FINISHED_FIX_JOB_STATUSES))) < len(issues):
+            await db.commit()
+            await asyncio.sleep(0.05)
+        seconds = time.perf_counter() - started
+        waits = [(claimed - created).total_seconds() for created, claimed in
+                 (await db.execute(select(FixJob.created_at, FixJob.claimed_at))).all()]
+    await pool.stop()
+    quantiles = statistics.quantiles(waits, n=20)
+    return {"seconds": seconds, "rate": len(issues) / seconds, "p50": statistics.median(waits), "p95": quantiles[18]}
+
+def seed(jobs: int, users: int):
+    from config.db import Base, SessionLocal, engine
+    from models.issue import Issue
+    from models.user import User
+    from models.fix import Fix  # noqa: F401
+
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.add_all([User(id=user_id, github_access_token=f"token-{user_id}") for user_id in range(1, users + 1)])
+        db.flush()
+        db.add_all([
+            Issue(github_issue_id=n, title=f"Crash {n}", repo_full_name="bench/app", state="open",
+                  is_ai_fixable=True, user_id=n % users + 1)
+            for n in range(1, jobs + 1)
+        ])
+        db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--delay", type=float, default=0.5, help="Seconds the stub backend takes per fix")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--per-user", type=int, default=2)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "fix_jobs.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    seed(args.jobs, args.users)
+
+    print(f"{args.jobs} jobs over {args.users} users, {args.delay * 1000:.0f}ms per fix, at most {args.per_user} per user")
+    print(f"{'workers':<10}{'seconds':>10}{'jobs/s':>10}{'wait p50':>10}{'wait p95':>10}")
+    for workers in args.workers:
+        result = asyncio.run(run(args.jobs, args.users, args.delay, workers, args.per_user))
+        print(f"{workers:<10}{result['seconds']:>10.2f}{result['rate']:>10.1f}{result['p50']:>10.2f}{result['p95']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark: REST vs GraphQL fetch modes of get_all_user_issues.
+
+Starts the GitHub stand-in (benchmarks.github_stub) on a local port with
+simulated per-request latency, points the GitHub client at it and collects
+every open issue in both modes, printing wall time, HTTP requests and
+GraphQL points. Both modes must return the same issues.
+
+    python -m benchmarks.github_fetch_modes --repos 200 --latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+import time
+import uvicorn
+from benchmarks.github_stub import create_app, synthetic
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+async def run(stub, repeat: int):
+    # The client reads GITHUB_API_URL when first imported, so import after it is set
+    from services.githubClient import close_github_client
+    from services.githubService import get_all_user_issues
+
+    results = {}
+    for mode in ("rest", "graphql"):
+        timings = []
+        for _ in range(repeat):
+            stub.reset()
+            # A cold client each run, so cached ETags do not turn REST calls into cheap 304s
+            await close_github_client()
+            started = time.perf_counter()
+            issues = await get_all_user_issues("bench-token", mode=mode)
+            timings.append(time.perf_counter() - started)
+        results[mode] = (issues, min(timings), stub.stats())
+    await close_github_client()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=200)
+    parser.add_argument("--fork-ratio", type=float, default=0.2)
+    parser.add_argument("--issues", type=int, default=30, help="Average open issues per repository")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every request")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    stub = synthetic(args.repos, args.fork_ratio, args.issues, args.latency)
+    port = free_port()
+    os.environ["GITHUB_API_URL"] = f"http://127.0.0.1:{port}"
+    os.environ.pop("GITHUB_GRAPHQL_URL", None)
+    server = start_server(create_app(stub), port)
+    try:
+        results = asyncio.run(run(stub, args.repeat))
+    finally:
+        server.should_exit = True
+
+    rest_issues = results["rest"][0]
+    assert rest_issues == results["graphql"][0], "fetch modes returned different issues"
+    print(f"{args.repos} repositories, {len(rest_issues)} issues, {args.latency * 1000:.0f}ms latency, best of {args.repeat}")
+    print(f"{'mode':<10}{'seconds':>10}{'REST calls':>12}{'GraphQL calls':>15}{'points':>8}")
+    for mode, (_, seconds, stats) in results.items():
+        requests = stats["requests"]
+        print(f"{mode:<10}{seconds:>10.2f}{requests.get('rest', 0):>12}{requests.get('graphql', 0):>15}{stats['graphql_cost']:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Local stand-in for the parts of the GitHub API the issue fetchers use.
+
+Serves GET /user, /user/repos, /repos/{owner}/{name} and
+/repos/{owner}/{name}/issues plus POST /graphql from an in-memory dataset,
+with optional per-request latency. Requests and GraphQL points are counted
+so fetch strategies can be compared. The GraphQL endpoint only understands
+the aliased queries services.githubGraphQL builds; it is not a general
+GraphQL server.
+
+Tests mount it in-process with httpx.ASGITransport. To run it standalone:
+
+    python -m benchmarks.github_stub --repos 200 --latency 0.05 --port 8765
+    GITHUB_API_URL=http://127.0.0.1:8765 uvicorn main:app
+"""
+import argparse
+import asyncio
+import base64
+import random
+import re
+import time
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+ALIAS_PATTERN = re.compile(r"r(\d+): repository\(owner: \$o\1, name: \$n\1\) \{(.*?)\n  \}", re.DOTALL)
+RATE_LIMIT = 5000
+
+class StubGitHub:
+    """Repositories and their open issues, in the REST shapes the services consume"""
+
+    def __init__(self, repos: List[dict], issues: Dict[str, List[dict]], login: str = "stub-user",
+                 latency: float = 0.0):
+        self.login = login
+        self.repos = repos
+        self.by_name = {repo["full_name"].lower(): repo for repo in repos}
+        self.issues = issues
+        self.latency = latency
+        self.requests = Counter()
+        self.graphql_cost = 0
+
+    def add_repository(self, full_name: str, fork: bool = False, parent: Optional[str] = None,
+                       listed: bool = True, issues: int = 0):
+        repo = {"name": full_name.split("/")[1], "full_name": full_name, "fork": fork, "parent": parent}
+        if listed:
+            self.repos.append(repo)
+        self.by_name[full_name.lower()] = repo
+        self.issues[full_name] = [make_issue(full_name, number) for number in range(issues, 0, -1)]
+
+    def reset(self):
+        self.requests.clear()
+        self.graphql_cost = 0
+
+    def stats(self) -> dict:
+        return {"requests": dict(self.requests), "graphql_cost": self.graphql_cost}
+
+def make_issue(full_name: str, number: int) -> dict:
+    """An open issue exactly as services.githubGraphQL.rest_issue would render it"""
+    issue_id = zlib.crc32(f"{full_name}#{number}".encode())
+    return {
+        "id": issue_id,
+        "number": number,
+        "title": f"{full_name} issue {number}",
+        "body": "Steps to reproduce: open the app",
+        "state": "open",
+        "html_url": f"https://github.com/{full_name}/issues/{number}",
+        "created_at": f"2026-01-{number % 28 + 1:02d}T10:00:00Z",
+        "updated_at": f"2026-02-{number % 28 + 1:02d}T10:00:00Z",
+        "user": {"login": "reporter", "avatar_url": "https://avatars.example/reporter", "html_url": "https://github.com/reporter"},
+        "labels": [{"name": "bug", "color": "d73a4a"}] if number % 2 else [],
+        "comments": number % 5,
+    }
+
+def synthetic(repos: int = 50, fork_ratio: float = 0.2, issues_per_repo: int = 30, latency: float = 0.0,
+              seed: int = 1) -> StubGitHub:
+    """A user with `repos` repositories, a share of them forks of upstream repositories"""
+    rng = random.Random(seed)
+    stub = StubGitHub([], {}, latency=latency)
+    for index in range(repos):
+        full_name = f"stub-user/repo-{index}"
+        if rng.random() < fork_ratio:
+            parent = f"upstream-{index % 7}/repo-{index}"
+            stub.add_repository(parent, listed=False, issues=rng.randint(0, issues_per_repo * 2))
+            stub.add_repository(full_name, fork=True, parent=parent, issues=rng.randint(0, 3))
+        else:
+            stub.add_repository(full_name, issues=rng.randint(0, issues_per_repo * 2))
+    return stub
+
+def _page(request: Request, items: list, default_per_page: int = 30):
+    page = int(request.query_params.get("page", 1))
+    per_page = int(request.query_params.get("per_page", default_per_page))
+    last = max(1, (len(items) + per_page - 1) // per_page)
+    headers = {}
+    if last > 1:
+        url = request.url.include_query_params(page=last, per_page=per_page)
+        headers["Link"] = f'<{url}>; rel="last"'
+    return items[(page - 1) * per_page:page * per_page], headers
+
+def _rate_headers(remaining: int) -> dict:
+    return {
+        "X-RateLimit-Limit": str(RATE_LIMIT),
+        "X-RateLimit-Remaining": str(max(0, remaining)),
+        "X-RateLimit-Reset": str(int(time.time()) + 3600),
+    }
+
+def _cursor(offset: int) -> str:
+    return base64.b64encode(f"cursor:{offset}".encode()).decode()
+
+def _offset(cursor: Optional[str]) -> int:
+    return int(base64.b64decode(cursor).decode().split(":")[1]) if cursor else 0
+
+def _graphql_node(issue: dict) -> dict:
+    user = issue["user"]
+    return {
+        "databaseId": issue["id"],
+        "number": issue["number"],
+        "title": issue["title"],
+        "body": issue["body"],
+        "state": issue["state"].upper(),
+        "url": issue["html_url"],
+        "createdAt": issue["created_at"],
+        "updatedAt": issue["updated_at"],
+        "author": {"login": user["login"], "avatarUrl": user["avatar_url"], "url": user["html_url"]} if user else None,
+        "labels": {"nodes": issue["labels"]},
+        "comments": {"totalCount": issue["comments"]},
+    }
+
+def run_query(stub: StubGitHub, query: str, variables: dict) -> dict:
+    data = {}
+    errors = []
+    requests = 0
+    for match in ALIAS_PATTERN.finditer(query):
+        index, body = match.group(1), match.group(2)
+        full_name = f"{variables[f'o{index}']}/{variables[f'n{index}']}"
+        repo = stub.by_name.get(full_name.lower())
+        if repo is None:
+            data[f"r{index}"] = None
+            errors.append({
+                "type": "NOT_FOUND",
+                "path": [f"r{index}"],
+                "message": f"Could not resolve to a Repository with the name '{full_name}'.",
+            })
+            continue
+
+        result = {}
+        if "parent {" in body:
+            parent = stub.by_name.get((repo["parent"] or "").lower())
+            result["parent"] = {"name": parent["name"], "nameWithOwner": parent["full_name"]} if parent else None
+        if "issues(" in body:
+            first = variables["first"]
+            offset = _offset(variables.get(f"c{index}"))
+            issues = stub.issues.get(repo["full_name"], [])
+            if "filterBy:" in body:
+                # Mirror sync: updated since the mark, in the given states, oldest update first
+                since = variables.get(f"s{index}") or ""
+                states = variables.get(f"st{index}") or ["OPEN", "CLOSED"]
+                issues = sorted(
+                    (issue for issue in issues if issue["updated_at"] >= since and issue["state"].upper() in states),
+                    key=lambda issue: issue["updated_at"]
+                )
+            nodes = issues[offset:offset + first]
+            result["issues"] = {
+                "pageInfo": {"hasNextPage": offset + first < len(issues), "endCursor": _cursor(offset + len(nodes))},
+                "nodes": [_graphql_node(issue) for issue in nodes],
+            }
+            # GitHub's formula: one request per connection, one per nested labels connection
+            requests += 1 + first
+        if not result:
+            result["id"] = f"R_{index}"
+        data[f"r{index}"] = result
+
+    cost = max(1, round(requests / 100))
+    stub.graphql_cost += cost
+    data["rateLimit"] = {"cost": cost, "remaining": RATE_LIMIT - stub.graphql_cost, "resetAt": "2099-01-01T00:00:00Z"}
+    body = {"data": data}
+    if errors:
+        body["errors"] = errors
+    return body
+
+def create_app(stub: StubGitHub) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def count_and_delay(request: Request, call_next):
+        if not request.url.path.startswith("/_stub"):
+            stub.requests["graphql" if request.url.path == "/graphql" else "rest"] += 1
+            if stub.latency:
+                await asyncio.sleep(stub.latency)
+        return await call_next(request)
+
+    @app.get("/user")
+    async def user():
+        return {"login": stub.login, "id": 1}
+
+    @app.get("/user/repos")
+    async def user_repos(request: Request):
+        listed = [{key: value for key, value in repo.items() if key != "parent"} for repo in stub.repos]
+        items, headers = _page(request, listed)
+        return JSONResponse(items, headers=headers)
+
+    @app.get("/repos/{owner}/{name}")
+    async def repository(owner: str, name: str):
+        repo = stub.by_name.get(f"{owner}/{name}".lower())
+        if repo is None:
+            return JSONResponse({"message": "Not Found"}, status_code=404)
+        body = {key: value for key, value in repo.items() if key != "parent"}
+        parent = stub.by_name.get((repo["parent"] or "").lower())
+        if parent:
+            body["parent"] = {"name": parent["name"], "full_name": parent["full_name"]}
+        return body
+
+    @app.get("/repos/{owner}/{name}/issues")
+    async def repository_issues(request: Request, owner: str, name: str):
+        repo = stub.by_name.get(f"{owner}/{name}".lower())
+        if repo is None:
+            return JSONResponse({"message": "Not Found"}, status_code=404)
+        items, headers = _page(request, stub.issues.get(repo["full_name"], []))
+        return JSONResponse(items, headers=headers)
+
+    @app.post("/graphql")
+    async def graphql(request: Request):
+        payload = await request.json()
+        body = run_query(stub, payload["query"], payload.get("variables") or {})
+        return JSONResponse(body, headers=_rate_headers(body["data"]["rateLimit"]["remaining"]))
+
+    @app.get("/_stub/stats")
+    async def stats():
+        return stub.stats()
+
+    @app.post("/_stub/reset")
+    async def reset():
+        stub.reset()
+        return Response(status_code=204)
+
+    return app
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repos", type=int, default=50)
+    parser.add_argument("--fork-ratio", type=float, default=0.2)
+    parser.add_argument("--issues", type=int, default=30, help="Average open issues per repository")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every request")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    stub = synthetic(args.repos, args.fork_ratio, args.issues, args.latency)
+    uvicorn.run(create_app(stub), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
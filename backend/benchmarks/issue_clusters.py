@@ -0,0 +1,113 @@
+"""
+Benchmark: near-duplicate clustering cost as the issue table grows.
+
+Fills a scratch SQLite database with synthetic issues from --families bug
+reports, each repeated with different paths, line numbers, addresses and at
+most one edited word, plus one-off issues. At each size in --sizes it clusters
+--sample new issues and prints the time per issue, which should stay flat
+rather than grow with the table, how many issues with an earlier duplicate
+found it, and how many landed in a cluster mixing unrelated reports.
+
+    python -m benchmarks.issue_clusters --sizes 1000 10000 50000 --sample 500
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+
+WORDS = [f"{a}{b}" for a in ("lo", "ra", "mi", "ta", "ke", "su", "po", "ve") for b in
+         ("ber", "din", "gal", "mon", "tor", "vex", "wim", "zul", "cor", "fen", "hap", "jot")]
+ROOTS = ("/srv/app", "/home/ci/build", "C:\\agent\\work", "/var/lib/worker", "/tmp/checkout")
+
+class Generator:
+    """Synthetic reports; `family` is the ground truth, None for one-off issues"""
+
+    def __init__(self, families: int, seed: int = 1):
+        self.rng = random.Random(seed)
+        self.families = [self._template(family) for family in range(families)]
+        self.singles = 0
+
+    def _template(self, family: int) -> list:
+        return self.rng.choices(WORDS, k=40) + [f"module{family}", "raised", f"Error{family}"]
+
+    def issue(self, duplicate_rate: float = 0.8):
+        rng = self.rng
+        if rng.random() < duplicate_rate:
+            family = rng.randrange(len(self.families))
+            words = list(self.families[family])
+        else:
+            self.singles += 1
+            family, words = None, self._template(len(self.families) + self.singles)
+        for _ in range(rng.randrange(2)):
+            words[rng.randrange(len(words))] = rng.choice(WORDS)
+        root = rng.choice(ROOTS)
+        trace = (f'Traceback (most recent call last):\n  File "{root}/pkg/{words[-3]}.py", line {rng.randrange(1, 900)}, '
+                 f"in handle\n{words[-1]}: failed at 0x{rng.getrandbits(48):x} after {rng.randrange(10000)} ms")
+        return family, f"{words[0]} {words[1]} fails", " ".join(words) + "\n\n" + trace
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--sample", type=int, default=500, help="New issues clustered and timed at each size")
+    parser.add_argument("--families", type=int, default=2000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "issue_clusters.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # config.db reads DATABASE_URL when first imported, so import after it is set
+    from sqlalchemy import insert, select
+    from config.db import Base, SessionLocal, engine
+    from models.fingerprint import IssueLshBand  # noqa: F401
+    from models.fix import Fix  # noqa: F401
+    from models.issue import Issue
+    from models.user import User
+    from services.issueClusters import cluster_issues
+
+    Base.metadata.create_all(engine)
+    generator = Generator(args.families)
+    families = {}
+
+    def add(db, count):
+        generated = [generator.issue() for _ in range(count)]
+        rows = [
+            {"github_issue_id": number, "title": title, "description": description,
+             "repo_full_name": "bench/app", "state": "open", "user_id": 1}
+            for number, (_, title, description) in enumerate(generated, len(families) + 1)
+        ]
+        ids = db.scalars(insert(Issue).returning(Issue.id), rows).all()
+        db.commit()
+        families.update(zip(ids, (family for family, _, _ in generated)))
+        return ids
+
+    with SessionLocal() as db:
+        db.add(User(id=1, github_access_token="bench"))
+        db.commit()
+        print(f"{'issues':>8}{'fill s':>9}{'ms/issue':>10}{'joined':>8}{'recall':>8}{'merged':>8}")
+        for size in args.sizes:
+            started = time.perf_counter()
+            while len(families) < size:
+                add(db, min(5000, size - len(families)))
+                cluster_issues(db)
+            fill = time.perf_counter() - started
+
+            sample = add(db, args.sample)
+            started = time.perf_counter()
+            joined = cluster_issues(db)
+            per_issue = (time.perf_counter() - started) * 1000 / len(sample)
+
+            # Recall: sample issues with an earlier relative that found one. False merges:
+            # sample issues whose cluster mixes reports of different families or one-offs
+            clusters = dict(db.execute(select(Issue.id, Issue.cluster_id)).all())
+            kinds = defaultdict(set)
+            for issue_id, cluster_id in clusters.items():
+                kinds[cluster_id].add(families[issue_id] if families[issue_id] is not None else -issue_id)
+            seen = {families[issue_id] for issue_id in clusters if issue_id < sample[0]}
+            related = [issue_id for issue_id in sample if families[issue_id] is not None and families[issue_id] in seen]
+            found = sum(clusters[issue_id] != issue_id for issue_id in related)
+            merged = sum(len(kinds[clusters[issue_id]]) > 1 for issue_id in sample)
+            print(f"{len(families):>8}{fill:>9.1f}{per_issue:>10.2f}{joined:>8}{found / max(len(related), 1):>8.1%}{merged:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark the /api/issues/issues filters with and without the issue indexes.
+
+Seeds a scratch database with synthetic issues, then runs each dashboard
+filter with the composite/trigram indexes dropped and again with them
+created, printing the query plan and median latency of both runs.
+
+    BENCH_DATABASE_URL=postgresql://localhost/automerge_bench \\
+        python -m benchmarks.issue_filters --rows 1000000
+
+Without --url or BENCH_DATABASE_URL it uses a temporary SQLite file. It wipes
+the issues, labels and users tables and drops indexes, so it refuses to run
+against the application's DATABASE_URL.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from sqlalchemy import create_engine, func, select, text
+from config.db import Base, DATABASE_URL
+from models.issue import Issue
+from models.label import IssueLabel
+from models.user import User
+from models.fix import Fix  # noqa: F401
+from api.issues.routes import filter_issues
+
+BENCH_INDEXES = {
+    "ix_issues_user_id_is_ai_fixable",
+    "ix_issues_user_id_repo_full_name",
+    "ix_issues_title_trgm",
+    "ix_issues_repo_full_name_trgm",
+    "ix_issue_labels_name_issue_id",
+}
+WORDS = ["crash", "typo", "docs", "login", "timeout", "render", "cache", "parser", "upload", "memory",
+         "button", "layout", "webhook", "token", "config", "sorting", "export", "locale", "retry", "search"]
+# Description vocabulary large enough that a search term is as selective as in real issues
+_vocabulary_rng = random.Random(7)
+VOCABULARY = sorted({
+    "".join(_vocabulary_rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(_vocabulary_rng.randint(5, 9)))
+    for _ in range(5000)
+})
+LABELS = ["bug", "documentation", "enhancement", "good first issue", "question", "typo", "performance"]
+BATCH_SIZE = 10000
+
+# (name, filter kwargs) pairs matching the dashboard's query parameters
+CASES = [
+    ("user only", {}),
+    ("is_ai_fixable", {"is_ai_fixable": True}),
+    ("repo_name", {"repo_name": "repo-7"}),
+    ("search", {"search": "timeout"}),
+    ("label", {"label": "documentation"}),
+    ("search + is_ai_fixable", {"search": "render", "is_ai_fixable": True}),
+    # Full-text search is backed by the search vector / FTS5 table in both runs
+    ("fulltext", {"search": VOCABULARY[100], "search_mode": "fulltext"}),
+    ("fulltext prefix", {"search": VOCABULARY[200][:3], "search_mode": "fulltext"}),
+]
+
+def seed(engine, rows: int, users: int):
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        existing = conn.scalar(select(func.count()).select_from(Issue))
+        if existing >= rows:
+            print(f"Reusing {existing} seeded issues")
+            return
+        conn.execute(IssueLabel.__table__.delete())
+        conn.execute(Issue.__table__.delete())
+        conn.execute(User.__table__.delete())
+        conn.execute(User.__table__.insert(), [
+            {"id": user_id, "github_access_token": f"token-{user_id}"} for user_id in range(1, users + 1)
+        ])
+
+    rng = random.Random(42)
+    started = time.perf_counter()
+    for offset in range(0, rows, BATCH_SIZE):
+        batch = []
+        labels = []
+        for n in range(offset, min(offset + BATCH_SIZE, rows)):
+            user_id = rng.randint(1, users)
+            labels.extend({"issue_id": n + 1, "name": name} for name in rng.sample(LABELS, rng.randint(0, 2)))
+            batch.append({
+                "id": n + 1,
+                "github_issue_id": n,
+                "title": " ".join(rng.sample(WORDS, 4)),
+                "repo_full_name": f"user-{user_id}/repo-{rng.randint(0, 49)}",
+                "description": " ".join(rng.sample(VOCABULARY, 12)),
+                "state": "open",
+                "is_ai_fixable": rng.random() < 0.3,
+                "user_id": user_id,
+            })
+        with engine.begin() as conn:
+            conn.execute(Issue.__table__.insert(), batch)
+            if labels:
+                conn.execute(IssueLabel.__table__.insert(), labels)
+    print(f"Seeded {rows} issues for {users} users in {time.perf_counter() - started:.1f}s")
+
+def set_indexes(engine, enabled: bool):
+    indexes = [
+        index for index in (*Issue.__table__.indexes, *IssueLabel.__table__.indexes)
+        if index.name in BENCH_INDEXES
+        and (engine.dialect.name == "postgresql" or not index.name.endswith("_trgm"))
+    ]
+    with engine.begin() as conn:
+        for index in indexes:
+            if enabled:
+                index.create(conn, checkfirst=True)
+            else:
+                index.drop(conn, checkfirst=True)
+        conn.execute(text("ANALYZE issues" if engine.dialect.name == "postgresql" else "ANALYZE"))
+
+def explain(conn, sql: str) -> str:
+    if conn.dialect.name == "postgresql":
+        return "\n".join(row[0] for row in conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")))
+    return "\n".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+def run_cases(engine, user_id: int, repeat: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, filters in CASES:
+            query = filter_issues(select(Issue), user_id, dialect=engine.dialect.name, **filters)
+            sql = str(query.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                count = len(conn.execute(query).all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {"rows": count, "median_ms": statistics.median(timings), "plan": explain(conn, sql)}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=os.getenv("BENCH_DATABASE_URL"),
+                        help="Throwaway database to seed; defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.url is None:
+        args.url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'issue_filters.db')}"
+    elif args.url == DATABASE_URL:
+        sys.exit("Refusing to run against DATABASE_URL: the benchmark wipes the issues and users tables")
+
+    engine = create_engine(args.url)
+    seed(engine, args.rows, args.users)
+
+    set_indexes(engine, enabled=False)
+    before = run_cases(engine, user_id=1, repeat=args.repeat)
+    set_indexes(engine, enabled=True)
+    after = run_cases(engine, user_id=1, repeat=args.repeat)
+
+    print(f"\n{engine.dialect.name}, {args.rows} issues, {args.users} users")
+    print(f"{'filter':<26}{'rows':>6}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name, _ in CASES:
+        b, a = before[name], after[name]
+        print(f"{name:<26}{a['rows']:>6}{b['median_ms']:>12.2f}{a['median_ms']:>12.2f}{b['median_ms'] / a['median_ms']:>9.1f}x")
+    for name, _ in CASES:
+        print(f"\n== {name}\n-- before\n{before[name]['plan']}\n-- after\n{after[name]['plan']}")
+
+if __name__ == "__main__":
+    main()
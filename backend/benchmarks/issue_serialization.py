@@ -0,0 +1,106 @@
+"""
+Microbenchmark: per-row cost of building an issue list response.
+
+Compares the ORM path (hydrate Issue objects, validate them through the
+IssuePage response model, render with the stdlib JSON encoder) against the
+column-projected fast path used by the issue routes (plain rows, one labels
+query per page, rendered with ORJSONResponse).
+
+    python -m benchmarks.issue_serialization --rows 200
+
+Defaults to one full page (API_MAX_PAGE_SIZE rows).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from config.db import Base
+from models.issue import Issue
+from models.label import IssueLabel
+from models.user import User
+from models.fix import Fix  # noqa: F401
+from api.issues.routes import ISSUE_RESPONSE_COLUMNS, MAX_PAGE_SIZE, IssuePage, issue_payloads
+
+USER_ID = 1
+
+def seed(url: str, rows: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{"id": USER_ID, "github_access_token": "token"}])
+        conn.execute(Issue.__table__.insert(), [{
+            "id": n,
+            "github_issue_id": n,
+            "title": f"Issue {n}: crash when saving large files",
+            "repo_full_name": f"octo/repo-{n % 25}",
+            "description": "Steps to reproduce:\n1. Open the editor\n2. Save a 50MB file\n" * 3,
+            "state": "open",
+            "html_url": f"https://github.com/octo/repo-{n % 25}/issues/{n}",
+            "is_ai_fixable": n % 3 == 0,
+            "ai_fixable_reason": "text:reproduction" if n % 3 == 0 else None,
+            "user_id": USER_ID,
+        } for n in range(1, rows + 1)])
+        conn.execute(IssueLabel.__table__.insert(), [
+            {"issue_id": n, "name": name} for n in range(1, rows + 1) for name in ("bug", f"area-{n % 7}")
+        ])
+    engine.dispose()
+
+async def orm_path(db: AsyncSession, rows: int) -> bytes:
+    issues = (await db.scalars(
+        select(Issue).where(Issue.user_id == USER_ID).order_by(Issue.id).limit(rows)
+    )).all()
+    content = IssuePage.model_validate({"items": issues, "next_cursor": None}).model_dump(mode="json")
+    return JSONResponse(content).body
+
+async def fast_path(db: AsyncSession, rows: int) -> bytes:
+    result = (await db.execute(
+        select(*ISSUE_RESPONSE_COLUMNS).where(Issue.user_id == USER_ID).order_by(Issue.id).limit(rows)
+    )).all()
+    return ORJSONResponse({"items": await issue_payloads(db, result), "next_cursor": None}).body
+
+async def measure(sessions: async_sessionmaker, path, rows: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        # A fresh session per run, like a request, so identity-map reuse does not flatter the ORM path
+        async with sessions() as db:
+            started = time.process_time()
+            await path(db, rows)
+            timings.append(time.process_time() - started)
+    return statistics.median(timings)
+
+async def run(rows: int, repeat: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        seed(f"sqlite:///{path}", rows)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with sessions() as db:
+            orm_body, fast_body = await orm_path(db, rows), await fast_path(db, rows)
+        # The fast path must produce the same document as the response model would
+        assert orjson.loads(orm_body) == orjson.loads(fast_body)
+
+        orm_seconds = await measure(sessions, orm_path, rows, repeat)
+        fast_seconds = await measure(sessions, fast_path, rows, repeat)
+        await engine.dispose()
+
+    print(f"{rows} issues, median of {repeat} runs (CPU time)")
+    print(f"ORM + response model   {orm_seconds * 1e6 / rows:8.2f} us/row")
+    print(f"projected + orjson     {fast_seconds * 1e6 / rows:8.2f} us/row")
+    print(f"speedup                {orm_seconds / fast_seconds:8.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=MAX_PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+if __name__ == "__main__":
+    main()
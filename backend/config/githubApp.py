@@ -6,4 +6,32 @@ load_dotenv()
 GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID")
 GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET")
 GITHUB_APP_ID = os.getenv("GITHUB_APP_ID")
-GITHUB_REDIRECT_URI = os.getenv("GITHUB_REDIRECT_URI")
\ No newline at end of file
+GITHUB_REDIRECT_URI = os.getenv("GITHUB_REDIRECT_URI")
+
+# Shared HTTP client tuning for GitHub API calls
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_GRAPHQL_URL = os.getenv("GITHUB_GRAPHQL_URL", GITHUB_API_URL.rstrip("/") + "/graphql")
+GITHUB_HTTP_TIMEOUT = float(os.getenv("GITHUB_HTTP_TIMEOUT", "10"))
+GITHUB_HTTP_CONNECT_TIMEOUT = float(os.getenv("GITHUB_HTTP_CONNECT_TIMEOUT", "5"))
+GITHUB_HTTP_MAX_RETRIES = int(os.getenv("GITHUB_HTTP_MAX_RETRIES", "2"))
+GITHUB_HTTP_MAX_CONNECTIONS = int(os.getenv("GITHUB_HTTP_MAX_CONNECTIONS", "100"))
+GITHUB_HTTP_MAX_KEEPALIVE = int(os.getenv("GITHUB_HTTP_MAX_KEEPALIVE", "20"))
+
+# Fan-out limits for concurrent GitHub calls
+GITHUB_MAX_CONCURRENCY = int(os.getenv("GITHUB_MAX_CONCURRENCY", "50"))
+GITHUB_PER_USER_CONCURRENCY = int(os.getenv("GITHUB_PER_USER_CONCURRENCY", "8"))
+
+# Conditional-request cache for GitHub GET responses
+GITHUB_CACHE_MAX_ENTRIES = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "2048"))
+GITHUB_CACHE_MAX_ENTRY_BYTES = int(os.getenv("GITHUB_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+
+# Rate-limit pacing per access token
+GITHUB_RATE_LIMIT_BULK_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_BULK_RESERVE", "500"))
+GITHUB_RATE_LIMIT_PACE_BELOW = float(os.getenv("GITHUB_RATE_LIMIT_PACE_BELOW", "0.5"))
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "30"))
+GITHUB_SECONDARY_BACKOFF = float(os.getenv("GITHUB_SECONDARY_BACKOFF", "60"))
+
+# How the issue mirror and multi-repository issue lists fetch issues: "rest" (one call per repo) or "graphql" (batched)
+GITHUB_FETCH_MODE = os.getenv("GITHUB_FETCH_MODE", "rest")
+GITHUB_GRAPHQL_REPOS_PER_QUERY = int(os.getenv("GITHUB_GRAPHQL_REPOS_PER_QUERY", "20"))
+GITHUB_GRAPHQL_ISSUES_PER_PAGE = int(os.getenv("GITHUB_GRAPHQL_ISSUES_PER_PAGE", "50"))
@@ -1,11 +1,16 @@
-from fastapi import FastAPI, APIRouter, BackgroundTasks
+from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from api.auth.github import router as github_auth_router
 from api.github.routes import router as github_router
 from api.issues.routes import router as issues_router
 from api.webhook.routes import router as webhook_router
-from config.db import Base, engine, SessionLocal
-from services.aiService import update_ai_fixable_status
+from api.admin.routes import router as admin_router
+from config.db import Base, engine
+from services.githubClient import close_github_client
+from services.webhookService import webhook_consumer
+from services.fixJobs import fix_worker_pool
+from services.scheduler import scheduler
+from services.jobs import register_jobs
 import logging
 import os
 
@@ -28,16 +33,6 @@ def validate_env():
     if missing:
         raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
 
-async def startup_ai_status_update():
-    """Update AI-fixable status for all issues on startup"""
-    db = SessionLocal()
-    try:
-        logger.info("Running initial AI-fixable status update")
-        await update_ai_fixable_status(db)
-        logger.info("AI-fixable status update completed")
-    finally:
-        db.close()
-
 # Call this before creating the app
 validate_env()
 Base.metadata.create_all(bind=engine)
@@ -66,6 +61,7 @@ main_router.include_router(github_auth_router, prefix="/auth", tags=["Authentica
 main_router.include_router(github_router, prefix="/github", tags=["GitHub"])
 main_router.include_router(issues_router, prefix="/issues", tags=["Issues"])
 main_router.include_router(webhook_router, prefix="/webhook", tags=["Webhooks"])
+main_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
 
 # Add the main router to the app
 app.include_router(main_router)
@@ -76,10 +72,21 @@ async def root():
 
 @app.on_event("startup")
 async def startup_event():
-    # Create a background tasks object
-    background_tasks = BackgroundTasks()
-    # Add the AI-fixable status update task
-    background_tasks.add_task(startup_ai_status_update)
+    # Startup and periodic maintenance (AI-fixable re-classification etc.)
+    register_jobs(scheduler)
+    scheduler.start()
+    # Drain the webhook outbox off the request path
+    webhook_consumer.start()
+    # Generate fixes off the request path
+    fix_worker_pool.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await scheduler.stop()
+    await webhook_consumer.stop()
+    await fix_worker_pool.stop()
+    # Release pooled GitHub connections
+    await close_github_client()
 
 if __name__ == "__main__":
     import uvicorn
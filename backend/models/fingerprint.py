@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, SmallInteger
+from config.db import Base
+
+class IssueLshBand(Base):
+    """One LSH band bucket of an issue's MinHash signature; issues sharing a bucket are duplicate candidates"""
+    __tablename__ = "issue_lsh_bands"
+    __table_args__ = (
+        Index("ix_issue_lsh_bands_bucket_issue_id", "bucket", "issue_id"),
+    )
+
+    issue_id = Column(Integer, ForeignKey("issues.id", ondelete="CASCADE"), primary_key=True)
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, nullable=False)
@@ -1,11 +1,15 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Index, text
 from sqlalchemy.orm import  relationship
 from datetime import datetime
 from config.db import Base
 
 class Fix(Base):
     __tablename__ = "fixes"
-    
+    __table_args__ = (
+        # Keyset pagination order for an issue's fixes
+        Index("ix_fixes_issue_id_updated_at_id", "issue_id", "updated_at", "id"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     issue_id = Column(Integer, ForeignKey("issues.id"))
     content = Column(Text, nullable=False)
@@ -15,5 +19,41 @@ class Fix(Base):
     is_submitted = Column(Boolean, default=False)
     submission_message = Column(String, nullable=True)
     pr_url = Column(String, nullable=True)
+    # Set when the content was copied from a duplicate issue's generated fix
+    reused_from_id = Column(Integer, ForeignKey("fixes.id", ondelete="SET NULL"), nullable=True)
+
+    issue = relationship("Issue", back_populates="fixes")
+
+# Jobs still waiting for or holding a worker; at most one per issue
+ACTIVE_FIX_JOB_STATUSES = ("queued", "running")
+ACTIVE_FIX_JOB_WHERE = "status IN ('queued', 'running')"
+
+class FixJob(Base):
+    """A queued fix generation, processed by the fix worker pool"""
+    __tablename__ = "fix_jobs"
+    __table_args__ = (
+        Index("ix_fix_jobs_status_id", "status", "id"),
+        # Identical requests for an issue collapse into its active job
+        Index(
+            "uq_fix_jobs_active_issue_id", "issue_id",
+            unique=True,
+            postgresql_where=text(ACTIVE_FIX_JOB_WHERE),
+            sqlite_where=text(ACTIVE_FIX_JOB_WHERE)
+        ),
+    )
 
-    issue = relationship("Issue", back_populates="fixes")
\ No newline at end of file
+    id = Column(Integer, primary_key=True, index=True)
+    issue_id = Column(Integer, ForeignKey("issues.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, default="queued", nullable=False)
+    progress = Column(String, nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    fix_id = Column(Integer, ForeignKey("fixes.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+    worker = Column(String, nullable=True)
+    # Failed attempts wait until then before a worker may claim the job again
+    available_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+    claimed_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
@@ -1,13 +1,42 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, LargeBinary, UniqueConstraint, Index, DDL, event, text
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from config.db import Base
+from models.label import IssueLabel
 
 class Issue(Base):
     __tablename__ = "issues"
+    __table_args__ = (
+        # Each user gets their own copy of a GitHub issue
+        UniqueConstraint("github_issue_id", "user_id", name="uq_issues_github_issue_id_user_id"),
+        # Every dashboard query is scoped to one user, then narrowed by these filters
+        Index("ix_issues_user_id_is_ai_fixable", "user_id", "is_ai_fixable"),
+        Index("ix_issues_user_id_repo_full_name", "user_id", "repo_full_name"),
+        # Keyset pagination order: newest activity first
+        Index("ix_issues_user_id_updated_at_id", "user_id", "updated_at", "id"),
+        Index("ix_issues_cluster_id", "cluster_id"),
+        # Work queue of the clustering stage: new issues and issues whose text changed
+        Index(
+            "ix_issues_unclustered_id", "id",
+            postgresql_where=text("cluster_id IS NULL"),
+            sqlite_where=text("cluster_id IS NULL")
+        ),
+        # Trigram indexes serve the ILIKE '%...%' searches; Postgres only (pg_trgm).
+        # Labels live in issue_labels and are matched exactly.
+        *(
+            Index(
+                f"ix_issues_{column}_trgm", column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"}
+            ).ddl_if(dialect="postgresql")
+            for column in ("title", "repo_full_name")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    github_issue_id = Column(Integer, unique=True, index=True)
+    github_issue_id = Column(Integer, index=True)
+    number = Column(Integer, nullable=True)
     title = Column(String, nullable=False)
     repo_full_name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -16,8 +45,70 @@ class Issue(Base):
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     is_ai_fixable = Column(Boolean, default=False)
-    labels = Column(String, nullable=True)
+    ai_fixable_reason = Column(String, nullable=True)
+    classifier_version = Column(String, nullable=True)
+    content_hash = Column(String, nullable=True)
+    # MinHash signature of the normalized title and description; see services.issueFingerprint
+    minhash = Column(LargeBinary, nullable=True)
+    # Near-duplicate group, named after its first member; NULL until the clustering stage has run
+    cluster_id = Column(Integer, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"))
 
     user = relationship("User", back_populates="issues")
-    fixes = relationship("Fix", back_populates="issue")
\ No newline at end of file
+    fixes = relationship("Fix", back_populates="issue")
+    # Loaded with the issue so async handlers never trigger a lazy load
+    label_rows = relationship(
+        IssueLabel,
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+        order_by=IssueLabel.name
+    )
+    labels = association_proxy("label_rows", "name", creator=lambda name: IssueLabel(name=name))
+
+# Full-text search index over title and description, maintained by the database on
+# every write: a generated tsvector + GIN index on Postgres, an FTS5 table on SQLite
+ISSUE_SEARCH_DDL = {
+    "postgresql": [
+        """
+        ALTER TABLE issues ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX ix_issues_search_vector ON issues USING gin (search_vector)",
+    ],
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE issues_fts USING fts5(
+            title, description, content='issues', content_rowid='id',
+            tokenize='unicode61', prefix='2 3'
+        )
+        """,
+        """
+        CREATE TRIGGER issues_fts_insert AFTER INSERT ON issues BEGIN
+            INSERT INTO issues_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER issues_fts_delete AFTER DELETE ON issues BEGIN
+            INSERT INTO issues_fts(issues_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER issues_fts_update AFTER UPDATE OF title, description ON issues BEGIN
+            INSERT INTO issues_fts(issues_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO issues_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ],
+}
+
+event.listen(
+    Issue.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
+for dialect, statements in ISSUE_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Issue.__table__, "after_create", DDL(statement).execute_if(dialect=dialect))
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from config.db import Base
+
+class ScheduledJob(Base):
+    """Cluster-wide run lease, next due time and last-run record for a background job"""
+    __tablename__ = "scheduled_jobs"
+
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=True)
+    # Held only while a run is in progress; expires if the runner crashes
+    locked_until = Column(DateTime, nullable=True)
+    next_run_at = Column(DateTime, nullable=True)
+    last_status = Column(String, nullable=True)
+    last_started_at = Column(DateTime, nullable=True)
+    last_finished_at = Column(DateTime, nullable=True)
+    last_duration_ms = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from config.db import Base
+
+class IssueLabel(Base):
+    """One GitHub label on one issue row; replaces the JSON-encoded issues.labels column"""
+    __tablename__ = "issue_labels"
+    __table_args__ = (
+        # Serves exact label filters: name lookup, then join back to the issue
+        Index("ix_issue_labels_name_issue_id", "name", "issue_id"),
+    )
+
+    issue_id = Column(Integer, ForeignKey("issues.id", ondelete="CASCADE"), primary_key=True)
+    name = Column(String, primary_key=True)
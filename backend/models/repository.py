@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, UniqueConstraint
+from datetime import datetime
+from config.db import Base
+
+class TrackedRepository(Base):
+    """A repository a user can see; webhook events for it are fanned out to these users"""
+    __tablename__ = "tracked_repositories"
+    __table_args__ = (
+        UniqueConstraint("user_id", "repo_full_name", name="uq_tracked_repositories_user_repo"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    repo_full_name = Column(String, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+class RepoSyncState(Base):
+    """Progress of the incremental issue mirror for one repository, shared by every user tracking it"""
+    __tablename__ = "repo_sync_states"
+
+    repo_full_name = Column(String, primary_key=True)
+    # updated_at of the newest mirrored issue, verbatim from GitHub; sent back as since=
+    since = Column(String, nullable=True)
+    last_synced_at = Column(DateTime, nullable=True)
+    last_status = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    issues_synced = Column(Integer, default=0)
+
+class ForkParent(Base):
+    """Cached parent of a fork; parent_full_name is null when the repository has none"""
+    __tablename__ = "fork_parents"
+
+    # Lowercased: GitHub repository names are case-insensitive
+    fork_full_name = Column(String, primary_key=True)
+    parent_full_name = Column(String, nullable=True, index=True)
+    parent_name = Column(String, nullable=True)
+    resolved_at = Column(DateTime, nullable=False, default=datetime.now)
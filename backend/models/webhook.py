@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, LargeBinary, Index
+from datetime import datetime
+from config.db import Base
+
+class WebhookEvent(Base):
+    """Outbox row for a received GitHub delivery, drained by the webhook consumer"""
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        Index("ix_webhook_events_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    delivery_id = Column(String, unique=True, nullable=False)
+    event_type = Column(String, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    status = Column(String, default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    received_at = Column(DateTime, default=datetime.now)
+    claimed_at = Column(DateTime, nullable=True)
+    processed_at = Column(DateTime, nullable=True)
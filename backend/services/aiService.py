@@ -1,11 +1,13 @@
+import asyncio
 import requests
 from fastapi import HTTPException
+from config.db import SessionLocal
 from models.fix import Fix
 from models.issue import Issue
+from models.label import IssueLabel
 from models.user import User
-from datetime import datetime
-import json
-import re
+from services.fixabilityClassifier import CLASSIFIER_VERSION, classify_issue, classify_many, content_hash
+from sqlalchemy import select, update
 
 async def is_issue_ai_fixable(issue):
     """
@@ -14,122 +16,103 @@ async def is_issue_ai_fixable(issue):
     2. Contains error messages or stack traces
     3. Has clear reproduction steps
     """
-    # Check labels
-    labels = []
-    if issue.labels:
-        try:
-            labels = json.loads(issue.labels)
-        except:
-            pass
-    
-    if "bug" in labels or "ai-fixable" in labels:
-        return True
-        
-    # Check content for error patterns if description exists
-    if issue.description:
-        # Check for stack traces or error messages
-        error_patterns = [
-            r"error:",
-            r"exception:",
-            r"traceback",
-            r"fail(ed|ure|ing)?",
-            r"steps to reproduce"
-        ]
-        
-        for pattern in error_patterns:
-            if re.search(pattern, issue.description, re.IGNORECASE):
-                return True
-    
-    return False
+    return classify_issue(issue).fixable
 
-async def update_ai_fixable_status(db, user_id=None):
-    """Update is_ai_fixable status for all issues or for a specific user"""
-    query = db.query(Issue)
-    if user_id:
-        query = query.filter(Issue.user_id == user_id)
-    
-    issues = query.all()
+def reclassify_issues(db, user_id=None, processes=0, chunk_size=1000, force=False):
+    """
+    Update is_ai_fixable status for all issues or for a specific user.
+
+    Issues are streamed in keyset-paginated chunks and written back with one
+    bulk UPDATE per chunk. Unless force is set, only issues that were never
+    classified, whose labels or description changed since (their content
+    hash differs), or that were classified by older rules are classified.
+    """
+    columns = (
+        Issue.id,
+        Issue.description,
+        Issue.is_ai_fixable,
+        Issue.ai_fixable_reason,
+        Issue.classifier_version,
+        Issue.content_hash,
+        Issue.updated_at,
+    )
     updated_count = 0
-    
-    for issue in issues:
-        fixable = await is_issue_ai_fixable(issue)
-        if issue.is_ai_fixable != fixable:
-            issue.is_ai_fixable = fixable
-            updated_count += 1
-    
-    if updated_count > 0:
+    last_id = 0
+    
+    while True:
+        # Edits only show in the hash, so every row is read; classifying is what costs
+        query = select(*columns).where(Issue.id > last_id)
+        if user_id:
+            query = query.where(Issue.user_id == user_id)
+        rows = db.execute(query.order_by(Issue.id).limit(chunk_size)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        labels_by_issue = {row.id: [] for row in rows}
+        for issue_id, name in db.execute(
+            select(IssueLabel.issue_id, IssueLabel.name)
+            .where(IssueLabel.issue_id.in_(list(labels_by_issue)))
+            .order_by(IssueLabel.issue_id, IssueLabel.name)
+        ):
+            labels_by_issue[issue_id].append(name)
+        hashes = {row.id: content_hash(labels_by_issue[row.id], row.description) for row in rows}
+        if not force:
+            rows = [
+                row for row in rows
+                if row.classifier_version != CLASSIFIER_VERSION or row.content_hash != hashes[row.id]
+            ]
+            if not rows:
+                continue
+        
+        results = classify_many(((labels_by_issue[row.id], row.description) for row in rows), processes=processes)
+        changes = []
+        for row, result in zip(rows, results):
+            if row.is_ai_fixable != result.fixable or row.ai_fixable_reason != result.rule:
+                updated_count += 1
+            changes.append({
+                "id": row.id,
+                "is_ai_fixable": result.fixable,
+                "ai_fixable_reason": result.rule,
+                "classifier_version": CLASSIFIER_VERSION,
+                "content_hash": hashes[row.id],
+                # Re-classification is bookkeeping, not an edit of the issue
+                "updated_at": row.updated_at,
+            })
+        
+        db.execute(update(Issue), changes)
         db.commit()
     
     return updated_count
 
-async def generate_fix_for_issue(db, issue_id, user_id):
+async def update_ai_fixable_status(user_id=None, **kwargs):
     """
-    Generate an AI-powered fix for a specific issue
+    Run reclassify_issues in a worker thread with its own sync session, so the
+    CPU-bound pass never stalls the event loop. Background jobs call
+    reclassify_issues directly; the scheduler already runs them in a thread.
     """
-    # Fetch the issue
-    issue = db.query(Issue).filter(Issue.id == issue_id, Issue.user_id == user_id).first()
-    if not issue:
-        raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
-    
-    # Check if the issue is AI-fixable
-    if not issue.is_ai_fixable:
-        raise HTTPException(status_code=400, detail="This issue is not marked as AI-fixable")
-    
-    # In a real implementation, you would call your AI model or service here
-    # For this example, we'll generate a simple mock fix
-    fix_content = f"""
-    # AI-generated fix for issue #{issue.github_issue_id}
-    
-    This is a placeholder for an AI-generated code fix. In a production environment,
-    this would contain actual code changes to address the issue.
-    
-    For a bug related to {issue.title}, we might:
-    1. Identify the root cause
-    2. Implement a fix that addresses the core issue
-    3. Add tests to verify the solution
-    
-    ## Suggested Changes:
-    ```python
-    def fix_bug():
-        # Previous buggy code
-        # return broken_result
-        
-        # New fixed code
-        return correct_result
-    ```
-    """
-    
-    # Create a new fix record
-    fix = Fix(
-        issue_id=issue_id,
-        content=fix_content,
-        status="pending",
-        created_at=datetime.now(),
-        is_submitted=False
-    )
-    
-    db.add(fix)
-    db.commit()
-    db.refresh(fix)
-    
-    return fix
+    def run():
+        with SessionLocal() as db:
+            return reclassify_issues(db, user_id, **kwargs)
+
+    return await asyncio.to_thread(run)
 
 async def submit_fix_to_github(db, fix_id, user_id, submission_message):
     """
     Submit a fix to GitHub as a pull request
     """
     # Fetch the fix
-    fix = db.query(Fix).filter(Fix.id == fix_id).first()
+    fix = await db.get(Fix, fix_id)
     if not fix:
         raise HTTPException(status_code=404, detail="Fix not found")
     
     # Fetch the issue
-    issue = db.query(Issue).filter(Issue.id == fix.issue_id, Issue.user_id == user_id).first()
+    issue = await db.scalar(select(Issue).where(Issue.id == fix.issue_id, Issue.user_id == user_id))
     if not issue:
         raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
     
     # Fetch the user to get GitHub token
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -145,7 +128,7 @@ async def submit_fix_to_github(db, fix_id, user_id, submission_message):
     fix.pr_url = f"https://github.com/{issue.repo_full_name}/pull/999"  # Mock PR URL
     fix.status = "submitted"
     
-    db.commit()
-    db.refresh(fix)
+    await db.commit()
+    await db.refresh(fix)
     
     return fix
\ No newline at end of file
@@ -0,0 +1,436 @@
+import base64
+import bisect
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from services.codeReferences import References, extract_references
+
+try:
+    import fcntl
+except ImportError:  # Windows: syncs are still serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Bare clones and their indexes live here; code context is disabled while it is unset
+CODE_CONTEXT_DIR = os.getenv("CODE_CONTEXT_DIR", "")
+# Clone URL of a repository; a file:// template serves local repositories instead of GitHub
+CODE_CONTEXT_REMOTE = os.getenv("CODE_CONTEXT_REMOTE", "https://github.com/{repo_full_name}.git")
+# A repository is fetched at most this often; lookups in between use the last indexed commit
+CODE_CONTEXT_FETCH_INTERVAL = int(os.getenv("CODE_CONTEXT_FETCH_INTERVAL", "300"))
+CODE_CONTEXT_MAX_FILE_BYTES = int(os.getenv("CODE_CONTEXT_MAX_FILE_BYTES", str(512 * 1024)))
+CODE_CONTEXT_SNIPPETS = int(os.getenv("CODE_CONTEXT_SNIPPETS", "8"))
+CODE_CONTEXT_TOKEN_BUDGET = int(os.getenv("CODE_CONTEXT_TOKEN_BUDGET", "6000"))
+CODE_CONTEXT_GIT_TIMEOUT = int(os.getenv("CODE_CONTEXT_GIT_TIMEOUT", "600"))
+
+# Bump when the schema or what gets indexed changes; older indexes are rebuilt
+INDEX_VERSION = "1"
+# Lines shown either side of a line of interest
+SNIPPET_RADIUS = 12
+# Rough size estimate for the token budget, so no tokenizer is needed
+CHARS_PER_TOKEN = 4
+
+REPO_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]*/[A-Za-z0-9_-][A-Za-z0-9_.-]*$")
+GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    blob TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_files_name ON files (name);
+CREATE TABLE IF NOT EXISTS symbols (name TEXT NOT NULL, file_id INTEGER NOT NULL, line INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS ix_symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS ix_symbols_file_id ON symbols (file_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS bodies USING fts5 (body, tokenize = 'trigram');
+"""
+
+# Definitions in the common languages; anything else is still found through the trigram index
+DEFINITION = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:async[ \t]+)?"
+    r"(?:def|class|function\*?|fn|interface|struct|enum|trait|type|module|func(?:[ \t]*\([^)\n]*\))?)[ \t]+(\w+)"
+    r"|^[ \t]*(?:export[ \t]+)?(?:const|let|var)[ \t]+(\w+)[ \t]*=[ \t]*(?:async[ \t]*)?(?:\([^)\n]*\)|\w+)[ \t]*=>"
+    r"|^[ \t]+(?:(?:public|private|protected|internal|static|final|abstract|synchronized|override|virtual|async)[ \t]+)+"
+    r"[\w<>\[\],.? ]+?[ \t]+(\w+)[ \t]*\(",
+    re.MULTILINE
+)
+
+class CodeContextError(Exception):
+    pass
+
+class Snippet(NamedTuple):
+    path: str
+    start_line: int
+    end_line: int
+    text: str
+    score: float
+    reasons: Tuple[str, ...]
+
+class _Candidate:
+    def __init__(self, file_id: int, path: str):
+        self.file_id = file_id
+        self.path = path
+        self.score = 0.0
+        self.lines: Dict[int, float] = {}
+        self.reasons: List[str] = []
+
+def _git(*args: str, cwd: Optional[str] = None, access_token: Optional[str] = None) -> str:
+    env = GIT_ENV
+    if access_token:
+        # Passed as environment config, never on the command line where ps and error messages show it
+        credentials = base64.b64encode(f"x-access-token:{access_token}".encode()).decode()
+        index = int(GIT_ENV.get("GIT_CONFIG_COUNT", "0"))
+        env = {
+            **GIT_ENV,
+            "GIT_CONFIG_COUNT": str(index + 1),
+            f"GIT_CONFIG_KEY_{index}": "http.extraHeader",
+            f"GIT_CONFIG_VALUE_{index}": f"Authorization: Basic {credentials}",
+        }
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, env=env, capture_output=True,
+                                timeout=CODE_CONTEXT_GIT_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise CodeContextError(f"git {args[0]} timed out")
+    if result.returncode != 0:
+        raise CodeContextError(f"git {args[0]} failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout.decode(errors="replace")
+
+def _read_blobs(clone_dir: str, shas: List[str]) -> Iterator[Tuple[str, bytes]]:
+    """Stream blob contents through one `git cat-file --batch` process"""
+    process = subprocess.Popen(["git", "cat-file", "--batch"], cwd=clone_dir, env=GIT_ENV,
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+    def feed():
+        # Written from a thread so a full stdout pipe cannot deadlock the request list
+        try:
+            process.stdin.write("".join(f"{sha}\n" for sha in shas).encode())
+        finally:
+            process.stdin.close()
+
+    writer = threading.Thread(target=feed, daemon=True)
+    writer.start()
+    try:
+        for _ in shas:
+            header = process.stdout.readline().split()
+            if len(header) < 3:
+                continue
+            data = process.stdout.read(int(header[2]))
+            process.stdout.read(1)
+            yield header[0].decode(), data
+    finally:
+        process.stdout.close()
+        process.wait()
+        writer.join()
+
+def _line_starts(body: str) -> List[int]:
+    starts = [0]
+    position = body.find("\n")
+    while position != -1:
+        starts.append(position + 1)
+        position = body.find("\n", position + 1)
+    return starts
+
+def extract_symbols(body: str) -> List[Tuple[str, int]]:
+    """(name, line) of every definition DEFINITION recognises"""
+    starts = _line_starts(body)
+    return [
+        (next(group for group in match.groups() if group), bisect.bisect_right(starts, match.start()))
+        for match in DEFINITION.finditer(body)
+    ]
+
+def _phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+def _literal(message: str) -> str:
+    """The leading fixed part of an error message, before values interpolated into it"""
+    return re.split(r"[\"'`/\\{}\[\]()<>=]|\d|:\s", message)[0].strip()
+
+class CodeContext:
+    """
+    A bare clone of each repository's default branch, kept current with
+    shallow incremental fetches, and an on-disk SQLite index of its tree:
+    paths, symbol definitions and an FTS5 trigram index of file contents.
+    Only blobs that changed since the last indexed commit are re-indexed.
+
+    Every method blocks on git and SQLite; call them from a thread.
+    """
+
+    def __init__(self, root: str = CODE_CONTEXT_DIR, remote: str = CODE_CONTEXT_REMOTE):
+        self.root = root
+        self.remote = remote
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def _paths(self, repo_full_name: str) -> Tuple[str, str]:
+        if not REPO_NAME.match(repo_full_name):
+            raise ValueError(f"Invalid repository name {repo_full_name!r}")
+        base = os.path.join(self.root, *repo_full_name.lower().split("/"))
+        return base + ".git", base + ".index.sqlite"
+
+    @contextmanager
+    def _lock(self, repo_full_name: str):
+        """One sync per repository at a time, across threads and (where flock exists) processes"""
+        clone_dir, _ = self._paths(repo_full_name)
+        with self._locks_guard:
+            lock = self._locks.setdefault(repo_full_name.lower(), threading.Lock())
+        with lock:
+            os.makedirs(os.path.dirname(clone_dir), exist_ok=True)
+            with open(clone_dir + ".lock", "w") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    def _connect(self, index_path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(index_path, timeout=30, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        return db
+
+    def sync(self, repo_full_name: str, access_token: Optional[str] = None, force: bool = False) -> dict:
+        """
+        Clone or fetch the repository unless it was fetched within
+        CODE_CONTEXT_FETCH_INTERVAL, then bring the index up to the fetched
+        commit. Returns the commit and how many files were (re)indexed or dropped.
+        """
+        clone_dir, index_path = self._paths(repo_full_name)
+        with self._lock(repo_full_name):
+            db = self._connect(index_path)
+            try:
+                meta = dict(db.execute("SELECT key, value FROM meta"))
+                fresh = time.time() - float(meta.get("fetched_at", 0)) < CODE_CONTEXT_FETCH_INTERVAL
+                if os.path.isdir(clone_dir) and fresh and not force and meta.get("version") == INDEX_VERSION:
+                    return {"commit": meta.get("commit"), "indexed": 0, "removed": 0, "fetched": False}
+
+                commit = self._fetch(repo_full_name, clone_dir, access_token)
+                stats = self._update_index(db, clone_dir, commit, meta)
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('fetched_at', ?)", (str(time.time()),))
+            finally:
+                db.close()
+        if stats["indexed"] or stats["removed"]:
+            logger.info(f"Indexed {repo_full_name} at {commit[:12]}: {stats['indexed']} files updated, {stats['removed']} removed")
+        return {"commit": commit, **stats, "fetched": True}
+
+    def _fetch(self, repo_full_name: str, clone_dir: str, access_token: Optional[str]) -> str:
+        url = self.remote.format(repo_full_name=repo_full_name)
+        if not os.path.isdir(clone_dir):
+            partial = clone_dir + ".partial"
+            shutil.rmtree(partial, ignore_errors=True)
+            _git("clone", "--bare", "--depth", "1", "--no-tags", "--quiet", url, partial, access_token=access_token)
+            os.replace(partial, clone_dir)
+            return _git("rev-parse", "HEAD", cwd=clone_dir).strip()
+
+        # Only objects the new commit adds are transferred
+        _git("fetch", "--depth", "1", "--no-tags", "--quiet", url, "HEAD", cwd=clone_dir, access_token=access_token)
+        commit = _git("rev-parse", "FETCH_HEAD", cwd=clone_dir).strip()
+        _git("update-ref", "HEAD", commit, cwd=clone_dir)
+        _git("gc", "--auto", "--quiet", cwd=clone_dir)
+        return commit
+
+    def _update_index(self, db: sqlite3.Connection, clone_dir: str, commit: str, meta: dict) -> dict:
+        if meta.get("commit") == commit and meta.get("version") == INDEX_VERSION:
+            return {"indexed": 0, "removed": 0}
+
+        tree = {}
+        for entry in _git("ls-tree", "-r", "-z", commit, cwd=clone_dir).split("\0"):
+            if not entry:
+                continue
+            info, path = entry.split("\t", 1)
+            mode, kind, sha = info.split()
+            # Symlinks and submodules have no content of their own here
+            if kind == "blob" and mode != "120000":
+                tree[path] = sha
+
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if meta.get("version") != INDEX_VERSION:
+                db.execute("DELETE FROM files")
+                db.execute("DELETE FROM symbols")
+                db.execute("DELETE FROM bodies")
+            indexed = dict(db.execute("SELECT path, blob FROM files"))
+            stale = [path for path, sha in indexed.items() if tree.get(path) != sha]
+            changed = {path: sha for path, sha in tree.items() if indexed.get(path) != sha}
+
+            for start in range(0, len(stale), 500):
+                ids = [row[0] for row in db.execute(
+                    f"SELECT id FROM files WHERE path IN ({','.join('?' * len(stale[start:start + 500]))})",
+                    stale[start:start + 500]
+                )]
+                db.executemany("DELETE FROM bodies WHERE rowid = ?", [(file_id,) for file_id in ids])
+                db.executemany("DELETE FROM symbols WHERE file_id = ?", [(file_id,) for file_id in ids])
+                db.executemany("DELETE FROM files WHERE id = ?", [(file_id,) for file_id in ids])
+
+            paths_by_sha: Dict[str, List[str]] = {}
+            for path, sha in changed.items():
+                paths_by_sha.setdefault(sha, []).append(path)
+            for sha, data in _read_blobs(clone_dir, list(paths_by_sha)):
+                # Binary and oversized files stay findable by path but are not searched
+                text = None
+                if len(data) <= CODE_CONTEXT_MAX_FILE_BYTES and b"\0" not in data[:8192]:
+                    text = data.decode("utf-8", errors="replace")
+                symbols = extract_symbols(text) if text else []
+                for path in paths_by_sha[sha]:
+                    file_id = db.execute(
+                        "INSERT INTO files (path, name, blob) VALUES (?, ?, ?)", (path, path.rsplit("/", 1)[-1], sha)
+                    ).lastrowid
+                    if text is not None:
+                        db.execute("INSERT INTO bodies (rowid, body) VALUES (?, ?)", (file_id, text))
+                        db.executemany("INSERT INTO symbols VALUES (?, ?, ?)",
+                                       [(name, file_id, line) for name, line in symbols])
+
+            db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                           [("commit", commit), ("version", INDEX_VERSION)])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return {"indexed": len(changed), "removed": len(stale) - sum(1 for path in stale if path in changed)}
+
+    def find_snippets(self, repo_full_name: str, text: str, limit: int = CODE_CONTEXT_SNIPPETS,
+                      token_budget: int = CODE_CONTEXT_TOKEN_BUDGET) -> List[Snippet]:
+        """
+        The code an issue description most likely refers to, best first, cut to
+        at most `limit` snippets and roughly `token_budget` tokens. Returns
+        nothing for repositories that were never synced.
+        """
+        _, index_path = self._paths(repo_full_name)
+        if not os.path.exists(index_path):
+            return []
+        db = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, timeout=30)
+        try:
+            candidates = self._rank(db, extract_references(text))
+            return self._snippets(db, candidates, limit, token_budget)
+        finally:
+            db.close()
+
+    def context_for(self, repo_full_name: str, text: str, access_token: Optional[str] = None) -> List[Snippet]:
+        """sync() then find_snippets(); a repository that cannot be fetched still uses its last index"""
+        try:
+            self.sync(repo_full_name, access_token)
+        except CodeContextError as e:
+            logger.warning(f"Could not update code context of {repo_full_name}: {str(e)}")
+        return self.find_snippets(repo_full_name, text)
+
+    def _resolve_path(self, db: sqlite3.Connection, path: str) -> List[Tuple[int, str]]:
+        """Indexed files a (possibly absolute or partial) path refers to: those sharing the longest path suffix"""
+        parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")]
+        if not parts:
+            return []
+        best, matches = 0, []
+        for file_id, indexed_path in db.execute("SELECT id, path FROM files WHERE name = ?", (parts[-1],)):
+            indexed_parts = indexed_path.split("/")
+            common = 0
+            while common < min(len(parts), len(indexed_parts)) and parts[-1 - common] == indexed_parts[-1 - common]:
+                common += 1
+            if common > best:
+                best, matches = common, [(file_id, indexed_path)]
+            elif common == best:
+                matches.append((file_id, indexed_path))
+        # A bare file name shared by many files says little about which one is meant
+        return matches if len(matches) <= 3 else []
+
+    def _rank(self, db: sqlite3.Connection, references: References) -> List[_Candidate]:
+        candidates: Dict[int, _Candidate] = {}
+
+        def hit(file_id: int, path: str, points: float, line: Optional[int], reason: str):
+            candidate = candidates.setdefault(file_id, _Candidate(file_id, path))
+            candidate.score += points
+            if line:
+                candidate.lines[line] = candidate.lines.get(line, 0) + points
+            candidate.reasons.append(reason)
+
+        for frame in references.frames:
+            for file_id, path in self._resolve_path(db, frame.path):
+                hit(file_id, path, 10, frame.line, f"frame {frame.path}:{frame.line}")
+        for mentioned in references.paths:
+            for file_id, path in self._resolve_path(db, mentioned):
+                hit(file_id, path, 6, None, f"path {mentioned}")
+
+        undefined = []
+        for name in references.identifiers[:30]:
+            rows = db.execute(
+                "SELECT symbols.file_id, files.path, symbols.line FROM symbols JOIN files ON files.id = symbols.file_id"
+                " WHERE symbols.name = ? LIMIT 50", (name,)
+            ).fetchall()
+            if not rows:
+                undefined.append(name)
+            # Names defined in many places point nowhere in particular
+            for file_id, path, line in rows:
+                hit(file_id, path, 4 / len(rows), line, f"defines {name}")
+
+        # Messages are searched verbatim first, then by their fixed prefix in case values were interpolated
+        searches = [((message, _literal(message)), 3, "message") for message in references.strings]
+        searches += [((name,), 1, "uses") for name in undefined[:10]]
+        for needles, points, label in searches:
+            for needle in dict.fromkeys(needle for needle in needles if len(needle) >= 4):
+                rows = db.execute(
+                    "SELECT files.id, files.path FROM bodies JOIN files ON files.id = bodies.rowid"
+                    " WHERE bodies MATCH ? LIMIT 20", (_phrase(needle),)
+                ).fetchall()
+                for file_id, path in rows:
+                    hit(file_id, path, points / len(rows), self._find_line(db, file_id, needle), f"{label} {needle!r}")
+                if rows:
+                    break
+
+        return sorted(candidates.values(), key=lambda candidate: (-candidate.score, candidate.path))
+
+    def _find_line(self, db: sqlite3.Connection, file_id: int, needle: str) -> Optional[int]:
+        body = db.execute("SELECT body FROM bodies WHERE rowid = ?", (file_id,)).fetchone()
+        position = body[0].lower().find(needle.lower()) if body else -1
+        return body[0].count("\n", 0, position) + 1 if position >= 0 else None
+
+    def _snippets(self, db: sqlite3.Connection, candidates: List[_Candidate], limit: int,
+                  token_budget: int) -> List[Snippet]:
+        snippets = []
+        budget = token_budget * CHARS_PER_TOKEN
+        for candidate in candidates:
+            if len(snippets) >= limit or budget <= 0:
+                break
+            body = db.execute("SELECT body FROM bodies WHERE rowid = ?", (candidate.file_id,)).fetchone()
+            if body is None:
+                continue
+            lines = body[0].splitlines()
+            # The file's strongest lines, or its head when only its path was mentioned
+            focus = sorted(candidate.lines, key=lambda line: -candidate.lines[line])[:3] or [1]
+            windows = []
+            for line in sorted(focus):
+                start, end = max(1, line - SNIPPET_RADIUS), min(len(lines), line + SNIPPET_RADIUS)
+                if windows and start <= windows[-1][1] + 1:
+                    previous = windows[-1]
+                    anchor = max(previous[2], line, key=lambda focused: candidate.lines.get(focused, 0))
+                    windows[-1] = (previous[0], max(previous[1], end), anchor)
+                else:
+                    windows.append((start, end, line))
+            for start, end, anchor in windows:
+                if len(snippets) >= limit:
+                    break
+                # Trim the side farther from the window's strongest line until the snippet fits the budget
+                while len("\n".join(lines[start - 1:end])) > budget and end > start:
+                    if anchor - start > end - anchor:
+                        start += 1
+                    else:
+                        end -= 1
+                text = "\n".join(lines[start - 1:end])
+                if len(text) > budget:
+                    budget = 0
+                    break
+                budget -= len(text)
+                snippets.append(Snippet(candidate.path, start, end, text, round(candidate.score, 2),
+                                        tuple(dict.fromkeys(candidate.reasons))))
+        return snippets
+
+code_context = CodeContext()
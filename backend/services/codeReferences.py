@@ -0,0 +1,68 @@
+import re
+from typing import List, NamedTuple, Optional
+
+SOURCE_EXTENSIONS = (
+    "py", "pyi", "js", "jsx", "mjs", "cjs", "ts", "tsx", "go", "java", "kt", "scala", "rb", "rs", "php",
+    "c", "h", "cc", "cpp", "hpp", "cs", "swift", "m", "vue", "svelte",
+)
+_EXT = "|".join(sorted(SOURCE_EXTENSIONS, key=len, reverse=True))
+
+# File "app/models.py", line 42, in save
+PYTHON_FRAME = re.compile(r'File "(?P<path>[^"]+)", line (?P<line>\d+)(?:, in (?P<symbol>[\w<>.]+))?')
+# at save (src/app.js:42:7), at Object.save [as run] (src/app.js:42:7) and at com.acme.Store.save(Store.java:42)
+CALL_FRAME = re.compile(
+    r"\bat (?:async )?(?P<symbol>[\w$.<>]+)(?: \[as [\w$]+\])? ?\((?P<path>[^()\s]+?):(?P<line>\d+)(?::\d+)?\)"
+)
+# Bare path:line locations: Go panics, compiler errors, bare JS frames
+PATH_LINE = re.compile(rf"(?P<path>(?:[\w@~.-]+/)*[\w@~.-]+\.(?:{_EXT})):(?P<line>\d+)\b")
+PATH = re.compile(rf"(?<![\w/.-])(?P<path>(?:[\w@~.-]+/)*[\w@~-][\w@~.-]*\.(?:{_EXT}))\b(?![/\w])")
+BACKTICKED = re.compile(r"`([^`\n]{3,120})`")
+# snake_case, camelCase, PascalCase and dotted.names with at least one inner boundary
+IDENTIFIER = re.compile(r"\b(?:[a-z]+_[a-z0-9_]+|[a-z]+[A-Z]\w*|[A-Z][a-z0-9]+[A-Z]\w*)\b")
+ERROR_MESSAGE = re.compile(r"\b(?:\w*(?:Error|Exception)|panic|FATAL|fatal)\b:\s*(?P<message>[^\n]{3,200})")
+
+class Frame(NamedTuple):
+    path: str
+    line: int
+    symbol: Optional[str]
+
+class References(NamedTuple):
+    """What an issue description points at in the code, most specific first"""
+    frames: List[Frame]
+    paths: List[str]
+    identifiers: List[str]
+    strings: List[str]
+
+def _unique(items):
+    return list(dict.fromkeys(item for item in items if item))
+
+def _unquote(message: str) -> str:
+    if len(message) > 1 and message[0] == message[-1] and message[0] in "'\"":
+        return message[1:-1]
+    return message
+
+def extract_references(text: Optional[str]) -> References:
+    """Pull stack-trace frames, file paths, identifiers and error messages out of an issue description"""
+    text = text or ""
+    frames = {}
+    # Specific frame formats first, so their symbol wins over a bare path:line match of the same spot
+    for pattern in (PYTHON_FRAME, CALL_FRAME, PATH_LINE):
+        for match in pattern.finditer(text):
+            location = (match.group("path"), int(match.group("line")))
+            frames.setdefault(location, (match.start(), Frame(*location, match.groupdict().get("symbol"))))
+    frames = [frame for _, frame in sorted(frames.values())]
+
+    framed_paths = {frame.path for frame in frames}
+    paths = _unique(match.group("path") for match in PATH.finditer(text) if match.group("path") not in framed_paths)
+
+    identifiers = []
+    for frame in frames:
+        if frame.symbol:
+            identifiers.append(frame.symbol.rsplit(".", 1)[-1].strip("<>"))
+    for snippet in BACKTICKED.findall(text):
+        identifiers.extend(re.findall(r"[A-Za-z_]\w{3,}", snippet))
+    identifiers.extend(IDENTIFIER.findall(text))
+    identifiers = [name for name in _unique(identifiers) if name != "module"]
+
+    strings = _unique(_unquote(match.group("message").strip()) for match in ERROR_MESSAGE.finditer(text))
+    return References(frames, paths, identifiers, strings)
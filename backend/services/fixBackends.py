@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from services.codeContext import Snippet
+
+# Which registered backend generates fixes; see register_fix_backend()
+FIX_BACKEND = os.getenv("FIX_BACKEND", "template")
+# Simulated generation time of the stub backend, in seconds
+FIX_STUB_DELAY = float(os.getenv("FIX_STUB_DELAY", "0"))
+
+class FixRequest(NamedTuple):
+    """What a backend gets to see of an issue; read before generation so no DB connection is held"""
+    issue_id: int
+    github_issue_id: int
+    repo_full_name: str
+    title: str
+    description: Optional[str]
+    labels: List[str]
+    # Repository code the issue most likely refers to, best first; empty without CODE_CONTEXT_DIR
+    context: Tuple[Snippet, ...] = ()
+
+def context_summary(request: FixRequest) -> str:
+    """One line per code snippet a fix was generated from"""
+    return "".join(
+        f"- {snippet.path}:{snippet.start_line}-{snippet.end_line} ({', '.join(snippet.reasons)})\n"
+        for snippet in request.context
+    )
+
+class FixBackend:
+    """Turns an issue into fix content. Backends may take as long as they need; they run on the fix worker pool."""
+    name = "base"
+
+    async def generate(self, request: FixRequest) -> str:
+        raise NotImplementedError
+
+    def header(self, request: FixRequest) -> Optional[str]:
+        """
+        The part of generated content that names the issue, or None if the
+        backend cannot tell it apart from the rest. Everything after it must
+        fit any near-duplicate of the issue.
+        """
+        return None
+
+    def reuse(self, content: str, source: FixRequest, target: FixRequest) -> Optional[str]:
+        """Content generated for `source` rewritten for its duplicate `target`, or None if it does not fit"""
+        if (source.repo_full_name, source.github_issue_id) == (target.repo_full_name, target.github_issue_id):
+            return content
+        source_header, target_header = self.header(source), self.header(target)
+        if source_header is None or target_header is None or not content.startswith(source_header):
+            return None
+        return target_header + content[len(source_header):]
+
+class TemplateBackend(FixBackend):
+    """The placeholder fix the API has always returned"""
+    name = "template"
+
+    def header(self, request: FixRequest) -> str:
+        return f"""
+    # AI-generated fix for issue #{request.github_issue_id}
+
+    This is a placeholder for an AI-generated code fix. In a production environment,
+    this would contain actual code changes to address the issue.
+
+    For a bug related to {request.title}, we might:
+"""
+
+    async def generate(self, request: FixRequest) -> str:
+        relevant = f"\n    ## Relevant code:\n{context_summary(request)}" if request.context else ""
+        return self.header(request) + f"""    1. Identify the root cause
+    2. Implement a fix that addresses the core issue
+    3. Add tests to verify the solution
+
+    ## Suggested Changes:
+    ```python
+    def fix_bug():
+        # Previous buggy code
+        # return broken_result
+
+        # New fixed code
+        return correct_result
+    ```
+    {relevant}"""
+
+class StubBackend(FixBackend):
+    """
+    Deterministic stand-in for a model, for tests and load benchmarks: waits
+    `delay` seconds and returns content derived only from the issue and its
+    code context. Issues whose title contains "[stub-fail]" fail every attempt.
+    """
+    name = "stub"
+
+    def __init__(self, delay: float = FIX_STUB_DELAY):
+        self.delay = delay
+
+    def header(self, request: FixRequest) -> str:
+        digest = hashlib.sha256(f"{request.repo_full_name}#{request.github_issue_id}:{request.title}".encode()).hexdigest()
+        return f"# Stub fix for {request.repo_full_name}#{request.github_issue_id}\n# {request.title}\n# {digest[:16]}\n"
+
+    async def generate(self, request: FixRequest) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if "[stub-fail]" in request.title:
+            raise RuntimeError(f"Stub backend refused issue {request.issue_id}")
+        return self.header(request) + "".join(f"# context {line}\n" for line in context_summary(request).splitlines())
+
+_backends: Dict[str, Callable[[], FixBackend]] = {
+    TemplateBackend.name: TemplateBackend,
+    StubBackend.name: StubBackend,
+}
+
+def register_fix_backend(name: str, factory: Callable[[], FixBackend]):
+    """Make a backend selectable with FIX_BACKEND=<name>"""
+    _backends[name] = factory
+
+def load_fix_backend(name: str = FIX_BACKEND) -> FixBackend:
+    if name not in _backends:
+        raise ValueError(f"Unknown fix backend {name!r}; choose one of {', '.join(sorted(_backends))}")
+    return _backends[name]()
@@ -0,0 +1,415 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, NamedTuple, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.db import AsyncSessionLocal, dialect_insert
+from models.fix import ACTIVE_FIX_JOB_STATUSES, ACTIVE_FIX_JOB_WHERE, Fix, FixJob
+from models.issue import Issue
+from models.label import IssueLabel
+from models.user import User
+from services.codeContext import code_context
+from services.fixBackends import FixBackend, FixRequest, load_fix_backend
+from services.issueClusters import issue_cluster_id
+
+logger = logging.getLogger(__name__)
+
+# Global cap: fixes generated at once by this process
+FIX_WORKERS = int(os.getenv("FIX_WORKERS", "4"))
+# Per-user cap: running jobs of one user across all processes
+FIX_MAX_PER_USER = int(os.getenv("FIX_MAX_PER_USER", "2"))
+FIX_POLL_INTERVAL = float(os.getenv("FIX_POLL_INTERVAL", "5"))
+FIX_MAX_ATTEMPTS = int(os.getenv("FIX_MAX_ATTEMPTS", "3"))
+# A failed attempt is retried after this many seconds, doubling with each further failure
+FIX_RETRY_BACKOFF = float(os.getenv("FIX_RETRY_BACKOFF", "10"))
+FIX_RETRY_MAX_BACKOFF = float(os.getenv("FIX_RETRY_MAX_BACKOFF", "300"))
+FIX_GENERATION_TIMEOUT = float(os.getenv("FIX_GENERATION_TIMEOUT", "300"))
+# Running jobs not finished within this long are assumed lost with their worker and re-queued
+FIX_JOB_TIMEOUT = timedelta(seconds=int(os.getenv("FIX_JOB_TIMEOUT", "900")))
+# How often long-polls re-read jobs that may be running in another process
+FIX_STATUS_POLL_INTERVAL = float(os.getenv("FIX_STATUS_POLL_INTERVAL", "1"))
+FIX_MAX_WAIT = 60
+# Copy the fix generated for a near-duplicate issue instead of generating another; "0" disables
+FIX_REUSE_CLUSTER_FIXES = os.getenv("FIX_REUSE_CLUSTER_FIXES", "1") != "0"
+
+FINISHED_FIX_JOB_STATUSES = ("succeeded", "failed")
+
+class ClaimedJob(NamedTuple):
+    id: int
+    issue_id: int
+    user_id: int
+    attempts: int
+
+async def enqueue_fix_job(db: AsyncSession, issue_id: int, user_id: int) -> Tuple[FixJob, bool]:
+    """
+    Queue fix generation for an issue. A request for an issue that already
+    has a queued or running job returns that job instead of queueing another.
+    Returns (job, created).
+    """
+    row = (await db.execute(
+        select(Issue.is_ai_fixable).where(Issue.id == issue_id, Issue.user_id == user_id)
+    )).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Issue not found or not owned by user")
+    if not row.is_ai_fixable:
+        raise HTTPException(status_code=400, detail="This issue is not marked as AI-fixable")
+
+    insert = dialect_insert(db)
+    # The active job may finish between a conflicting insert and the lookup; then insert again
+    for _ in range(3):
+        job_id = await db.scalar(
+            insert(FixJob)
+            .values(issue_id=issue_id, user_id=user_id, status="queued", progress="queued", attempts=0)
+            .on_conflict_do_nothing(index_elements=["issue_id"], index_where=text(ACTIVE_FIX_JOB_WHERE))
+            .returning(FixJob.id)
+        )
+        created = job_id is not None
+        if not created:
+            job_id = await db.scalar(
+                select(FixJob.id).where(FixJob.issue_id == issue_id, FixJob.status.in_(ACTIVE_FIX_JOB_STATUSES))
+            )
+        if job_id is not None:
+            await db.commit()
+            return await db.get(FixJob, job_id), created
+    raise HTTPException(status_code=409, detail="Fix generation for this issue is changing state, retry")
+
+class FixWorkerPool:
+    """
+    Workers that claim queued fix jobs and run them on the fix backend.
+
+    At most `workers` jobs run in this process, and a user's jobs are only
+    claimed while fewer than `per_user` of them are running anywhere. Claims
+    are serialized within a process, so both caps are exact here; separate
+    processes may briefly overshoot the per-user cap by one claim each.
+    """
+
+    def __init__(self, workers: int = FIX_WORKERS, per_user: int = FIX_MAX_PER_USER,
+                 backend: Optional[FixBackend] = None, poll_interval: float = FIX_POLL_INTERVAL):
+        self.workers = workers
+        self.per_user = per_user
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.busy = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.reused = 0
+        self._tasks = []
+        self._generations = set()
+        self._stopping = False
+        self._wakeup = None
+        self._claim_lock = None
+        self._updates: Dict[int, asyncio.Event] = {}
+
+    def start(self):
+        if self._tasks:
+            return
+        if self.backend is None:
+            self.backend = load_fix_backend()
+        self._wakeup = asyncio.Event()
+        self._claim_lock = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        Let workers finish their database work and exit. Only backend calls are
+        cancelled; their jobs go back to the queue. Cancelling a worker in the
+        middle of a query can leave its pooled connection stuck.
+        """
+        self._stopping = True
+        self.notify()
+        for generation in self._generations:
+            generation.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._stopping = False
+
+    def notify(self):
+        """Wake idle workers early; queued jobs still get picked up by polling otherwise"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def wait_for_update(self, job_id: int, timeout: float):
+        """Sleep until a worker in this process updates the job, or for at most `timeout` seconds"""
+        event = self._updates.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # Jobs running in other processes never set it, and cancelled polls never come back for it
+            if self._updates.get(job_id) is event:
+                del self._updates[job_id]
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "per_user": self.per_user,
+            "backend": self.backend.name if self.backend else None,
+            "busy": self.busy,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "reused": self.reused,
+        }
+
+    def _updated(self, job_id: int):
+        event = self._updates.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Fix worker failed to claim a job")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                if not self._stopping:
+                    self._wakeup.clear()
+                continue
+            if self._stopping:
+                await self._release(job)
+                break
+            # More jobs may be waiting; let an idle worker look
+            self.notify()
+            try:
+                await self._process(job)
+            except Exception:
+                # The job stays claimed and is picked up again after FIX_JOB_TIMEOUT
+                logger.exception(f"Fix worker failed while recording job {job.id}")
+
+    async def _claim(self) -> Optional[ClaimedJob]:
+        async with self._claim_lock, AsyncSessionLocal() as db:
+            now = datetime.now()
+            stale = now - FIX_JOB_TIMEOUT
+            await db.execute(
+                update(FixJob)
+                .where(FixJob.status == "running", FixJob.claimed_at < stale, FixJob.attempts >= FIX_MAX_ATTEMPTS)
+                .values(status="failed", progress="failed", error="Worker lost", finished_at=now)
+            )
+            running = (FixJob.status == "running") & (FixJob.claimed_at >= stale)
+            saturated_users = (
+                select(FixJob.user_id).where(running)
+                .group_by(FixJob.user_id).having(func.count(FixJob.id) >= self.per_user)
+            )
+            available = FixJob.available_at.is_(None) | (FixJob.available_at <= now)
+            claimable = ((FixJob.status == "queued") & available) | ((FixJob.status == "running") & (FixJob.claimed_at < stale))
+            # SKIP LOCKED lets several processes share the queue without double-claiming
+            row = (await db.execute(
+                select(FixJob.id, FixJob.issue_id, FixJob.user_id, FixJob.attempts)
+                .where(claimable, FixJob.user_id.not_in(saturated_users))
+                .order_by(FixJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )).first()
+            if row is None:
+                await db.commit()
+                return None
+            await db.execute(
+                update(FixJob).where(FixJob.id == row.id).values(
+                    status="running", progress="claimed", claimed_at=now, worker=self.name,
+                    attempts=FixJob.attempts + 1, error=None, available_at=None
+                )
+            )
+            await db.commit()
+        self._updated(row.id)
+        return ClaimedJob(row.id, row.issue_id, row.user_id, row.attempts + 1)
+
+    async def _set(self, db: AsyncSession, job: ClaimedJob, **values) -> bool:
+        """Update the job unless its claim expired and another worker took it over"""
+        result = await db.execute(
+            update(FixJob)
+            .where(FixJob.id == job.id, FixJob.worker == self.name, FixJob.attempts == job.attempts)
+            .values(**values)
+        )
+        return result.rowcount > 0
+
+    async def _progress(self, job: ClaimedJob, progress: str):
+        async with AsyncSessionLocal() as db:
+            await self._set(db, job, progress=progress)
+            await db.commit()
+        self._updated(job.id)
+
+    async def _load(self, job: ClaimedJob) -> Tuple[FixRequest, Optional[str]]:
+        """The backend's view of the issue, and the token to read its repository with"""
+        async with AsyncSessionLocal() as db:
+            issue = (await db.execute(
+                select(Issue.github_issue_id, Issue.repo_full_name, Issue.title, Issue.description,
+                       User.github_access_token)
+                .join(User, User.id == Issue.user_id)
+                .where(Issue.id == job.issue_id, Issue.user_id == job.user_id)
+            )).first()
+            if issue is None:
+                raise LookupError(f"Issue {job.issue_id} no longer exists")
+            labels = (await db.scalars(
+                select(IssueLabel.name).where(IssueLabel.issue_id == job.issue_id).order_by(IssueLabel.name)
+            )).all()
+        request = FixRequest(job.issue_id, issue.github_issue_id, issue.repo_full_name, issue.title,
+                             issue.description, list(labels))
+        return request, issue.github_access_token
+
+    async def _read_code(self, job: ClaimedJob, request: FixRequest, access_token: Optional[str]) -> FixRequest:
+        """Attach the repository code the issue points at; fixes are still generated without it"""
+        await self._progress(job, "reading code")
+        text = f"{request.title}\n{request.description or ''}"
+        try:
+            snippets = await asyncio.to_thread(code_context.context_for, request.repo_full_name, text, access_token)
+        except Exception:
+            logger.exception(f"Could not read code context of {request.repo_full_name} for fix job {job.id}")
+            return request
+        return request._replace(context=tuple(snippets))
+
+    async def _reusable_fix(self, job: ClaimedJob, request: FixRequest) -> Optional[Tuple[int, str]]:
+        """
+        (id, content) of the latest generated fix of a near-duplicate in the
+        same repository, rewritten for this issue by the backend, or None.
+        Other users' fixes only count for their copies of the same GitHub
+        issue. Issues that already have a fix get a fresh one on request.
+        """
+        try:
+            async with AsyncSessionLocal() as db:
+                cluster_id = await issue_cluster_id(db, job.issue_id)
+                if cluster_id is None or await db.scalar(select(Fix.id).where(Fix.issue_id == job.issue_id).limit(1)):
+                    return None
+                # Copies point at the fix that was actually generated
+                source = (await db.execute(
+                    select(func.coalesce(Fix.reused_from_id, Fix.id).label("id"), Fix.content,
+                           Issue.id.label("issue_id"), Issue.github_issue_id, Issue.title, Issue.description)
+                    .join(FixJob, (FixJob.fix_id == Fix.id) & (FixJob.status == "succeeded"))
+                    .join(Issue, Issue.id == Fix.issue_id)
+                    .where(
+                        Issue.cluster_id == cluster_id,
+                        Issue.id != job.issue_id,
+                        Issue.repo_full_name == request.repo_full_name,
+                        or_(Issue.user_id == job.user_id, Issue.github_issue_id == request.github_issue_id)
+                    )
+                    .order_by(Fix.id.desc())
+                    .limit(1)
+                )).first()
+        except Exception:
+            logger.exception(f"Could not look up duplicates of issue {job.issue_id} for fix job {job.id}")
+            return None
+        if source is None:
+            return None
+        # The content names the issue it was generated for
+        source_request = FixRequest(source.issue_id, source.github_issue_id, request.repo_full_name,
+                                    source.title, source.description, [])
+        content = self.backend.reuse(source.content, source_request, request)
+        return None if content is None else (source.id, content)
+
+    async def _process(self, job: ClaimedJob):
+        self.busy += 1
+        try:
+            request, access_token = await self._load(job)
+            reusable = await self._reusable_fix(job, request) if FIX_REUSE_CLUSTER_FIXES else None
+            if reusable is not None:
+                reused_from_id, content = reusable
+                await self._complete(job, content, reused_from_id=reused_from_id)
+                return
+            if code_context.enabled:
+                request = await self._read_code(job, request, access_token)
+            await self._progress(job, "generating")
+            # No DB connection is held while the backend works
+            generation = asyncio.ensure_future(asyncio.wait_for(self.backend.generate(request), FIX_GENERATION_TIMEOUT))
+            self._generations.add(generation)
+            try:
+                content = await generation
+            finally:
+                self._generations.discard(generation)
+            await self._complete(job, content)
+        except asyncio.CancelledError:
+            # stop() cancels generations; the worker still ends as cancelled once the job is back in the queue
+            await self._release(job)
+            raise
+        except Exception as e:
+            await self._fail(job, str(e) or type(e).__name__)
+        finally:
+            self.busy -= 1
+            self._updated(job.id)
+            # A per-user slot opened up
+            self.notify()
+
+    async def _complete(self, job: ClaimedJob, content: str, reused_from_id: Optional[int] = None):
+        async with AsyncSessionLocal() as db:
+            fix = Fix(issue_id=job.issue_id, content=content, status="pending", is_submitted=False,
+                      reused_from_id=reused_from_id)
+            db.add(fix)
+            await db.flush()
+            if not await self._set(db, job, status="succeeded", progress="done", fix_id=fix.id,
+                                   finished_at=datetime.now()):
+                await db.rollback()
+                logger.warning(f"Fix job {job.id} was taken over by another worker, discarding its result")
+                return
+            await db.commit()
+        self.succeeded += 1
+        if reused_from_id is not None:
+            self.reused += 1
+            logger.info(f"Fix job {job.id} reused fix {reused_from_id} of a duplicate as fix {fix.id} for issue {job.issue_id}")
+        else:
+            logger.info(f"Fix job {job.id} generated fix {fix.id} for issue {job.issue_id}")
+
+    async def _fail(self, job: ClaimedJob, error: str):
+        retry = job.attempts < FIX_MAX_ATTEMPTS
+        if retry:
+            backoff = min(FIX_RETRY_BACKOFF * 2 ** (job.attempts - 1), FIX_RETRY_MAX_BACKOFF)
+            values = {"status": "queued", "progress": "queued", "worker": None,
+                      "available_at": datetime.now() + timedelta(seconds=backoff)}
+        else:
+            values = {"status": "failed", "progress": "failed", "finished_at": datetime.now()}
+        async with AsyncSessionLocal() as db:
+            await self._set(db, job, error=error, **values)
+            await db.commit()
+        if retry:
+            self.retried += 1
+        else:
+            self.failed += 1
+        logger.warning(f"Fix job {job.id} attempt {job.attempts} failed: {error}")
+
+    async def _release(self, job: ClaimedJob):
+        """Hand a job interrupted by shutdown back to the queue without spending an attempt"""
+        try:
+            async with AsyncSessionLocal() as db:
+                await self._set(db, job, status="queued", progress="queued", worker=None,
+                                attempts=job.attempts - 1)
+                await db.commit()
+        except Exception:
+            logger.exception(f"Could not release fix job {job.id}; it is re-queued after FIX_JOB_TIMEOUT")
+
+fix_worker_pool = FixWorkerPool()
+
+async def get_fix_job(job_id: int, user_id: int, wait: float = 0) -> FixJob:
+    """
+    The user's job. With `wait`, long-poll: return once the job finishes or
+    its status or progress changes, or after `wait` seconds. Each read uses
+    its own short session so no connection is held while waiting.
+    """
+    async def read() -> FixJob:
+        async with AsyncSessionLocal() as db:
+            job = await db.scalar(select(FixJob).where(FixJob.id == job_id, FixJob.user_id == user_id))
+        if job is None:
+            raise HTTPException(status_code=404, detail="Fix job not found")
+        return job
+
+    job = await read()
+    seen = (job.status, job.progress, job.attempts)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + min(wait, FIX_MAX_WAIT)
+    while job.status not in FINISHED_FIX_JOB_STATUSES and (job.status, job.progress, job.attempts) == seen:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        # Woken directly by workers in this process; jobs running elsewhere are re-read on an interval
+        await fix_worker_pool.wait_for_update(job_id, min(remaining, FIX_STATUS_POLL_INTERVAL))
+        job = await read()
+    return job
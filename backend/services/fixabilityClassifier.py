@@ -0,0 +1,95 @@
+import hashlib
+import json
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+# Labels that mark an issue as fixable on their own
+FIXABLE_LABELS = ("bug", "ai-fixable")
+
+# Description rules. When several match, the one found earliest in the text is reported;
+# list order only decides between rules matching at the same position.
+TEXT_RULES = (
+    ("error", r"error:"),
+    ("exception", r"exception:"),
+    ("traceback", r"traceback"),
+    ("failure", r"fail(?:ed|ure|ing)?"),
+    ("reproduction", r"steps to reproduce"),
+)
+
+# One compiled alternation scans each description once instead of once per rule
+TEXT_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in TEXT_RULES),
+    re.IGNORECASE
+)
+
+# Changes whenever a rule changes, so stored verdicts from older rules get re-checked
+CLASSIFIER_VERSION = hashlib.sha1(repr((FIXABLE_LABELS, TEXT_RULES)).encode()).hexdigest()[:12]
+
+# Process pools only pay off once pickling cost is amortised over big batches
+PROCESS_POOL_MIN_ITEMS = 5000
+
+class Classification(NamedTuple):
+    fixable: bool
+    rule: Optional[str]  # e.g. "label:bug" or "text:traceback"; None when not fixable
+
+def parse_labels(labels: Union[str, Sequence[str], None]) -> List[str]:
+    """Accept a list of label names or a legacy JSON-encoded string"""
+    if not labels:
+        return []
+    if isinstance(labels, str):
+        try:
+            labels = json.loads(labels)
+        except ValueError:
+            return []
+    return [label for label in labels if isinstance(label, str)]
+
+def content_hash(labels: Union[str, Sequence[str], None], description: Optional[str]) -> str:
+    """Fingerprint of everything the classifier looks at"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps(parse_labels(labels)).encode())
+    digest.update(b"\0")
+    digest.update((description or "").encode())
+    return digest.hexdigest()
+
+def classify(labels: Union[str, Sequence[str], None], description: Optional[str]) -> Classification:
+    """
+    Decide whether an issue is fixable by AI based on:
+    1. Has 'bug' or 'ai-fixable' labels
+    2. Contains error messages or stack traces
+    3. Has clear reproduction steps
+    """
+    for label in parse_labels(labels):
+        if label in FIXABLE_LABELS:
+            return Classification(True, f"label:{label}")
+
+    if description:
+        match = TEXT_PATTERN.search(description)
+        if match:
+            return Classification(True, f"text:{match.lastgroup}")
+
+    return Classification(False, None)
+
+def classify_issue(issue) -> Classification:
+    return classify(issue.labels, issue.description)
+
+def _classify_chunk(chunk: List[Tuple]) -> List[Classification]:
+    return [classify(labels, description) for labels, description in chunk]
+
+def classify_many(items: Iterable[Tuple], processes: int = 0, chunksize: int = 1000) -> List[Classification]:
+    """
+    Classify (labels, description) pairs in one call, preserving order.
+
+    With processes > 1 and a large enough batch, chunks are spread over a
+    process pool; this is meant for full re-scans, not request handling.
+    """
+    items = list(items)
+    if processes <= 1 or len(items) < PROCESS_POOL_MIN_ITEMS:
+        return _classify_chunk(items)
+
+    chunks = [items[start:start + chunksize] for start in range(0, len(items), chunksize)]
+    results = []
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for chunk_result in pool.map(_classify_chunk, chunks):
+            results.extend(chunk_result)
+    return results
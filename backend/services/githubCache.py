@@ -0,0 +1,93 @@
+import hashlib
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+import httpx
+from config.githubApp import GITHUB_CACHE_MAX_ENTRIES, GITHUB_CACHE_MAX_ENTRY_BYTES
+
+# The cached body is stored decoded, so transfer framing headers must not be replayed
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: dict
+    content: bytes
+
+class ResponseCache:
+    """
+    LRU cache of GitHub GET responses used for conditional requests.
+
+    Entries are keyed by a hash of the access token plus the full request URL
+    so users never see each other's data. A cached entry is revalidated with
+    `If-None-Match`/`If-Modified-Since`; GitHub answers unchanged resources
+    with a 304, which does not count against the primary rate limit.
+    """
+
+    def __init__(self, max_entries: int = GITHUB_CACHE_MAX_ENTRIES,
+                 max_entry_bytes: int = GITHUB_CACHE_MAX_ENTRY_BYTES):
+        self.max_entries = max_entries
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(access_token: Optional[str], url: str) -> tuple:
+        scope = hashlib.sha256((access_token or "").encode()).hexdigest()[:16]
+        return scope, url
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.revalidations += 1
+        return entry
+
+    def conditional_headers(self, entry: CachedResponse) -> dict:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def store(self, key: tuple, response: httpx.Response):
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+        if len(response.content) > self.max_entry_bytes:
+            self._entries.pop(key, None)
+            return
+
+        headers = {
+            name: value for name, value in response.headers.items()
+            if name.lower() not in DROPPED_HEADERS
+        }
+        self._entries[key] = CachedResponse(etag, last_modified, headers, response.content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def build_response(self, entry: CachedResponse, request: httpx.Request) -> httpx.Response:
+        """Turn a 304 into the cached 200 so callers never see the difference"""
+        self.hits += 1
+        return httpx.Response(200, headers=entry.headers, content=entry.content, request=request)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+        }
+
+    def clear(self):
+        self._entries.clear()
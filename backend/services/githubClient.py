@@ -0,0 +1,220 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+import httpx
+from config.githubApp import (
+    GITHUB_API_URL,
+    GITHUB_GRAPHQL_URL,
+    GITHUB_HTTP_TIMEOUT,
+    GITHUB_HTTP_CONNECT_TIMEOUT,
+    GITHUB_HTTP_MAX_RETRIES,
+    GITHUB_HTTP_MAX_CONNECTIONS,
+    GITHUB_HTTP_MAX_KEEPALIVE,
+    GITHUB_MAX_CONCURRENCY,
+    GITHUB_PER_USER_CONCURRENCY,
+)
+from services.githubCache import ResponseCache
+from services.githubRateLimit import (
+    GitHubRateLimitError,
+    PrioritySemaphore,
+    RateLimitScheduler,
+    request_priority,
+)
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Statuses worth retrying: GitHub's edge returns these for transient failures
+RETRY_STATUS_CODES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRY_BACKOFF_SECONDS = 0.5
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests globally and per access token, by priority"""
+
+    def __init__(self, global_limit: int, per_token_limit: int):
+        self.per_token_limit = per_token_limit
+        self._global = PrioritySemaphore(global_limit)
+        self._per_token = {}
+        self._holders = {}
+
+    @asynccontextmanager
+    async def acquire(self, access_token: Optional[str], priority: int):
+        key = access_token or ""
+        semaphore = self._per_token.get(key)
+        if semaphore is None:
+            semaphore = self._per_token[key] = PrioritySemaphore(self.per_token_limit)
+        self._holders[key] = self._holders.get(key, 0) + 1
+        try:
+            # Always take the token slot first so one user cannot hog global slots while queued
+            await semaphore.acquire(priority)
+            try:
+                await self._global.acquire(priority)
+                try:
+                    yield
+                finally:
+                    self._global.release()
+            finally:
+                semaphore.release()
+        finally:
+            self._holders[key] -= 1
+            if not self._holders[key]:
+                # Forget idle tokens so the map does not grow with every user ever seen
+                del self._holders[key]
+                del self._per_token[key]
+
+class GitHubClient:
+    """
+    Pooled async HTTP client shared by every GitHub call.
+
+    Keeps connections alive between requests, negotiates HTTP/2 when the
+    `h2` package is installed, applies timeouts and retries transient
+    failures with exponential backoff. In-flight requests are capped by a
+    global and a per-token concurrency limit so fan-out sweeps stay polite.
+    GET responses carrying an ETag/Last-Modified are cached and revalidated
+    with conditional requests. Every call is paced by the per-token rate-limit
+    scheduler; interactive calls are queued ahead of bulk sweeps. GraphQL
+    queries are paced on their own scheduler, since GitHub meters them in
+    points against a separate budget.
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None,
+                 max_retries: int = GITHUB_HTTP_MAX_RETRIES,
+                 max_concurrency: int = GITHUB_MAX_CONCURRENCY,
+                 per_user_concurrency: int = GITHUB_PER_USER_CONCURRENCY,
+                 cache: Optional[ResponseCache] = None,
+                 rate_limiter: Optional[RateLimitScheduler] = None,
+                 graphql_rate_limiter: Optional[RateLimitScheduler] = None):
+        self.max_retries = max_retries
+        self.cache = cache if cache is not None else ResponseCache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimitScheduler()
+        self.graphql_rate_limiter = graphql_rate_limiter if graphql_rate_limiter is not None else RateLimitScheduler()
+        self.limiter = ConcurrencyLimiter(max_concurrency, per_user_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            http2=HTTP2_AVAILABLE and transport is None,
+            timeout=httpx.Timeout(GITHUB_HTTP_TIMEOUT, connect=GITHUB_HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=GITHUB_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=GITHUB_HTTP_MAX_KEEPALIVE,
+            ),
+            headers={
+                "Accept": "application/vnd.github+json",
+                "User-Agent": "AutoMerge-AI",
+            },
+            transport=transport,
+        )
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def request(self, method: str, url: str, access_token: Optional[str] = None,
+                      headers: Optional[dict] = None, use_cache: bool = True, **kwargs) -> httpx.Response:
+        method = method.upper()
+        request_headers = dict(headers or {})
+        if access_token:
+            request_headers["Authorization"] = f"Bearer {access_token}"
+
+        request = self._client.build_request(method, url, headers=request_headers, **kwargs)
+        cache_key = cached = None
+        if use_cache and method == "GET":
+            cache_key = self.cache.key(access_token, str(request.url))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                request.headers.update(self.cache.conditional_headers(cached))
+
+        response = await self._send(request, access_token)
+
+        if cache_key is not None:
+            if response.status_code == 304 and cached is not None:
+                return self.cache.build_response(cached, request)
+            self.cache.store(cache_key, response)
+        return response
+
+    async def graphql(self, query: str, variables: dict, access_token: str) -> httpx.Response:
+        """POST a GraphQL query; queries only read, so transient failures are retried like GETs"""
+        request = self._client.build_request(
+            "POST", GITHUB_GRAPHQL_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={"query": query, "variables": variables},
+        )
+        return await self._send(request, access_token, rate_limiter=self.graphql_rate_limiter, idempotent=True)
+
+    async def _send(self, request: httpx.Request, access_token: Optional[str],
+                    rate_limiter: Optional[RateLimitScheduler] = None,
+                    idempotent: Optional[bool] = None) -> httpx.Response:
+        method = request.method
+        rate_limiter = rate_limiter or self.rate_limiter
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        priority = request_priority.get()
+        attempt = 0
+        while True:
+            await rate_limiter.wait_for_budget(access_token, priority)
+            try:
+                async with self.limiter.acquire(access_token, priority):
+                    response = await self._client.send(request)
+            except httpx.TransportError as e:
+                # Only replay non-idempotent requests when they never left the client
+                retryable = idempotent or isinstance(e, httpx.ConnectError)
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                logger.warning(f"GitHub request {method} {request.url} failed ({e!r}), retrying")
+            else:
+                retry_after = rate_limiter.observe(access_token, response)
+                if retry_after is not None:
+                    await response.aclose()
+                    if attempt >= self.max_retries or retry_after > rate_limiter.max_wait:
+                        raise GitHubRateLimitError(retry_after)
+                    # The scheduler now blocks this token until Retry-After has passed
+                    attempt += 1
+                    continue
+                if (response.status_code not in RETRY_STATUS_CODES
+                        or not idempotent
+                        or attempt >= self.max_retries):
+                    return response
+                logger.warning(f"GitHub request {method} {request.url} returned {response.status_code}, retrying")
+                await response.aclose()
+
+            await asyncio.sleep(RETRY_BACKOFF_SECONDS * (2 ** attempt))
+            attempt += 1
+
+    async def get(self, url: str, access_token: Optional[str] = None, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, access_token, **kwargs)
+
+    async def post(self, url: str, access_token: Optional[str] = None, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, access_token, **kwargs)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+_client: Optional[GitHubClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# Outlive individual clients so cached ETags and token budgets survive a client rebuild
+response_cache = ResponseCache()
+rate_limiter = RateLimitScheduler()
+graphql_rate_limiter = RateLimitScheduler()
+
+def get_github_client() -> GitHubClient:
+    """Return the process-wide client, creating it for the running event loop"""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    # The connection pool is bound to the loop it was created on
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = GitHubClient(cache=response_cache, rate_limiter=rate_limiter, graphql_rate_limiter=graphql_rate_limiter)
+        _client_loop = loop
+    return _client
+
+async def close_github_client():
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
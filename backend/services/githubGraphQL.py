@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException
+from config.githubApp import GITHUB_GRAPHQL_ISSUES_PER_PAGE, GITHUB_GRAPHQL_REPOS_PER_QUERY
+from services.githubClient import GitHubClient
+from services.githubRateLimit import GitHubRateLimitError
+
+logger = logging.getLogger(__name__)
+
+LABELS_PER_ISSUE = 20
+
+ISSUE_FIELDS = """pageInfo {{ hasNextPage endCursor }}
+      nodes {{
+        databaseId number title body state url createdAt updatedAt
+        author {{ login avatarUrl url }}
+        labels(first: $labels) {{ nodes {{ name color }} }}
+        comments {{ totalCount }}
+      }}"""
+# Same order as GET /repos/{repo}/issues: newest first
+ISSUES_CONNECTION = """issues(first: $first, after: $c{index}, states: OPEN, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      """ + ISSUE_FIELDS + """
+    }}"""
+# Mirror syncs: issues updated since a mark, oldest update first, like ?since=&sort=updated&direction=asc
+SYNC_ISSUES_CONNECTION = """issues(first: $first, after: $c{index}, filterBy: {{since: $s{index}, states: $st{index}}}, orderBy: {{field: UPDATED_AT, direction: ASC}}) {{
+      """ + ISSUE_FIELDS + """
+    }}"""
+PARENT_FIELD = "parent { name nameWithOwner }"
+
+class IssueSync(NamedTuple):
+    """Which issues a mirror sync of one repository needs: updated since `since` (None: all), in these states"""
+    since: Optional[str]
+    states: Tuple[str, ...]
+
+class RepoQuery(NamedTuple):
+    full_name: str
+    cursor: Optional[str]
+    with_issues: bool
+    with_parent: bool
+    sync: Optional[IssueSync] = None
+
+class GraphQLCostTracker:
+    """Point costs GitHub reports in the rateLimit field of every batch query"""
+
+    def __init__(self):
+        self.queries = 0
+        self.cost = 0
+        self.max_cost = 0
+        self.remaining = None
+        self.reset_at = None
+
+    def record(self, rate_limit: Optional[dict]):
+        self.queries += 1
+        if not rate_limit:
+            return
+        cost = rate_limit.get("cost") or 0
+        self.cost += cost
+        self.max_cost = max(self.max_cost, cost)
+        self.remaining = rate_limit.get("remaining", self.remaining)
+        self.reset_at = rate_limit.get("resetAt", self.reset_at)
+
+    def stats(self) -> dict:
+        return {
+            "queries": self.queries,
+            "cost": self.cost,
+            "max_cost": self.max_cost,
+            "avg_cost": round(self.cost / self.queries, 2) if self.queries else 0,
+            "remaining": self.remaining,
+            "reset_at": self.reset_at,
+        }
+
+graphql_costs = GraphQLCostTracker()
+
+def build_query(repos: List[RepoQuery]) -> Tuple[str, dict]:
+    """One aliased query (r0, r1, ...) covering every repository; all inputs are passed as variables"""
+    declarations = []
+    variables = {}
+    fields = []
+    for index, repo in enumerate(repos):
+        owner, name = repo.full_name.split("/", 1)
+        declarations += [f"$o{index}: String!", f"$n{index}: String!"]
+        variables.update({f"o{index}": owner, f"n{index}": name})
+        selections = []
+        if repo.with_parent:
+            selections.append(PARENT_FIELD)
+        if repo.with_issues:
+            declarations.append(f"$c{index}: String")
+            variables[f"c{index}"] = repo.cursor
+            if repo.sync:
+                declarations += [f"$s{index}: DateTime", f"$st{index}: [IssueState!]"]
+                variables.update({f"s{index}": repo.sync.since, f"st{index}": list(repo.sync.states)})
+                selections.append(SYNC_ISSUES_CONNECTION.format(index=index))
+            else:
+                selections.append(ISSUES_CONNECTION.format(index=index))
+        body = "\n    ".join(selections or ["id"])
+        fields.append(f"r{index}: repository(owner: $o{index}, name: $n{index}) {{\n    {body}\n  }}")
+    if any(repo.with_issues for repo in repos):
+        declarations = ["$first: Int!", "$labels: Int!"] + declarations
+        variables.update({"first": GITHUB_GRAPHQL_ISSUES_PER_PAGE, "labels": LABELS_PER_ISSUE})
+    query = f"query({', '.join(declarations)}) {{\n  rateLimit {{ cost remaining resetAt }}\n  " + "\n  ".join(fields) + "\n}"
+    return query, variables
+
+def rest_issue(node: dict) -> dict:
+    """A GraphQL issue node in the shape GET /repos/{repo}/issues returns"""
+    author = node.get("author")
+    return {
+        "id": node["databaseId"],
+        "number": node["number"],
+        "title": node["title"],
+        "body": node.get("body"),
+        "state": node["state"].lower(),
+        "html_url": node["url"],
+        "created_at": node["createdAt"],
+        "updated_at": node["updatedAt"],
+        "user": {"login": author["login"], "avatar_url": author["avatarUrl"], "html_url": author["url"]} if author else None,
+        "labels": [{"name": label["name"], "color": label["color"]} for label in node["labels"]["nodes"]],
+        "comments": node["comments"]["totalCount"],
+    }
+
+def _retry_after(reset_at: Optional[str]) -> float:
+    if not reset_at:
+        return 60
+    reset = datetime.fromisoformat(reset_at.replace("Z", "+00:00")).timestamp()
+    return max(1, reset - time.time())
+
+async def run_batch(client: GitHubClient, access_token: str, repos: List[RepoQuery]) -> List[Optional[dict]]:
+    """Run one aliased query; returns each repository's data in input order, None where it could not be read"""
+    query, variables = build_query(repos)
+    response = await client.graphql(query, variables, access_token)
+    if response.status_code != 200:
+        error_message = f"GitHub GraphQL query failed: {response.text}"
+        logger.info(error_message)
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+    body = response.json()
+    data = body.get("data") or {}
+    graphql_costs.record(data.get("rateLimit"))
+    for error in body.get("errors") or []:
+        if error.get("type") == "RATE_LIMITED":
+            raise GitHubRateLimitError(_retry_after((data.get("rateLimit") or {}).get("resetAt")))
+        # Missing or inaccessible repositories fail only their own alias
+        logger.warning(f"GitHub GraphQL error at {error.get('path')}: {error.get('message')}")
+    if not data:
+        raise HTTPException(status_code=502, detail="GitHub GraphQL query returned no data")
+    return [data.get(f"r{index}") for index in range(len(repos))]
+
+def _parent(repository: dict) -> Optional[dict]:
+    parent = repository.get("parent")
+    return {"name": parent["name"], "full_name": parent["nameWithOwner"]} if parent else None
+
+async def fetch_repositories(client: GitHubClient, access_token: str, repo_full_names: Iterable[str],
+                             with_issues: bool = True, parents_for: Iterable[str] = ()) -> Dict[str, dict]:
+    """
+    Open issues (and optionally fork parents) of many repositories in a few
+    aliased GraphQL queries of GITHUB_GRAPHQL_REPOS_PER_QUERY repositories
+    each, run concurrently. Repositories with more issues are followed by
+    cursor in further rounds that batch only the unfinished connections.
+
+    Returns {full_name: {"issues": [...], "parent": {...} or None, "found": bool}}
+    with issues in the REST shape; found is False when the repository could
+    not be read. GraphQL issue connections never include pull
+    requests, unlike the REST issues endpoint.
+    """
+    names = list(dict.fromkeys(repo_full_names))
+    parents_for = set(parents_for)
+    results = {name: {"issues": [], "parent": None, "found": False} for name in names}
+    pending = [RepoQuery(name, None, with_issues, name in parents_for) for name in names]
+
+    while pending:
+        batches = [pending[start:start + GITHUB_GRAPHQL_REPOS_PER_QUERY]
+                   for start in range(0, len(pending), GITHUB_GRAPHQL_REPOS_PER_QUERY)]
+        pages = await asyncio.gather(*(run_batch(client, access_token, batch) for batch in batches))
+
+        pending = []
+        for batch, page in zip(batches, pages):
+            for repo, repository in zip(batch, page):
+                if repository is None:
+                    continue
+                results[repo.full_name]["found"] = True
+                if repo.with_parent:
+                    results[repo.full_name]["parent"] = _parent(repository)
+                if not repo.with_issues:
+                    continue
+                issues = repository["issues"]
+                results[repo.full_name]["issues"].extend(rest_issue(node) for node in issues["nodes"])
+                if issues["pageInfo"]["hasNextPage"]:
+                    pending.append(RepoQuery(repo.full_name, issues["pageInfo"]["endCursor"], True, False))
+    return results
+
+async def iter_issue_syncs(client: GitHubClient, access_token: str,
+                           syncs: Dict[str, IssueSync]) -> AsyncIterator[Tuple[str, Optional[list], bool]]:
+    """
+    Issues of many repositories for mirror syncs, in rounds of aliased
+    queries like fetch_repositories. Yields (full_name, issues, last) for each
+    repository's page in every round, oldest update first; issues is None
+    when the repository could not be read, and last marks its final page.
+    """
+    pending = [RepoQuery(name, None, True, False, sync) for name, sync in syncs.items()]
+    while pending:
+        batches = [pending[start:start + GITHUB_GRAPHQL_REPOS_PER_QUERY]
+                   for start in range(0, len(pending), GITHUB_GRAPHQL_REPOS_PER_QUERY)]
+        pages = await asyncio.gather(*(run_batch(client, access_token, batch) for batch in batches))
+
+        pending = []
+        for batch, page in zip(batches, pages):
+            for repo, repository in zip(batch, page):
+                if repository is None:
+                    yield repo.full_name, None, True
+                    continue
+                issues = repository["issues"]
+                more = issues["pageInfo"]["hasNextPage"]
+                yield repo.full_name, [rest_issue(node) for node in issues["nodes"]], not more
+                if more:
+                    pending.append(repo._replace(cursor=issues["pageInfo"]["endCursor"]))
@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import httpx
+from fastapi import HTTPException
+from config.githubApp import (
+    GITHUB_RATE_LIMIT_BULK_RESERVE,
+    GITHUB_RATE_LIMIT_PACE_BELOW,
+    GITHUB_RATE_LIMIT_MAX_WAIT,
+    GITHUB_SECONDARY_BACKOFF,
+)
+
+logger = logging.getLogger(__name__)
+
+# Lower value wins: interactive page loads jump ahead of bulk sweeps
+INTERACTIVE = 0
+BULK = 1
+
+request_priority: ContextVar[int] = ContextVar("github_request_priority", default=INTERACTIVE)
+
+@contextmanager
+def bulk_priority():
+    """Mark every GitHub call made inside the block (and tasks it spawns) as bulk work"""
+    token = request_priority.set(BULK)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+class GitHubRateLimitError(HTTPException):
+    def __init__(self, retry_after: float, detail: str = "GitHub rate limit exceeded"):
+        retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(
+            status_code=429,
+            detail=f"{detail}, retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.retry_after = retry_after
+
+class PrioritySemaphore:
+    """Semaphore that hands freed slots to the highest-priority waiter first"""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters = []
+        self._counter = itertools.count()
+
+    async def acquire(self, priority: int = INTERACTIVE):
+        if self._value > 0 and not self._waiters:
+            self._value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Granted right before cancellation: pass the slot on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+class TokenBudget:
+    __slots__ = ("limit", "remaining", "reset_at", "blocked_until", "next_bulk_at", "secondary_strikes")
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset_at = 0.0
+        self.blocked_until = 0.0
+        self.next_bulk_at = 0.0
+        self.secondary_strikes = 0
+
+class RateLimitScheduler:
+    """
+    Tracks each token's GitHub budget from response headers and paces calls.
+
+    Bulk calls are spread evenly over the time left in the window once the
+    budget drops below a threshold, and stop entirely at the reserve so
+    interactive requests always have headroom. Secondary-limit responses
+    block the token until `Retry-After` (or an exponential backoff).
+    """
+
+    MAX_TRACKED_TOKENS = 10000
+
+    def __init__(self, bulk_reserve: int = GITHUB_RATE_LIMIT_BULK_RESERVE,
+                 pace_below: float = GITHUB_RATE_LIMIT_PACE_BELOW,
+                 max_wait: float = GITHUB_RATE_LIMIT_MAX_WAIT,
+                 secondary_backoff: float = GITHUB_SECONDARY_BACKOFF):
+        self.bulk_reserve = bulk_reserve
+        self.pace_below = pace_below
+        self.max_wait = max_wait
+        self.secondary_backoff = secondary_backoff
+        self._budgets = {}
+        self.paced_waits = 0
+        self.secondary_limits = 0
+        self.rejections = 0
+
+    def _budget(self, access_token: Optional[str]) -> TokenBudget:
+        key = access_token or ""
+        budget = self._budgets.get(key)
+        if budget is None:
+            if len(self._budgets) >= self.MAX_TRACKED_TOKENS:
+                self._prune()
+            budget = self._budgets[key] = TokenBudget()
+        return budget
+
+    def _prune(self):
+        now = time.time()
+        for key, budget in list(self._budgets.items()):
+            if budget.reset_at < now and budget.blocked_until < now:
+                del self._budgets[key]
+
+    def _delay(self, budget: TokenBudget, priority: int, now: float) -> float:
+        delay = max(0.0, budget.blocked_until - now)
+        if budget.remaining is None or budget.reset_at <= now:
+            return delay
+
+        window = budget.reset_at - now
+        if budget.remaining <= 0:
+            return max(delay, window)
+        if priority != BULK:
+            return delay
+
+        spendable = budget.remaining - self.bulk_reserve
+        if spendable <= 0:
+            return max(delay, window)
+        if budget.limit and budget.remaining < budget.limit * self.pace_below:
+            slot = max(now, budget.next_bulk_at)
+            budget.next_bulk_at = slot + window / spendable
+            delay = max(delay, slot - now)
+        return delay
+
+    async def wait_for_budget(self, access_token: Optional[str], priority: int):
+        budget = self._budget(access_token)
+        delay = self._delay(budget, priority, time.time())
+        if delay > self.max_wait:
+            self.rejections += 1
+            raise GitHubRateLimitError(delay)
+        if delay > 0:
+            self.paced_waits += 1
+            await asyncio.sleep(delay)
+        if budget.remaining is not None:
+            # Spend optimistically so concurrent callers see the reduced budget
+            budget.remaining -= 1
+
+    def observe(self, access_token: Optional[str], response: httpx.Response) -> Optional[float]:
+        """Record budget headers; return a retry delay if the response was rate limited"""
+        budget = self._budget(access_token)
+        headers = response.headers
+        try:
+            if "X-RateLimit-Remaining" in headers:
+                budget.remaining = int(headers["X-RateLimit-Remaining"])
+            if "X-RateLimit-Limit" in headers:
+                budget.limit = int(headers["X-RateLimit-Limit"])
+            if "X-RateLimit-Reset" in headers:
+                budget.reset_at = float(headers["X-RateLimit-Reset"])
+        except ValueError:
+            pass
+
+        if response.status_code not in (403, 429):
+            budget.secondary_strikes = 0
+            return None
+
+        now = time.time()
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = self.secondary_backoff
+        elif budget.remaining == 0 and budget.reset_at > now:
+            delay = budget.reset_at - now
+        elif response.status_code == 429 or "rate limit" in response.text.lower():
+            delay = self.secondary_backoff * (2 ** budget.secondary_strikes)
+        else:
+            # A plain permission error, not a rate limit
+            return None
+
+        budget.secondary_strikes += 1
+        budget.blocked_until = max(budget.blocked_until, now + delay)
+        self.secondary_limits += 1
+        logger.warning(f"GitHub rate limit hit, backing off for {delay:.0f}s")
+        return delay
+
+    def snapshot(self, access_token: Optional[str]) -> dict:
+        budget = self._budget(access_token)
+        return {
+            "limit": budget.limit,
+            "remaining": budget.remaining,
+            "reset_at": budget.reset_at or None,
+            "blocked_until": budget.blocked_until if budget.blocked_until > time.time() else None,
+        }
+
+    def stats(self) -> dict:
+        return {
+            "tracked_tokens": len(self._budgets),
+            "paced_waits": self.paced_waits,
+            "secondary_limits": self.secondary_limits,
+            "rejections": self.rejections,
+        }
@@ -1,14 +1,83 @@
-import requests
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timedelta
+from config.db import AsyncSessionLocal, dialect_insert
 from models.user import User
+from models.repository import ForkParent, TrackedRepository
+from config.githubApp import GITHUB_FETCH_MODE
+from services.githubClient import get_github_client
+from services.githubGraphQL import IssueSync, fetch_repositories, iter_issue_syncs
+from services.githubRateLimit import GitHubRateLimitError, bulk_priority
+from services.repoListCache import repo_list_cache
+from services.userCache import user_cache
+import asyncio
+import httpx
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# GitHub's maximum page size; used whenever every page is requested
+MAX_PER_PAGE = 100
+FETCH_MODES = ("rest", "graphql")
+# A fork's parent practically never changes; webhooks invalidate it when it does
+FORK_PARENT_TTL = int(os.getenv("FORK_PARENT_TTL", str(30 * 24 * 3600)))
+
+def _last_page(response: httpx.Response, current_page: int) -> int:
+    """Read the last page number from a GitHub `Link` header"""
+    last = response.links.get("last")
+    if not last or "url" not in last:
+        return current_page
+    try:
+        return int(httpx.URL(last["url"]).params.get("page", current_page))
+    except ValueError:
+        return current_page
+
+async def iter_pages(access_token: str, url: str, params: Optional[dict] = None,
+                     per_page: int = MAX_PER_PAGE) -> AsyncIterator[list]:
+    """
+    Yield every page of a paginated GitHub list endpoint, in page order.
+
+    The first response tells us the last page; all remaining pages are then
+    requested concurrently so callers can consume page 2 while later pages
+    are still in flight.
+    """
+    client = get_github_client()
+    params = dict(params or {})
+
+    async def fetch_page(page):
+        response = await client.get(url, access_token, params={**params, "page": page, "per_page": per_page})
+        if response.status_code != 200:
+            error_message = f"Failed to fetch {url} (page {page}): {response.text}"
+            logger.info(error_message)
+            raise HTTPException(status_code=response.status_code, detail=error_message)
+        return response
+
+    first = await fetch_page(1)
+    yield first.json()
+
+    pending = [asyncio.ensure_future(fetch_page(page)) for page in range(2, _last_page(first, 1) + 1)]
+    try:
+        for task in pending:
+            response = await task
+            yield response.json()
+    finally:
+        # Stop prefetching if the consumer bails out early or a page failed
+        for task in pending:
+            task.cancel()
+        # Wait for the cancellations to land so no request outlives the generator or goes unretrieved
+        await asyncio.gather(*pending, return_exceptions=True)
+
+async def iter_items(access_token: str, url: str, params: Optional[dict] = None) -> AsyncIterator[dict]:
+    async for page in iter_pages(access_token, url, params):
+        for item in page:
+            yield item
+
 async def exchange_code_for_token(code: str) -> str:
     from config.githubApp import GITHUB_CLIENT_ID, GITHUB_CLIENT_SECRET, GITHUB_REDIRECT_URI
-    response = requests.post(
+    response = await get_github_client().post(
         "https://github.com/login/oauth/access_token",
         data={
             "client_id": GITHUB_CLIENT_ID,
@@ -21,57 +90,358 @@ async def exchange_code_for_token(code: str) -> str:
     data = response.json()
     return data.get("access_token")
 
-async def store_access_token(db: Session, access_token: str) -> User:
-    user_response = requests.get(
-        "https://api.github.com/user",
-        headers={"Authorization": f"Bearer {access_token}"}
-    )
+async def store_access_token(db: AsyncSession, access_token: str) -> User:
+    user_response = await get_github_client().get("/user", access_token)
     user_data = user_response.json()
-    user = db.query(User).filter(User.id == user_data["id"]).first()
+    user = await db.get(User, user_data["id"])
     if not user:
         user = User(id=user_data["id"], github_access_token=access_token)
         db.add(user)
     else:
         user.github_access_token = access_token
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    # The token may have rotated; drop any cached copy of the old one
+    user_cache.invalidate(user.id)
     logger.info(f"Saved user: {user.id}")
     return user
 
-async def get_user_repos(access_token: str) -> dict:
-    # Get user info for username
-    user_response = requests.get(
-        "https://api.github.com/user",
-        headers={"Authorization": f"Bearer {access_token}"}
-    )
+async def track_repositories(db: AsyncSession, user_id: int, repo_full_names: Iterable[str], prune: bool = False):
+    """
+    Record which repositories a user can see so webhook events only fan out to them.
+    With prune=True the given names are treated as the complete list.
+    """
+    names = sorted(set(repo_full_names))
+    if names:
+        insert = dialect_insert(db)
+        now = datetime.now()
+        stmt = insert(TrackedRepository).values(
+            [{"user_id": user_id, "repo_full_name": name, "created_at": now} for name in names]
+        ).on_conflict_do_nothing(index_elements=["user_id", "repo_full_name"])
+        await db.execute(stmt)
+    if prune:
+        await db.execute(
+            delete(TrackedRepository).where(
+                TrackedRepository.user_id == user_id,
+                TrackedRepository.repo_full_name.not_in(names)
+            )
+        )
+    await db.commit()
+
+async def get_user_repos(access_token: str, all_pages: bool = False) -> dict:
+    client = get_github_client()
+
+    async def fetch_repos():
+        if all_pages:
+            return [repo async for repo in iter_items(access_token, "/user/repos")]
+        repo_response = await client.get("/user/repos", access_token)
+        return repo_response.json()
+
+    # The username and the repo list are independent, so fetch them together
+    user_response, repos = await asyncio.gather(client.get("/user", access_token), fetch_repos())
     user_data = user_response.json()
     username = user_data["login"]  # Your actual GitHub username (e.g., "shreshthkapai")
+    return {"username": username, "repos": repos}
 
-    # Get repos
-    repo_response = requests.get(
-        "https://api.github.com/user/repos",
-        headers={"Authorization": f"Bearer {access_token}"}
+async def get_cached_user_repos(access_token: str, user_id: int) -> dict:
+    """
+    Username and full repo list through repo_list_cache. The tracked
+    repositories are re-synced whenever the list is actually fetched, which
+    may happen in a background refresh after the request has finished.
+    """
+    async def fetch():
+        data = await get_user_repos(access_token, all_pages=True)
+        async with AsyncSessionLocal() as db:
+            await track_repositories(db, user_id, [repo["full_name"] for repo in data["repos"]], prune=True)
+        return data
+
+    return await repo_list_cache.get(access_token, fetch)
+
+async def get_user_repositories(access_token: str, repo_type: str = "all", sort: str = "updated",
+                                all_pages: bool = False) -> list:
+    if all_pages:
+        params = {"type": repo_type, "sort": sort}
+        return [repo async for repo in iter_items(access_token, "/user/repos", params)]
+
+    response = await get_github_client().get(
+        "/user/repos",
+        access_token,
+        params={"type": repo_type, "sort": sort}
     )
-    repos = repo_response.json()
-    return {"username": username, "repos": repos}
+    return response.json()
+
+async def get_repository(access_token: str, repo_full_name: str) -> dict:
+    response = await get_github_client().get(f"/repos/{repo_full_name}", access_token)
+    return response.json()
+
+async def get_repo_issues(access_token: str, repo_full_name: str, page: int = 1, per_page: int = 30,
+                          all_pages: bool = False) -> list:
+    url = f"/repos/{repo_full_name}/issues"
+    if all_pages:
+        issues = [issue async for issue in iter_repo_issues(access_token, repo_full_name)]
+        logger.info(f"Found {len(issues)} issues across all pages of {repo_full_name}")
+        return issues
+
+    logger.info(f"Requesting issues from: {url}?page={page}&per_page={per_page}")
 
-async def get_repo_issues(access_token: str, repo_full_name: str, page: int = 1, per_page: int = 30) -> list:
-    url = f"https://api.github.com/repos/{repo_full_name}/issues?page={page}&per_page={per_page}"
-    logger.info(f"Requesting issues from: {url}")
-    
-    response = requests.get(
+    response = await get_github_client().get(
         url,
-        headers={"Authorization": f"Bearer {access_token}"}
+        access_token,
+        params={"page": page, "per_page": per_page}
     )
-    
+
     logger.info(f"Response status: {response.status_code}")
-    
+
     if response.status_code != 200:
         error_message = f"Failed to fetch issues: {response.text}"
         logger.info(error_message)
         raise HTTPException(status_code=response.status_code, detail=error_message)
-    
+
     issues = response.json()
     logger.info(f"Found {len(issues)} issues")
-    
-    return issues
\ No newline at end of file
+
+    return issues
+
+def iter_repo_issues(access_token: str, repo_full_name: str) -> AsyncIterator[dict]:
+    """Stream every issue of a repository, prefetching later pages concurrently"""
+    return iter_items(access_token, f"/repos/{repo_full_name}/issues")
+
+def iter_issue_updates(access_token: str, syncs: Dict[str, IssueSync]) -> AsyncIterator[Tuple[str, Optional[list], bool]]:
+    """Mirror sync pages of many repositories, fetched in batched GraphQL queries"""
+    return iter_issue_syncs(get_github_client(), access_token, syncs)
+
+async def get_issue(access_token: str, repo_full_name: str, issue_number: int) -> dict:
+    response = await get_github_client().get(
+        f"/repos/{repo_full_name}/issues/{issue_number}",
+        access_token
+    )
+
+    if response.status_code != 200:
+        error_message = f"Failed to fetch issue: {response.text}"
+        raise HTTPException(status_code=response.status_code, detail=error_message)
+
+    return response.json()
+
+async def get_all_user_issues(access_token: str, include_forked_sources: bool = True,
+                              mode: Optional[str] = None) -> list:
+    """
+    Collect open issues across every repository the user can see.
+
+    In "rest" mode per-repo issue fetches and fork lookups run
+    concurrently (bounded by the client's concurrency limits); parents
+    of forks are fetched in a second concurrent wave as soon as every
+    fork has been resolved. In "graphql" mode the same data comes from a
+    few batched GraphQL queries, without pull requests. Output order and
+    the processed_repos dedup rules match a serial walk of the
+    repository list. All calls run at bulk priority so interactive
+    requests for the same token are served first.
+    """
+    mode = mode or GITHUB_FETCH_MODE
+    if mode not in FETCH_MODES:
+        raise ValueError(f"Unknown GitHub fetch mode {mode}")
+    with bulk_priority():
+        if mode == "graphql":
+            return await _collect_all_user_issues_graphql(access_token, include_forked_sources)
+        return await _collect_all_user_issues(access_token, include_forked_sources)
+
+async def _fetch_fork_parent(access_token: str, repo_full_name: str) -> Tuple[bool, Optional[dict]]:
+    """(resolved, parent); resolved is False when the lookup failed and must not be cached"""
+    try:
+        fork_detail = await get_repository(access_token, repo_full_name)
+    except GitHubRateLimitError:
+        raise
+    except Exception as e:
+        logger.warning(f"Error fetching fork details for {repo_full_name}: {str(e)}")
+        return False, None
+    parent = fork_detail.get("parent") or {}
+    return True, ({"name": parent["name"], "full_name": parent["full_name"]} if "full_name" in parent else None)
+
+async def load_fork_parents(repo_full_names: Iterable[str]) -> Dict[str, Optional[dict]]:
+    """Parents cached in fork_parents within FORK_PARENT_TTL, keyed by the names as given"""
+    keys = {name.lower(): name for name in repo_full_names}
+    if not keys:
+        return {}
+    cutoff = datetime.now() - timedelta(seconds=FORK_PARENT_TTL)
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(ForkParent.fork_full_name, ForkParent.parent_full_name, ForkParent.parent_name)
+            .where(ForkParent.fork_full_name.in_(list(keys)), ForkParent.resolved_at >= cutoff)
+        )).all()
+    return {
+        keys[row.fork_full_name]: {"name": row.parent_name, "full_name": row.parent_full_name} if row.parent_full_name else None
+        for row in rows
+    }
+
+async def store_fork_parents(parents: Dict[str, Optional[dict]]):
+    """Upsert resolved fork parents (None for repositories without one) in one statement"""
+    rows = {
+        name.lower(): {
+            "fork_full_name": name.lower(),
+            "parent_full_name": parent["full_name"] if parent else None,
+            "parent_name": parent["name"] if parent else None,
+            "resolved_at": datetime.now(),
+        }
+        for name, parent in parents.items()
+    }
+    if not rows:
+        return
+    async with AsyncSessionLocal() as db:
+        insert = dialect_insert(db)
+        stmt = insert(ForkParent).values(list(rows.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["fork_full_name"],
+            set_={
+                "parent_full_name": stmt.excluded.parent_full_name,
+                "parent_name": stmt.excluded.parent_name,
+                "resolved_at": stmt.excluded.resolved_at,
+            }
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+async def resolve_fork_parents(access_token: str, fork_names: List[str], mode: Optional[str] = None) -> Dict[str, Optional[dict]]:
+    """
+    Parents of the given forks. Cached parents come from fork_parents; the
+    rest are looked up together (one REST call each, or batched GraphQL
+    queries) and stored. Failed lookups map to None and are not cached.
+    """
+    parents = await load_fork_parents(fork_names)
+    missing = [name for name in dict.fromkeys(fork_names) if name not in parents]
+    resolved = {}
+    if missing and (mode or GITHUB_FETCH_MODE) == "graphql":
+        fetched = await fetch_repositories(
+            get_github_client(), access_token, missing, with_issues=False, parents_for=missing
+        )
+        resolved = {name: fetched[name]["parent"] for name in missing if fetched[name]["found"]}
+    elif missing:
+        lookups = await asyncio.gather(*(_fetch_fork_parent(access_token, name) for name in missing))
+        resolved = {name: parent for name, (found, parent) in zip(missing, lookups) if found}
+    await store_fork_parents(resolved)
+    parents.update(resolved)
+    return {name: parents.get(name) for name in fork_names}
+
+def _parents_to_fetch(repos: list, parent_by_index: dict) -> dict:
+    """
+    Replay the serial dedup walk: a parent is only fetched if neither it nor an
+    earlier repository/parent with the same name has been processed
+    """
+    processed_repos = set()
+    parents_to_fetch = {}
+    for index, repo in enumerate(repos):
+        processed_repos.add(repo["full_name"].lower())
+        parent = parent_by_index.get(index)
+        if parent and parent["full_name"].lower() not in processed_repos:
+            processed_repos.add(parent["full_name"].lower())
+            parents_to_fetch[index] = parent
+    return parents_to_fetch
+
+def _repository_field(repo: dict, is_parent_of_fork: bool = False) -> dict:
+    """The `repository` object attached to every issue in the all-issues list"""
+    if is_parent_of_fork:
+        return {"name": repo["name"], "full_name": repo["full_name"], "is_fork": False, "is_parent_of_fork": True}
+    return {"name": repo["name"], "full_name": repo["full_name"], "is_fork": repo.get("fork", False)}
+
+async def get_issue_sources(access_token: str, repos: list, include_forked_sources: bool = True,
+                            mode: Optional[str] = None) -> list:
+    """
+    The repositories behind the all-issues list, in output order, as the
+    `repository` objects get_all_user_issues attaches to their issues.
+    Fork parents come from the fork_parents cache where possible.
+    """
+    repos = [repo for repo in repos if isinstance(repo, dict) and "full_name" in repo]
+    fork_indexes = [
+        index for index, repo in enumerate(repos)
+        if include_forked_sources and repo.get("fork", False)
+    ]
+    fork_names = [repos[index]["full_name"] for index in fork_indexes]
+    parents = await resolve_fork_parents(access_token, fork_names, mode)
+    parents_to_fetch = _parents_to_fetch(repos, {index: parents[repos[index]["full_name"]] for index in fork_indexes})
+
+    sources = []
+    for index, repo in enumerate(repos):
+        sources.append(_repository_field(repo))
+        if index in parents_to_fetch:
+            sources.append(_repository_field(parents_to_fetch[index], is_parent_of_fork=True))
+    return sources
+
+async def _collect_all_user_issues(access_token: str, include_forked_sources: bool) -> list:
+    repos = await get_user_repositories(access_token, repo_type="all", sort="updated", all_pages=True)
+    repos = [repo for repo in repos if isinstance(repo, dict) and "full_name" in repo]
+
+    async def fetch_issues(repo_full_name):
+        try:
+            return await get_repo_issues(access_token, repo_full_name, all_pages=True)
+        except GitHubRateLimitError:
+            raise
+        except Exception as e:
+            logger.warning(f"Error fetching issues for {repo_full_name}: {str(e)}")
+            return []
+
+    fork_indexes = [
+        index for index, repo in enumerate(repos)
+        if include_forked_sources and repo.get("fork", False)
+    ]
+    # Own-repo issues keep streaming in while fork parents are resolved and fetched
+    repo_issues_future = asyncio.gather(*(fetch_issues(repo["full_name"]) for repo in repos))
+    try:
+        parents = await resolve_fork_parents(access_token, [repos[index]["full_name"] for index in fork_indexes], mode="rest")
+        parents_to_fetch = _parents_to_fetch(repos, {index: parents[repos[index]["full_name"]] for index in fork_indexes})
+
+        parent_issues = await asyncio.gather(
+            *(fetch_issues(parent["full_name"]) for parent in parents_to_fetch.values())
+        )
+        parent_issues_by_index = dict(zip(parents_to_fetch.keys(), parent_issues))
+        repo_issues = await repo_issues_future
+    finally:
+        # When the parent lookups fail, stop the own-repo fetches and collect their outcome,
+        # so no requests keep running and no exception goes unretrieved
+        repo_issues_future.cancel()
+        await asyncio.gather(repo_issues_future, return_exceptions=True)
+
+    return _assemble_all_issues(repos, repo_issues, parents_to_fetch, parent_issues_by_index)
+
+async def _collect_all_user_issues_graphql(access_token: str, include_forked_sources: bool) -> list:
+    repos = await get_user_repositories(access_token, repo_type="all", sort="updated", all_pages=True)
+    repos = [repo for repo in repos if isinstance(repo, dict) and "full_name" in repo]
+    client = get_github_client()
+
+    # Forks missing from the fork_parents cache resolve their parents in the same queries that fetch their issues
+    forks = [repo["full_name"] for repo in repos if include_forked_sources and repo.get("fork", False)]
+    parents = await load_fork_parents(forks)
+    uncached = [name for name in forks if name not in parents]
+    fetched = await fetch_repositories(client, access_token, [repo["full_name"] for repo in repos], parents_for=uncached)
+    resolved = {name: fetched[name]["parent"] for name in uncached if fetched[name]["found"]}
+    await store_fork_parents(resolved)
+    parents.update(resolved)
+    parent_by_index = {
+        index: parents.get(repo["full_name"])
+        for index, repo in enumerate(repos)
+        if repo["full_name"] in forks
+    }
+    parents_to_fetch = _parents_to_fetch(repos, parent_by_index)
+    fetched_parents = await fetch_repositories(
+        client, access_token, [parent["full_name"] for parent in parents_to_fetch.values()]
+    )
+
+    return _assemble_all_issues(
+        repos,
+        [fetched[repo["full_name"]]["issues"] for repo in repos],
+        parents_to_fetch,
+        {index: fetched_parents[parent["full_name"]]["issues"] for index, parent in parents_to_fetch.items()},
+    )
+
+def _assemble_all_issues(repos: list, repo_issues: list, parents_to_fetch: dict, parent_issues_by_index: dict) -> list:
+    all_issues = []
+    for index, repo in enumerate(repos):
+        issues = repo_issues[index]
+        for issue in issues:
+            issue["repository"] = _repository_field(repo)
+        all_issues.extend(issues)
+
+        if index in parents_to_fetch:
+            issues = parent_issues_by_index[index]
+            for issue in issues:
+                issue["repository"] = _repository_field(parents_to_fetch[index], is_parent_of_fork=True)
+            all_issues.extend(issues)
+
+    return all_issues
@@ -0,0 +1,123 @@
+import os
+from collections import Counter
+from typing import Iterable, Optional
+from sqlalchemy import delete, func, insert, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models.fingerprint import IssueLshBand
+from models.issue import Issue
+from services.issueFingerprint import FINGERPRINT_THRESHOLD, band_buckets, issue_minhash, similarity
+
+# Candidates checked per issue; members of one cluster share buckets, so a few identify it
+CLUSTER_MAX_CANDIDATES = int(os.getenv("CLUSTER_MAX_CANDIDATES", "32"))
+# Issues read per bucket. Text every report shares (templates, traceback headers) makes a
+# few buckets huge; capping each one keeps them from crowding out the real duplicates.
+CLUSTER_BUCKET_LIMIT = int(os.getenv("CLUSTER_BUCKET_LIMIT", "64"))
+# First key of the PostgreSQL advisory locks that serialize filing per repository
+CLUSTER_LOCK_KEY = 7301
+
+def _lock_repositories(db: Session, repo_full_names: Iterable[str]):
+    """
+    Hold off other filings in these repositories until commit. Without it, two
+    duplicates filed side by side miss each other and start separate clusters.
+    Locks are taken in name order so concurrent callers cannot deadlock.
+    SQLite needs nothing: writers take turns and filing writes before it reads.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for repo_full_name in sorted(set(repo_full_names)):
+        db.execute(select(func.pg_advisory_xact_lock(CLUSTER_LOCK_KEY, func.hashtext(repo_full_name))))
+
+def _file_issue(db: Session, row) -> bool:
+    """Index one issue's bands and give it a cluster; True when it joined existing duplicates"""
+    signature = row.minhash if row.minhash is not None else issue_minhash(row.title, row.description)
+    buckets = band_buckets(row.repo_full_name, signature)
+    db.execute(delete(IssueLshBand).where(IssueLshBand.issue_id == row.id))
+    # A changed issue may have named its old cluster; the next-oldest member takes the name over
+    successor = db.scalar(select(func.min(Issue.id)).where(Issue.cluster_id == row.id))
+    if successor is not None:
+        db.execute(
+            update(Issue)
+            .where(Issue.cluster_id == row.id)
+            .values(cluster_id=successor, updated_at=Issue.updated_at)
+        )
+
+    clusters = set()
+    if buckets:
+        # Oldest issues of each bucket; duplicates share several buckets, chance collisions one
+        per_bucket = [
+            select(IssueLshBand.issue_id).where(IssueLshBand.bucket == bucket)
+            .order_by(IssueLshBand.issue_id).limit(CLUSTER_BUCKET_LIMIT).subquery()
+            for bucket in set(buckets)
+        ]
+        shared = Counter(db.scalars(union_all(*(select(bucket.c.issue_id) for bucket in per_bucket))))
+        # Only issues that already have a cluster; changed ones still carry their old bands
+        candidates = db.execute(
+            select(Issue.minhash, Issue.cluster_id)
+            .where(
+                Issue.id.in_([issue_id for issue_id, _ in shared.most_common(CLUSTER_MAX_CANDIDATES)]),
+                Issue.repo_full_name == row.repo_full_name,
+                Issue.cluster_id.is_not(None)
+            )
+        ).all()
+        clusters = {
+            candidate.cluster_id for candidate in candidates
+            if similarity(signature, candidate.minhash) >= FINGERPRINT_THRESHOLD
+        }
+        db.execute(insert(IssueLshBand), [
+            {"issue_id": row.id, "band": band, "bucket": bucket} for band, bucket in enumerate(buckets)
+        ])
+
+    cluster_id = min(clusters) if clusters else row.id
+    if len(clusters) > 1:
+        # The issue links clusters that were apart so far; the oldest absorbs the others
+        db.execute(
+            update(Issue)
+            .where(Issue.cluster_id.in_(clusters - {cluster_id}))
+            .values(cluster_id=cluster_id, updated_at=Issue.updated_at)
+        )
+    # Clustering is bookkeeping, not an edit of the issue
+    db.execute(
+        update(Issue)
+        .where(Issue.id == row.id)
+        .values(minhash=signature, cluster_id=cluster_id, updated_at=row.updated_at)
+    )
+    return bool(clusters)
+
+def cluster_issues(db: Session, issue_ids: Optional[Iterable[int]] = None, chunk_size: int = 500) -> int:
+    """
+    Group new and changed issues (cluster_id IS NULL) with their near-duplicates.
+
+    Issues sharing an LSH band bucket are candidates; those whose signatures
+    agree on at least FINGERPRINT_THRESHOLD of positions are duplicates. An
+    issue joins the oldest of its duplicates' clusters, or starts its own.
+    Each issue costs a few index lookups however many issues exist; there is
+    no pairwise comparison. Returns how many issues joined a cluster.
+    """
+    joined = 0
+    last_id = 0
+    while True:
+        query = (
+            select(Issue.id, Issue.repo_full_name, Issue.title, Issue.description, Issue.minhash, Issue.updated_at)
+            .where(Issue.cluster_id.is_(None), Issue.id > last_id)
+        )
+        if issue_ids is not None:
+            query = query.where(Issue.id.in_(list(issue_ids)))
+        # SKIP LOCKED lets the scheduled job and on-demand calls cluster side by side
+        rows = db.execute(query.order_by(Issue.id).limit(chunk_size).with_for_update(skip_locked=True)).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        _lock_repositories(db, (row.repo_full_name for row in rows))
+        for row in rows:
+            joined += _file_issue(db, row)
+        db.commit()
+    return joined
+
+async def issue_cluster_id(db: AsyncSession, issue_id: int) -> Optional[int]:
+    """The issue's cluster, clustering it first if the scheduled stage has not reached it yet"""
+    cluster_id = await db.scalar(select(Issue.cluster_id).where(Issue.id == issue_id))
+    if cluster_id is None:
+        await db.run_sync(cluster_issues, [issue_id])
+        cluster_id = await db.scalar(select(Issue.cluster_id).where(Issue.id == issue_id))
+    return cluster_id
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import random
+import re
+import struct
+from typing import List, Optional, Set
+
+# Signature length; bands * rows must equal it
+FINGERPRINT_PERMUTATIONS = 64
+# 16 bands of 4 rows: pairs at Jaccard 0.8 share a band with probability 0.9998, pairs at 0.3 with 0.12
+FINGERPRINT_BANDS = 16
+FINGERPRINT_ROWS = FINGERPRINT_PERMUTATIONS // FINGERPRINT_BANDS
+# Estimated Jaccard similarity at which two issues count as duplicates
+FINGERPRINT_THRESHOLD = float(os.getenv("FINGERPRINT_THRESHOLD", "0.8"))
+# Words per shingle, and the fewest shingles worth comparing; shorter texts are never clustered
+FINGERPRINT_SHINGLE_WORDS = 3
+FINGERPRINT_MIN_SHINGLES = 8
+# Only the start of very long descriptions is fingerprinted
+FINGERPRINT_MAX_CHARS = 20000
+
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+# Fixed seed: signatures are stored, so the permutations must never change between processes
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(FINGERPRINT_PERMUTATIONS)]
+_SIGNATURE = struct.Struct(f"<{FINGERPRINT_PERMUTATIONS}I")
+
+# Noise that differs between reports of the same failure, replaced in this order
+NORMALIZERS = (
+    # URLs before paths, so their path segments go with them
+    (re.compile(r"\b[a-z][a-z0-9+.-]*://\S+"), " url "),
+    (re.compile(r"\b0x[0-9a-f]+\b"), " addr "),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b"), " uuid "),
+    # Commit shas, object ids, hashes: long hex runs with at least one digit
+    (re.compile(r"\b(?=[a-f]*\d)[0-9a-f]{7,64}\b"), " hash "),
+    # Directories of Unix and Windows paths; the file name is kept
+    (re.compile(r"(?<![\w@~.-])(?:[a-z]:)?[\\/]?(?:[\w@~.-]+[\\/])+"), " "),
+    (re.compile(r"\bline \d+"), " line "),
+    (re.compile(r":\d+(?::\d+)?\b"), " "),
+    # Remaining numbers: timestamps, ports, sizes, counters
+    (re.compile(r"\d+(?:[.,]\d+)*"), "0"),
+)
+WORD = re.compile(r"\w+")
+
+def normalize(text: Optional[str]) -> str:
+    """Lower-case an issue text and strip what varies between duplicates: line numbers, addresses, paths"""
+    text = (text or "")[:FINGERPRINT_MAX_CHARS].lower()
+    for pattern, replacement in NORMALIZERS:
+        text = pattern.sub(replacement, text)
+    return " ".join(WORD.findall(text))
+
+def shingles(text: Optional[str]) -> Set[int]:
+    """64-bit hashes of the overlapping word n-grams of the normalized text"""
+    words = normalize(text).split()
+    size = FINGERPRINT_SHINGLE_WORDS
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode(), digest_size=8).digest(), "little")
+        for i in range(max(len(words) - size + 1, 0))
+    }
+
+def minhash(text: Optional[str]) -> bytes:
+    """
+    MinHash signature of an issue text, packed for storage. Empty when the
+    text has too few shingles to be compared meaningfully.
+    """
+    hashes = list(shingles(text))
+    if len(hashes) < FINGERPRINT_MIN_SHINGLES:
+        return b""
+    return _SIGNATURE.pack(*(min([(a * x + b) % _PRIME for x in hashes]) & _MASK for a, b in _PERMUTATIONS))
+
+def issue_minhash(title: Optional[str], description: Optional[str]) -> bytes:
+    return minhash(f"{title or ''}\n{description or ''}")
+
+def similarity(first: Optional[bytes], second: Optional[bytes]) -> float:
+    """Estimated Jaccard similarity: the share of signature positions that agree"""
+    if not first or not second:
+        return 0.0
+    return sum(a == b for a, b in zip(_SIGNATURE.unpack(first), _SIGNATURE.unpack(second))) / FINGERPRINT_PERMUTATIONS
+
+def band_buckets(scope: str, signature: bytes) -> List[int]:
+    """
+    LSH bucket of each band of a signature, as signed 64-bit ints. Near-duplicates
+    share at least one bucket with high probability; `scope` (the repository)
+    keeps unrelated projects out of each other's buckets.
+    """
+    if not signature:
+        return []
+    width = FINGERPRINT_ROWS * 4
+    scope = scope.encode() + b"\0"
+    return [
+        int.from_bytes(
+            hashlib.blake2b(scope + signature[band * width:(band + 1) * width], digest_size=8,
+                            person=band.to_bytes(2, "little")).digest(),
+            "little", signed=True
+        )
+        for band in range(FINGERPRINT_BANDS)
+    ]
@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from config.db import AsyncSessionLocal, dialect_insert
+from config.githubApp import GITHUB_FETCH_MODE
+from models.issue import Issue
+from models.label import IssueLabel
+from models.repository import RepoSyncState, TrackedRepository
+from models.user import User
+from services.githubGraphQL import IssueSync
+from services.githubRateLimit import bulk_priority
+from services.githubService import iter_issue_updates, iter_pages
+from services.webhookService import issue_snapshot_statements
+
+logger = logging.getLogger(__name__)
+
+# Mirrors older than this are still served, but a background sync is started for them
+ISSUE_MIRROR_MAX_AGE = int(os.getenv("ISSUE_MIRROR_MAX_AGE", "900"))
+
+MIRROR_COLUMNS = (
+    Issue.github_issue_id,
+    Issue.number,
+    Issue.title,
+    Issue.repo_full_name,
+    Issue.html_url,
+    Issue.state,
+    Issue.created_at,
+)
+
+# Syncs running in this worker, so concurrent requests and the job share one per repository
+_inflight: Dict[str, asyncio.Task] = {}
+
+async def _copy_to_new_trackers(db: AsyncSession, repo_full_name: str) -> int:
+    """
+    Give users who started tracking an already mirrored repository copies of
+    its issues, taken from an existing holder's copies instead of fetching
+    them from GitHub again. Every holder's copies receive the same snapshots,
+    so any of them will do. Returns the number of users given copies.
+    """
+    trackers = select(TrackedRepository.user_id).where(TrackedRepository.repo_full_name == repo_full_name)
+    has_copies = select(Issue.id).where(
+        Issue.user_id == TrackedRepository.user_id,
+        Issue.repo_full_name == TrackedRepository.repo_full_name
+    ).exists()
+    new_users = (await db.scalars(trackers.where(~has_copies))).all()
+    if not new_users:
+        return 0
+    # None when the repository has no mirrored issues: there is nothing to copy
+    source_user = await db.scalar(select(func.min(Issue.user_id)).where(Issue.repo_full_name == repo_full_name))
+    if source_user is None:
+        return 0
+
+    insert = dialect_insert(db)
+    # Every column but the row's identity; the clustering stage files the new copies
+    columns = [column for column in Issue.__table__.c if column.name not in ("id", "user_id", "cluster_id")]
+    source, copy = aliased(Issue), aliased(Issue)
+    for user_id in new_users:
+        rows = select(*columns, literal(user_id)).where(
+            Issue.repo_full_name == repo_full_name, Issue.user_id == source_user
+        )
+        await db.execute(
+            insert(Issue).from_select([column.name for column in columns] + ["user_id"], rows)
+            .on_conflict_do_nothing(index_elements=[Issue.github_issue_id, Issue.user_id])
+        )
+        labels = (
+            select(copy.id, IssueLabel.name)
+            .join(source, source.id == IssueLabel.issue_id)
+            .join(copy, (copy.github_issue_id == source.github_issue_id) & (copy.user_id == user_id))
+            .where(source.repo_full_name == repo_full_name, source.user_id == source_user)
+        )
+        await db.execute(insert(IssueLabel).from_select(["issue_id", "name"], labels).on_conflict_do_nothing())
+    await db.commit()
+    logger.info(f"Copied the mirror of {repo_full_name} to {len(new_users)} new users")
+    return len(new_users)
+
+async def _record(db: AsyncSession, repo_full_name: str, **values):
+    await db.execute(update(RepoSyncState).where(RepoSyncState.repo_full_name == repo_full_name).values(**values))
+    await db.commit()
+
+async def _begin(db: AsyncSession, repo_full_name: str):
+    """The repository's sync state, created if missing; seeded repositories first copy to new trackers"""
+    insert = dialect_insert(db)
+    await db.execute(
+        insert(RepoSyncState).values(repo_full_name=repo_full_name, issues_synced=0)
+        .on_conflict_do_nothing(index_elements=["repo_full_name"])
+    )
+    await db.commit()
+    state = (await db.execute(
+        select(RepoSyncState.since, RepoSyncState.issues_synced)
+        .where(RepoSyncState.repo_full_name == repo_full_name)
+    )).one()
+    # The mark is set once the first pass completes; until then the repository is seeded
+    if state.since:
+        await _copy_to_new_trackers(db, repo_full_name)
+    return state
+
+async def _store_page(db: AsyncSession, repo_full_name: str, page: list, high_water: Optional[str]) -> Tuple[int, Optional[str]]:
+    """Write one page of issues and advance the mark past it; returns (issues written, new mark)"""
+    insert = dialect_insert(db)
+    synced = 0
+    for issue in page:
+        if "pull_request" in issue:
+            continue
+        for stmt in issue_snapshot_statements(insert, repo_full_name, issue):
+            await db.execute(stmt)
+        synced += 1
+    if page:
+        # Never move the mark backwards
+        high_water = max(high_water or "", page[-1]["updated_at"])
+    await _record(db, repo_full_name, since=high_water, last_status="running")
+    return synced, high_water
+
+async def _finish(db: AsyncSession, repo_full_name: str, state, high_water: Optional[str], synced: int,
+                  started: datetime, started_on_github: str):
+    if high_water is None:
+        # Nothing to mirror yet; later passes only need changes made after this one started
+        high_water = started_on_github
+    await _record(
+        db, repo_full_name,
+        since=high_water,
+        last_synced_at=started,
+        last_status="succeeded",
+        last_error=None,
+        issues_synced=(state.issues_synced or 0) + synced
+    )
+    logger.info(f"Mirrored {synced} updated issues of {repo_full_name}")
+
+def _github_now() -> str:
+    """Now in GitHub's timestamp format, so marks compare with updated_at values as strings"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+async def sync_repository(access_token: str, repo_full_name: str) -> int:
+    """
+    Pull the repository's issues updated since its high-water mark into the
+    copy of every user tracking it. The first sync only fetches open issues;
+    later ones fetch every issue updated since the mark, so closed issues get
+    closed in the mirror. Pages are requested oldest update first and the mark
+    advances with each committed page, so an interrupted sync resumes where it
+    stopped. Pull requests are skipped.
+    Returns the number of issues written.
+    """
+    started, started_on_github = datetime.now(), _github_now()
+    async with AsyncSessionLocal() as db:
+        state = await _begin(db, repo_full_name)
+        if state.since:
+            # state=all so issues closed since the last sync are closed in the mirror too
+            params = {"state": "all", "sort": "updated", "direction": "asc", "since": state.since}
+        else:
+            # Only open issues are served; closed ones need not be walked to seed the mirror
+            params = {"state": "open", "sort": "updated", "direction": "asc"}
+
+        synced = 0
+        high_water = state.since
+        try:
+            async for page in iter_pages(access_token, f"/repos/{repo_full_name}/issues", params):
+                count, high_water = await _store_page(db, repo_full_name, page, high_water)
+                synced += count
+        except Exception as e:
+            await db.rollback()
+            await _record(db, repo_full_name, last_status="failed", last_error=str(e))
+            logger.warning(f"Issue mirror sync of {repo_full_name} failed: {str(e)}")
+            raise
+
+        await _finish(db, repo_full_name, state, high_water, synced, started, started_on_github)
+    return synced
+
+async def sync_repositories_graphql(access_token: str, repo_full_names: List[str]) -> Dict[str, int]:
+    """
+    Sync many repositories with batched GraphQL queries, up to
+    GITHUB_GRAPHQL_REPOS_PER_QUERY repositories per query instead of one REST
+    call each. Marks, seeding and resuming work as in sync_repository.
+    Returns the issues written per repository that synced; failures are
+    recorded in repo_sync_states and logged.
+    """
+    started, started_on_github = datetime.now(), _github_now()
+    async with AsyncSessionLocal() as db:
+        states = {name: await _begin(db, name) for name in repo_full_names}
+        syncs = {
+            name: IssueSync(state.since, ("OPEN", "CLOSED") if state.since else ("OPEN",))
+            for name, state in states.items()
+        }
+        marks = {name: state.since for name, state in states.items()}
+        synced = dict.fromkeys(repo_full_names, 0)
+        finished = {}
+        try:
+            async for name, page, last in iter_issue_updates(access_token, syncs):
+                if page is None:
+                    await _record(db, name, last_status="failed", last_error="Repository not found or not accessible")
+                    finished[name] = None
+                    continue
+                count, marks[name] = await _store_page(db, name, page, marks[name])
+                synced[name] += count
+                if last:
+                    await _finish(db, name, states[name], marks[name], synced[name], started, started_on_github)
+                    finished[name] = synced[name]
+        except Exception as e:
+            await db.rollback()
+            for name in repo_full_names:
+                if name not in finished:
+                    await _record(db, name, last_status="failed", last_error=str(e))
+            logger.warning(f"Issue mirror sync of {len(repo_full_names) - len(finished)} repositories failed: {str(e)}")
+    return {name: count for name, count in finished.items() if count is not None}
+
+async def sync_repositories(access_token: str, repo_full_names: List[str]) -> Dict[str, int]:
+    """Sync the repositories with one token, batched in graphql fetch mode; returns issues written per synced repository"""
+    if GITHUB_FETCH_MODE == "graphql":
+        return await sync_repositories_graphql(access_token, repo_full_names)
+    results = await asyncio.gather(
+        *(sync_repository(access_token, name) for name in repo_full_names), return_exceptions=True
+    )
+    return {name: result for name, result in zip(repo_full_names, results) if not isinstance(result, BaseException)}
+
+def schedule_syncs(access_token: str, repo_full_names: List[str]) -> Dict[str, asyncio.Task]:
+    """
+    The sync task of each repository: one already running in this worker, or
+    a new one. Repositories without a running sync share one new task, so
+    graphql fetch mode batches them. Every task returns sync_repositories' result.
+    """
+    loop = asyncio.get_running_loop()
+    tasks = {}
+    for name in dict.fromkeys(repo_full_names):
+        task = _inflight.get(name)
+        # A task left over from another event loop (e.g. a test client) cannot be awaited here
+        if task is not None and not task.done() and task.get_loop() is loop:
+            tasks[name] = task
+    missing = [name for name in dict.fromkeys(repo_full_names) if name not in tasks]
+    if not missing:
+        return tasks
+
+    task = loop.create_task(sync_repositories(access_token, missing))
+
+    def finished(done: asyncio.Task):
+        for name in missing:
+            if _inflight.get(name) is done:
+                del _inflight[name]
+        # Background syncs are never awaited; their errors are logged in the sync functions
+        done.cancelled() or done.exception()
+
+    task.add_done_callback(finished)
+    for name in missing:
+        _inflight[name] = task
+        tasks[name] = task
+    return tasks
+
+async def sync_tracked_repositories() -> int:
+    """Sync every tracked repository with the token of one user tracking it. Returns the number synced."""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(TrackedRepository.repo_full_name, User.github_access_token)
+            .join(User, User.id == TrackedRepository.user_id)
+            .where(User.github_access_token.is_not(None))
+            .order_by(TrackedRepository.repo_full_name, TrackedRepository.user_id)
+        )).all()
+    tokens = {}
+    for repo_full_name, access_token in rows:
+        tokens.setdefault(repo_full_name, access_token)
+    by_token = {}
+    for repo_full_name, access_token in tokens.items():
+        by_token.setdefault(access_token, []).append(repo_full_name)
+
+    # Tasks copy the current context, so every sync started here runs at bulk priority
+    with bulk_priority():
+        tasks = {}
+        for access_token, names in by_token.items():
+            tasks.update(schedule_syncs(access_token, names))
+    await asyncio.gather(*set(tasks.values()), return_exceptions=True)
+    return sum(
+        1 for name, task in tasks.items()
+        if not task.cancelled() and task.exception() is None and name in task.result()
+    )
+
+async def refresh_mirror(db: AsyncSession, access_token: str, repo_full_names: List[str]) -> dict:
+    """
+    Make the mirror of the given repositories fit to serve. Repositories that
+    were never synced are synced before returning; stale ones keep being served
+    while a background sync refreshes them. Returns the mirror's freshness.
+    """
+    async def sync_times() -> Dict[str, Optional[datetime]]:
+        rows = await db.execute(
+            select(RepoSyncState.repo_full_name, RepoSyncState.last_synced_at)
+            .where(RepoSyncState.repo_full_name.in_(repo_full_names))
+        )
+        return dict(rows.all())
+
+    synced_at = await sync_times()
+    cutoff = datetime.now() - timedelta(seconds=ISSUE_MIRROR_MAX_AGE)
+    never_synced = [name for name in repo_full_names if synced_at.get(name) is None]
+    stale = [name for name in repo_full_names if synced_at.get(name) is not None and synced_at[name] < cutoff]
+    tasks = schedule_syncs(access_token, never_synced + stale) if never_synced or stale else {}
+
+    if never_synced:
+        # Shielded so a client disconnect does not cancel a sync other requests are waiting on
+        await asyncio.gather(
+            *(asyncio.shield(task) for task in {tasks[name] for name in never_synced}),
+            return_exceptions=True
+        )
+        synced_at = await sync_times()
+
+    times = [synced_at.get(name) for name in repo_full_names]
+    known = [time for time in times if time is not None]
+    return {
+        "synced_at": min(known) if known else None,
+        "stale_repos": sum(1 for time in times if time is None or time < cutoff),
+    }
+
+def freshness_headers(freshness: dict) -> dict:
+    """Response headers telling clients how old the mirrored data is"""
+    headers = {"X-Mirror-Stale-Repos": str(freshness["stale_repos"])}
+    if freshness["synced_at"] is not None:
+        headers["X-Mirror-Synced-At"] = freshness["synced_at"].isoformat()
+    return headers
+
+async def mirrored_issues(db: AsyncSession, user_id: int, repo_full_names: List[str],
+                          offset: int = 0, limit: Optional[int] = None) -> list:
+    """The user's open mirrored issues in the given repositories, newest number first per repository"""
+    query = (
+        select(*MIRROR_COLUMNS)
+        .where(Issue.user_id == user_id, Issue.repo_full_name.in_(repo_full_names), Issue.state == "open")
+        .order_by(Issue.repo_full_name, Issue.number.desc(), Issue.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return (await db.execute(query)).all()
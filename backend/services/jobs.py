@@ -0,0 +1,57 @@
+import logging
+import os
+from datetime import timedelta
+from config.db import SessionLocal
+from services.aiService import reclassify_issues
+from services.issueClusters import cluster_issues
+from services.issueMirror import sync_tracked_repositories
+from services.scheduler import JobScheduler
+from services.webhookService import prune_webhook_events
+
+logger = logging.getLogger(__name__)
+
+JOB_RECLASSIFY_INTERVAL = int(os.getenv("JOB_RECLASSIFY_INTERVAL", "3600"))
+JOB_WEBHOOK_PRUNE_INTERVAL = int(os.getenv("JOB_WEBHOOK_PRUNE_INTERVAL", str(6 * 3600)))
+JOB_ISSUE_MIRROR_INTERVAL = int(os.getenv("JOB_ISSUE_MIRROR_INTERVAL", "600"))
+JOB_CLUSTER_INTERVAL = int(os.getenv("JOB_CLUSTER_INTERVAL", "60"))
+WEBHOOK_RETENTION_DAYS = int(os.getenv("WEBHOOK_RETENTION_DAYS", "7"))
+
+def reclassify_issues_job():
+    """Re-check AI-fixable status for issues whose content or rules changed"""
+    db = SessionLocal()
+    try:
+        updated_count = reclassify_issues(db)
+        logger.info(f"AI-fixable status update completed, {updated_count} issues changed")
+    finally:
+        db.close()
+
+def cluster_issues_job():
+    """File new and changed issues under their near-duplicate clusters"""
+    db = SessionLocal()
+    try:
+        joined = cluster_issues(db)
+        logger.info(f"Issue clustering completed, {joined} issues joined a duplicate cluster")
+    finally:
+        db.close()
+
+def prune_webhook_events_job():
+    db = SessionLocal()
+    try:
+        pruned = prune_webhook_events(db, timedelta(days=WEBHOOK_RETENTION_DAYS))
+        logger.info(f"Pruned {pruned} processed webhook events")
+    finally:
+        db.close()
+
+async def sync_issue_mirror_job():
+    """Pull issue changes for every tracked repository into the local mirror"""
+    synced = await sync_tracked_repositories()
+    logger.info(f"Issue mirror sync completed for {synced} repositories")
+
+def register_jobs(scheduler: JobScheduler):
+    # Runs once right after startup, then periodically
+    scheduler.register("reclassify-issues", reclassify_issues_job, interval=JOB_RECLASSIFY_INTERVAL)
+    scheduler.register("cluster-issues", cluster_issues_job, interval=JOB_CLUSTER_INTERVAL, initial_delay=15)
+    scheduler.register("prune-webhook-events", prune_webhook_events_job,
+                       interval=JOB_WEBHOOK_PRUNE_INTERVAL, initial_delay=60)
+    scheduler.register("sync-issue-mirror", sync_issue_mirror_job,
+                       interval=JOB_ISSUE_MIRROR_INTERVAL, initial_delay=30)
@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import DateTime, and_, or_, tuple_
+from sqlalchemy.sql import ColumnElement, Select
+
+# (expression, descending) pairs; the last key must be unique so the order is total
+SortKeys = Sequence[Tuple[ColumnElement, bool]]
+
+def encode_cursor(values: Sequence) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, keys: SortKeys) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor does not match the sort keys")
+        return [
+            datetime.fromisoformat(value) if isinstance(expression.type, DateTime) else value
+            for value, (expression, _) in zip(values, keys)
+        ]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_paginate(query: Select, keys: SortKeys, cursor: Optional[str], limit: int) -> Select:
+    """
+    Order by the sort keys and seek past the cursor instead of using OFFSET,
+    so every page costs the same as the first. The key values are selected
+    alongside each row so the next cursor can be built from the last one.
+    One extra row is fetched to tell whether another page exists.
+    """
+    query = query.add_columns(*(expression for expression, _ in keys))
+    query = query.order_by(*(expression.desc() if descending else expression.asc() for expression, descending in keys))
+
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        directions = {descending for _, descending in keys}
+        if len(directions) == 1:
+            # Row-value comparison lets a composite index seek straight to the cursor
+            left = tuple_(*(expression for expression, _ in keys))
+            query = query.where(left < tuple(values) if directions.pop() else left > tuple(values))
+        else:
+            clauses = []
+            for index, (expression, descending) in enumerate(keys):
+                equal = [keys[prior][0] == values[prior] for prior in range(index)]
+                step = expression < values[index] if descending else expression > values[index]
+                clauses.append(and_(*equal, step))
+            query = query.where(or_(*clauses))
+
+    return query.limit(limit + 1)
+
+def page_rows(rows: Sequence, limit: int, keys: SortKeys) -> Tuple[List, Optional[str]]:
+    """Split rows from keyset_paginate into (page rows, next_cursor); the sort key values are the trailing columns"""
+    next_cursor = encode_cursor(tuple(rows[limit - 1])[-len(keys):]) if len(rows) > limit else None
+    return list(rows[:limit]), next_cursor
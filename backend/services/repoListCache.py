@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+REPO_CACHE_MAX_ENTRIES = int(os.getenv("REPO_CACHE_MAX_ENTRIES", "5000"))
+# Entries younger than this are served without a refresh
+REPO_CACHE_FRESH_TTL = float(os.getenv("REPO_CACHE_FRESH_TTL", "300"))
+# Older entries are refetched before answering instead of being served stale
+REPO_CACHE_MAX_STALE = float(os.getenv("REPO_CACHE_MAX_STALE", "86400"))
+
+class RepoList(NamedTuple):
+    username: str
+    repos: list
+    fetched_at: float
+
+class RepoListCache:
+    """
+    Per-user cache of the GitHub username and repository list.
+
+    Fresh entries are returned as-is; stale entries are returned immediately
+    while one background task refreshes them (stale-while-revalidate).
+    Concurrent misses and refreshes for the same user share a single fetch.
+    Entries are keyed by a hash of the access token, like the response cache.
+    """
+
+    def __init__(self, max_entries: int = REPO_CACHE_MAX_ENTRIES, fresh_ttl: float = REPO_CACHE_FRESH_TTL,
+                 max_stale: float = REPO_CACHE_MAX_STALE):
+        self.max_entries = max_entries
+        self.fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self._entries = OrderedDict()
+        self._inflight = {}
+        # The loop serving reads; entries are only changed on it
+        self._loop = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(access_token: str) -> str:
+        return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+    async def get(self, access_token: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        """Return {"username", "repos"} for the token, calling fetch() only when needed"""
+        self._loop = asyncio.get_running_loop()
+        key = self.key(access_token)
+        entry = self._entries.get(key)
+        age = time.monotonic() - entry.fetched_at if entry is not None else None
+
+        if entry is None or age > self.max_stale:
+            self.misses += 1
+            entry = await asyncio.shield(self._refresh(key, fetch))
+        elif age > self.fresh_ttl:
+            self.stale_hits += 1
+            self._refresh(key, fetch)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return {"username": entry.username, "repos": entry.repos}
+
+    def _refresh(self, key: str, fetch: Callable[[], Awaitable[dict]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        # A task left over from another event loop (e.g. a test client) cannot be awaited here
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.get_running_loop().create_task(self._fetch(key, fetch))
+            # Background refreshes are never awaited; mark their errors as seen (they are logged in _fetch)
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[dict]]) -> RepoList:
+        self.refreshes += 1
+        try:
+            data = await fetch()
+        except Exception:
+            self.refresh_errors += 1
+            # A stale entry stays in place and keeps being served; the next stale read retries
+            logger.exception("Repository list refresh failed")
+            raise
+        finally:
+            current = self._inflight.get(key) is asyncio.current_task()
+            if current:
+                self._inflight.pop(key, None)
+        entry = RepoList(data["username"], data["repos"], time.monotonic())
+        # If the key was invalidated mid-fetch the result may predate the change: return it, don't cache it
+        if current:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _drop(self, key: str) -> bool:
+        self._inflight.pop(key, None)
+        return self._entries.pop(key, None) is not None
+
+    def invalidate(self, access_token: str):
+        if self._drop(self.key(access_token)):
+            self.invalidations += 1
+
+    def invalidate_repository(self, repo_full_name: str, owner_login: Optional[str] = None) -> Optional[int]:
+        """
+        Drop every entry that lists the repository or belongs to its owner, so
+        created, deleted, renamed and transferred repositories show up on the
+        next read. Returns how many were dropped. Called from another thread
+        (the webhook consumer), the drop is handed to the loop serving reads
+        and None is returned.
+        """
+        loop = self._loop
+        if loop is not None and loop.is_running() and not self._on_loop(loop):
+            loop.call_soon_threadsafe(self._invalidate_repository, repo_full_name, owner_login)
+            return None
+        return self._invalidate_repository(repo_full_name, owner_login)
+
+    @staticmethod
+    def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
+
+    def _invalidate_repository(self, repo_full_name: str, owner_login: Optional[str]) -> int:
+        repo_full_name = repo_full_name.lower()
+        owner_login = owner_login.lower() if owner_login else None
+        dropped = 0
+        for key, entry in list(self._entries.items()):
+            if (owner_login and entry.username.lower() == owner_login) or any(
+                repo.get("full_name", "").lower() == repo_full_name for repo in entry.repos
+            ):
+                if self._drop(key):
+                    dropped += 1
+        self.invalidations += dropped
+        return dropped
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+
+repo_list_cache = RepoListCache()
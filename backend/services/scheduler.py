@@ -0,0 +1,236 @@
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from sqlalchemy.orm import Session
+from config.db import SessionLocal, dialect_insert
+from models.job import ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+# A crashed runner's lease expires after this long so another worker can take over
+JOB_LOCK_TTL = int(os.getenv("JOB_LOCK_TTL", "900"))
+# One-shot jobs are not due again for this long, so workers starting together run them once
+JOB_ONE_SHOT_COOLDOWN = int(os.getenv("JOB_ONE_SHOT_COOLDOWN", "300"))
+JOB_RETRY_DELAY = int(os.getenv("JOB_RETRY_DELAY", "60"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def acquire_job_lease(db: Session, name: str, owner: str, ttl: int, due_only: bool = True) -> bool:
+    """
+    Take the job's run lease if no live run holds it; only one worker can win.
+    With due_only the job must also be due (next_run_at reached); manual
+    triggers pass due_only=False and are only blocked by a running lease.
+    """
+    now = datetime.now()
+    insert = dialect_insert(db)
+    stmt = insert(ScheduledJob).values(
+        name=name,
+        owner=owner,
+        locked_until=now + timedelta(seconds=ttl),
+        last_status="running",
+        last_started_at=now
+    )
+    free = (ScheduledJob.locked_until.is_(None)) | (ScheduledJob.locked_until < now)
+    if due_only:
+        free &= (ScheduledJob.next_run_at.is_(None)) | (ScheduledJob.next_run_at <= now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={
+            "owner": stmt.excluded.owner,
+            "locked_until": stmt.excluded.locked_until,
+            "last_status": stmt.excluded.last_status,
+            "last_started_at": stmt.excluded.last_started_at,
+        },
+        where=free
+    )
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount == 1
+
+def release_job_lease(db: Session, name: str, owner: str, next_run_in: int, status: str,
+                      duration_ms: int, error: Optional[str] = None):
+    """Record the run, free the lease and set when the job is next due"""
+    now = datetime.now()
+    db.query(ScheduledJob).filter(ScheduledJob.name == name, ScheduledJob.owner == owner).update({
+        "locked_until": None,
+        "next_run_at": now + timedelta(seconds=next_run_in),
+        "last_status": status,
+        "last_finished_at": now,
+        "last_duration_ms": duration_ms,
+        "last_error": error,
+    })
+    db.commit()
+
+class Job:
+    def __init__(self, name: str, func: Callable, interval: Optional[int], initial_delay: float, single_runner: bool):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.initial_delay = initial_delay
+        self.single_runner = single_runner
+        self.state = "idle"
+        self.runs = 0
+        self.last_started_at = None
+        self.last_duration_ms = None
+        self.last_error = None
+        self.next_run_at = None
+        self.trigger = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "state": self.state,
+            "runs": self.runs,
+            "last_started_at": self.last_started_at,
+            "last_duration_ms": self.last_duration_ms,
+            "last_error": self.last_error,
+            "next_run_at": self.next_run_at,
+        }
+
+class JobScheduler:
+    """
+    In-process scheduler for startup and periodic maintenance jobs.
+
+    Synchronous job functions run in a worker thread so they never block
+    request handling. Jobs marked single_runner take a lease row in
+    scheduled_jobs first; across several gunicorn/uvicorn workers only the
+    lease holder runs the job. The lease only covers a run; the next due time
+    is stored beside it, so a manual trigger runs the job straight away unless
+    another worker is running it right now.
+    """
+
+    def __init__(self, owner: str = WORKER_ID):
+        self.owner = owner
+        self.jobs = {}
+        self._tasks = []
+
+    def register(self, name: str, func: Callable, interval: Optional[int] = None,
+                 initial_delay: float = 0, single_runner: bool = True) -> Job:
+        """Register a job; interval=None makes it a one-shot startup job"""
+        job = Job(name, func, interval, initial_delay, single_runner)
+        self.jobs[name] = job
+        return job
+
+    def start(self):
+        for job in self.jobs.values():
+            job.trigger = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._loop(job)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+    def trigger(self, name: str) -> bool:
+        """Run a job as soon as possible, ignoring its schedule but not a running lease"""
+        job = self.jobs.get(name)
+        if job is None or job.trigger is None:
+            return False
+        job.trigger.set()
+        return True
+
+    async def _loop(self, job: Job):
+        delay = job.initial_delay
+        while True:
+            job.next_run_at = datetime.now() + timedelta(seconds=delay)
+            try:
+                await asyncio.wait_for(job.trigger.wait(), timeout=delay)
+                manual = True
+            except asyncio.TimeoutError:
+                manual = False
+            job.trigger.clear()
+
+            await self.run_job(job, manual=manual)
+            while job.interval is None:
+                job.next_run_at = None
+                # One-shot jobs only run again when triggered explicitly
+                await job.trigger.wait()
+                job.trigger.clear()
+                await self.run_job(job, manual=True)
+            delay = job.interval
+
+    async def run_job(self, job: Job, manual: bool = False) -> str:
+        """Run the job once; scheduled runs also skip it when another worker ran it recently"""
+        next_run_in = job.interval if job.interval is not None else JOB_ONE_SHOT_COOLDOWN
+        if job.single_runner:
+            acquired = await asyncio.to_thread(
+                self._with_session, acquire_job_lease, job.name, self.owner, JOB_LOCK_TTL, not manual
+            )
+            if not acquired:
+                job.state = "skipped"
+                logger.info(f"Job {job.name} is running or not due on another worker, skipping")
+                return job.state
+
+        job.state = "running"
+        job.last_started_at = datetime.now()
+        started = time.perf_counter()
+        error = None
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                await asyncio.to_thread(job.func)
+            job.state = "succeeded"
+        except asyncio.CancelledError:
+            job.state = "cancelled"
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job.name} failed")
+            job.state = "failed"
+            error = str(e)
+            next_run_in = min(next_run_in, JOB_RETRY_DELAY)
+        finally:
+            job.runs += 1
+            job.last_duration_ms = int((time.perf_counter() - started) * 1000)
+            job.last_error = error
+            logger.info(f"Job {job.name} {job.state} in {job.last_duration_ms}ms")
+
+        if job.single_runner:
+            await asyncio.to_thread(
+                self._with_session, release_job_lease, job.name, self.owner,
+                next_run_in, job.state, job.last_duration_ms, error
+            )
+        return job.state
+
+    @staticmethod
+    def _with_session(func, *args):
+        db = SessionLocal()
+        try:
+            return func(db, *args)
+        finally:
+            db.close()
+
+    def status(self, db: Session) -> list:
+        """Local job state merged with the cluster-wide last run from the lease table"""
+        leases = {row.name: row for row in db.query(ScheduledJob).filter(ScheduledJob.name.in_(list(self.jobs)))}
+        statuses = []
+        for name, job in self.jobs.items():
+            status = job.status()
+            lease = leases.get(name)
+            if lease is not None:
+                status["cluster"] = {
+                    "owner": lease.owner,
+                    "locked_until": lease.locked_until,
+                    "next_run_at": lease.next_run_at,
+                    "last_status": lease.last_status,
+                    "last_started_at": lease.last_started_at,
+                    "last_finished_at": lease.last_finished_at,
+                    "last_duration_ms": lease.last_duration_ms,
+                    "last_error": lease.last_error,
+                }
+            statuses.append(status)
+        return statuses
+
+scheduler = JobScheduler()
@@ -0,0 +1,53 @@
+import re
+from typing import List, Tuple
+from sqlalchemy import column, false, func, literal_column, table
+from sqlalchemy.sql import ColumnElement, Select
+from models.issue import Issue
+
+# Only word characters reach the query parsers, so user input cannot inject operators
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MAX_SEARCH_TOKENS = 16
+
+# Title matches outweigh description matches (mirrors the 'A'/'B' weights on Postgres)
+SQLITE_BM25_WEIGHTS = (10.0, 1.0)
+
+issues_fts = table("issues_fts", column("rowid"))
+
+def tokenize(search: str) -> List[str]:
+    return TOKEN_PATTERN.findall(search.lower())[:MAX_SEARCH_TOKENS]
+
+def _ts_query(tokens: List[str]):
+    return func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+
+def _check_dialect(dialect: str):
+    if dialect not in ("postgresql", "sqlite"):
+        raise ValueError(f"Full-text search is not supported on {dialect}")
+
+def fulltext_search(query: Select, dialect: str, search: str) -> Select:
+    """
+    Restrict an issues query to full-text matches of every search term over
+    title and description. Each term also matches as a prefix, so "crash sav"
+    finds "Crash on save". Terms are not stemmed: a stemmer rewrites prefixes
+    too ("azy" -> "azi"), which breaks prefix matching.
+    """
+    _check_dialect(dialect)
+    tokens = tokenize(search)
+    if not tokens:
+        return query.where(false())
+
+    if dialect == "postgresql":
+        return query.where(literal_column("issues.search_vector").op("@@")(_ts_query(tokens)))
+
+    match = " ".join(f'"{token}"*' for token in tokens)
+    return (
+        query.join(issues_fts, issues_fts.c.rowid == Issue.id)
+        .where(literal_column("issues_fts").op("MATCH")(match))
+    )
+
+def fulltext_rank(dialect: str, search: str) -> Tuple[ColumnElement, bool]:
+    """Relevance of a fulltext_search() match, and whether higher values rank first"""
+    _check_dialect(dialect)
+    if dialect == "postgresql":
+        return func.ts_rank_cd(literal_column("issues.search_vector"), _ts_query(tokenize(search))), True
+    # bm25() scores better matches lower
+    return func.bm25(literal_column("issues_fts"), *SQLITE_BM25_WEIGHTS), False
@@ -0,0 +1,77 @@
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+# Bounds how long another worker can keep serving a rotated token
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+class CachedUser(NamedTuple):
+    """Detached snapshot of a users row; safe to share between requests"""
+    id: int
+    github_access_token: str
+
+class UserCache:
+    """
+    Bounded LRU cache of resolved users with a per-entry TTL.
+
+    Lets request handlers confirm the caller and read their token without a
+    database round trip. store_access_token invalidates the entry locally
+    when a token rotates; other workers pick it up once the TTL expires.
+    """
+
+    def __init__(self, max_entries: int = USER_CACHE_MAX_ENTRIES, ttl: float = USER_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return user
+
+    def put(self, user: CachedUser):
+        self._entries[user.id] = (user, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: int):
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def clear(self):
+        self._entries.clear()
+
+user_cache = UserCache()
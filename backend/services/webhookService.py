@@ -0,0 +1,418 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+from sqlalchemy import case, func, select, union, union_all, literal, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from config.db import SessionLocal, dialect_insert
+from models.issue import Issue
+from models.label import IssueLabel
+from models.user import User
+from models.repository import ForkParent, TrackedRepository
+from models.webhook import WebhookEvent
+from services.repoListCache import repo_list_cache
+from services.fixabilityClassifier import CLASSIFIER_VERSION, classify, content_hash
+from services.issueFingerprint import issue_minhash
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "100"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "5"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+# Rows left in "processing" longer than this belonged to a worker that died
+WEBHOOK_CLAIM_TIMEOUT = timedelta(seconds=int(os.getenv("WEBHOOK_CLAIM_TIMEOUT", "300")))
+
+ISSUE_ACTIONS = ["opened", "edited", "labeled", "unlabeled", "closed", "reopened"]
+
+async def enqueue_webhook_event(db: AsyncSession, delivery_id: Optional[str], event_type: str, payload_body: bytes) -> bool:
+    """
+    Persist a delivery to the outbox. Returns False for a redelivery of an
+    event we already hold, keyed by X-GitHub-Delivery.
+    """
+    if not delivery_id:
+        delivery_id = "sha256:" + hashlib.sha256(event_type.encode() + b":" + payload_body).hexdigest()
+
+    insert = dialect_insert(db)
+    stmt = insert(WebhookEvent).values(
+        delivery_id=delivery_id,
+        event_type=event_type,
+        payload=payload_body,
+        status="pending",
+        attempts=0,
+        received_at=datetime.now()
+    ).on_conflict_do_nothing(index_elements=["delivery_id"])
+    result = await db.execute(stmt)
+    await db.commit()
+    return result.rowcount == 1
+
+def parse_github_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """GitHub's ISO-8601 UTC timestamps as naive local time, like the rest of the schema"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone().replace(tzinfo=None)
+
+def issue_snapshot_statements(insert, repo_full_name: str, issue_data: dict) -> list:
+    """
+    Statements that write one GitHub issue snapshot, labels included, to the
+    copy of every user tracking the repository or already holding the issue.
+    Used by the webhook handler and the issue mirror sync.
+    """
+    github_issue_id = issue_data.get("id")
+    description = issue_data.get("body")
+
+    # Get labels, in the order issue_labels returns them
+    labels = sorted({label.get("name") for label in issue_data.get("labels", []) if label.get("name")})
+
+    # Same rules as the re-classification job: labels first, then the description
+    is_ai_fixable, ai_fixable_reason = classify(labels, description)
+    now = datetime.now()
+
+    # Users who track the repository, plus anyone already holding a copy of the issue
+    affected_users = union(
+        select(TrackedRepository.user_id).where(TrackedRepository.repo_full_name == repo_full_name),
+        select(Issue.user_id).where(Issue.github_issue_id == github_issue_id)
+    )
+    values = {
+        "github_issue_id": github_issue_id,
+        "number": issue_data.get("number"),
+        "title": issue_data.get("title"),
+        "repo_full_name": repo_full_name,
+        "description": description,
+        "state": issue_data.get("state"),
+        "html_url": issue_data.get("html_url"),
+        "is_ai_fixable": is_ai_fixable,
+        "ai_fixable_reason": ai_fixable_reason,
+        "classifier_version": CLASSIFIER_VERSION,
+        "content_hash": content_hash(labels, description),
+        # Same signature for every copy; the clustering stage files them under one cluster
+        "minhash": issue_minhash(issue_data.get("title"), description),
+        "created_at": parse_github_timestamp(issue_data.get("created_at")) or now,
+        "updated_at": now,
+    }
+    columns = list(values) + ["user_id"]
+    rows = select(
+        *(literal(value, Issue.__table__.c[name].type).label(name) for name, value in values.items()),
+        User.id
+    ).where(User.id.in_(affected_users))
+
+    # One INSERT ... SELECT ... ON CONFLICT statement applies the snapshot to every affected user
+    stmt = insert(Issue).from_select(columns, rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Issue.github_issue_id, Issue.user_id],
+        set_={
+            "number": stmt.excluded.number,
+            "title": stmt.excluded.title,
+            "state": stmt.excluded.state,
+            "description": stmt.excluded.description,
+            "is_ai_fixable": stmt.excluded.is_ai_fixable,
+            "ai_fixable_reason": stmt.excluded.ai_fixable_reason,
+            "classifier_version": stmt.excluded.classifier_version,
+            "content_hash": stmt.excluded.content_hash,
+            "minhash": stmt.excluded.minhash,
+            # A changed text may belong to another cluster now; the clustering stage re-files it
+            "cluster_id": case((Issue.minhash == stmt.excluded.minhash, Issue.cluster_id), else_=None),
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    statements = [stmt]
+
+    # Every copy of the issue now carries this snapshot, so replace their label rows together
+    issue_ids = select(Issue.id).where(Issue.github_issue_id == github_issue_id)
+    statements.append(delete(IssueLabel).where(IssueLabel.issue_id.in_(issue_ids)))
+    if labels:
+        statements.append(insert(IssueLabel).from_select(
+            ["issue_id", "name"],
+            union_all(*(select(Issue.id, literal(name)).where(Issue.github_issue_id == github_issue_id) for name in labels))
+        ))
+    return statements
+
+def handle_issues_event(payload: dict, db: Session) -> dict:
+    """Handle GitHub issues events"""
+    action = payload.get("action")
+    issue_data = payload.get("issue", {})
+    repository = payload.get("repository", {})
+    
+    if action not in ISSUE_ACTIONS:
+        return {"message": f"Ignoring issues.{action} event"}
+
+    for stmt in issue_snapshot_statements(dialect_insert(db), repository.get("full_name"), issue_data):
+        db.execute(stmt)
+    
+    return {"message": f"Successfully processed {action} event for issue #{issue_data.get('number')}"}
+
+def handle_repository_event(payload: dict, db: Session) -> dict:
+    """
+    Drop cached repository lists and fork parents affected by a created,
+    deleted, renamed, transferred or visibility-changed repository. The
+    repository list cache is per worker; other workers pick the change up
+    once their entries go stale.
+    """
+    repository = payload.get("repository") or {}
+    full_name = repository.get("full_name")
+    if not full_name:
+        return {"message": "Repository event without a repository, ignored"}
+    owner = (repository.get("owner") or {}).get("login")
+    changes = payload.get("changes") or {}
+
+    # (full name, owner) pairs the repository is or was known by
+    names = [(full_name, owner)]
+    old_name = ((changes.get("repository") or {}).get("name") or {}).get("from")
+    if old_name and owner:
+        names.append((f"{owner}/{old_name}", owner))
+    old_owner = (changes.get("owner") or {}).get("from") or {}
+    old_owner_login = (old_owner.get("user") or old_owner.get("organization") or {}).get("login")
+    if old_owner_login:
+        names.append((f"{old_owner_login}/{repository.get('name')}", old_owner_login))
+
+    for name, login in names:
+        repo_list_cache.invalidate_repository(name, login)
+    # The repository may have been a fork, or the parent of forks that now point elsewhere
+    # GitHub names are case-insensitive; parents are stored as GitHub spelled them
+    full_names = [name.lower() for name, _ in names]
+    db.execute(delete(ForkParent).where(
+        ForkParent.fork_full_name.in_(full_names)
+        | func.lower(ForkParent.parent_full_name).in_(full_names)
+    ))
+
+    return {"message": f"Invalidated cached repository lists for {payload.get('action')} {full_name}"}
+
+def handle_fork_event(payload: dict, db: Session) -> dict:
+    """Record the new fork's parent so the next all-issues sweep does not have to look it up"""
+    forkee = payload.get("forkee") or {}
+    repository = payload.get("repository") or {}
+    if not forkee.get("full_name") or not repository.get("full_name"):
+        return {"message": "Fork event without repositories, ignored"}
+
+    insert = dialect_insert(db)
+    stmt = insert(ForkParent).values(
+        fork_full_name=forkee["full_name"].lower(),
+        parent_full_name=repository["full_name"],
+        parent_name=repository.get("name"),
+        resolved_at=datetime.now()
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["fork_full_name"],
+        set_={
+            "parent_full_name": stmt.excluded.parent_full_name,
+            "parent_name": stmt.excluded.parent_name,
+            "resolved_at": stmt.excluded.resolved_at,
+        }
+    ))
+    return {"message": f"Recorded {forkee['full_name']} as a fork of {repository['full_name']}"}
+
+def extract_issues_event(payload: dict) -> dict:
+    """
+    Project an issues payload down to the fields handle_issues_event reads.
+
+    Full payloads embed repository, sender and user objects that are never
+    used; dropping them right after parsing keeps merged batches small.
+    """
+    issue = payload.get("issue") or {}
+    repository = payload.get("repository") or {}
+    return {
+        "action": payload.get("action"),
+        "issue": {
+            "id": issue.get("id"),
+            "number": issue.get("number"),
+            "title": issue.get("title"),
+            "state": issue.get("state"),
+            "html_url": issue.get("html_url"),
+            "body": issue.get("body"),
+            "created_at": issue.get("created_at"),
+            "labels": [{"name": label.get("name")} for label in issue.get("labels") or []],
+        },
+        "repository": {"full_name": repository.get("full_name")},
+    }
+
+def parse_event_payload(event_type: str, payload_body: bytes) -> dict:
+    payload = json_loads(payload_body)
+    if event_type == "issues":
+        return extract_issues_event(payload)
+    return payload
+
+class ClaimedEvent(NamedTuple):
+    """The columns draining needs, read before the claim commits so nothing is re-selected after it"""
+    id: int
+    event_type: str
+    payload: bytes
+    attempts: int
+
+def _claim_batch(db: Session, batch_size: int) -> list:
+    now = datetime.now()
+    claimable = (WebhookEvent.status == "pending") | (
+        (WebhookEvent.status == "processing") & (WebhookEvent.claimed_at < now - WEBHOOK_CLAIM_TIMEOUT)
+    )
+    # SKIP LOCKED lets several workers drain the outbox without double-claiming
+    rows = db.execute(
+        select(WebhookEvent.id, WebhookEvent.event_type, WebhookEvent.payload, WebhookEvent.attempts)
+        .where(claimable)
+        .order_by(WebhookEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if rows:
+        db.execute(
+            update(WebhookEvent)
+            .where(WebhookEvent.id.in_([row.id for row in rows]))
+            .values(status="processing", claimed_at=now, attempts=WebhookEvent.attempts + 1)
+        )
+    db.commit()
+    return [ClaimedEvent(row.id, row.event_type, row.payload, row.attempts + 1) for row in rows]
+
+def _coalesce(events: list) -> tuple:
+    """
+    Split a claimed batch into the events to apply and the ones superseded.
+
+    Every issues payload carries the full issue snapshot, so only the newest
+    relevant event per issue needs to be applied.
+    """
+    latest_by_issue = {}
+    to_apply = []
+    for event in events:
+        payload = parse_event_payload(event.event_type, event.payload)
+        if event.event_type == "issues" and payload.get("action") in ISSUE_ACTIONS:
+            issue_id = (payload.get("issue") or {}).get("id")
+            latest_by_issue[issue_id] = (event, payload)
+        else:
+            to_apply.append((event, payload))
+    to_apply.extend(latest_by_issue.values())
+    to_apply.sort(key=lambda item: item[0].id)
+    applied_ids = {event.id for event, _ in to_apply}
+    superseded = [event for event in events if event.id not in applied_ids]
+    return to_apply, superseded
+
+def _apply_event(db: Session, event_type: str, payload: dict):
+    if event_type == "issues":
+        handle_issues_event(payload, db)
+    elif event_type == "repository":
+        handle_repository_event(payload, db)
+    elif event_type == "fork":
+        handle_fork_event(payload, db)
+    # Add more event handlers as needed
+
+def drain_webhook_events(batch_size: int = WEBHOOK_BATCH_SIZE) -> int:
+    """Claim, merge and apply one batch of outbox events. Returns the number claimed."""
+    db = SessionLocal()
+    try:
+        events = _claim_batch(db, batch_size)
+        if not events:
+            return 0
+
+        event_ids = [event.id for event in events]
+        try:
+            to_apply, superseded = _coalesce(events)
+            for event, payload in to_apply:
+                _apply_event(db, event.event_type, payload)
+            db.execute(
+                update(WebhookEvent)
+                .where(WebhookEvent.id.in_(event_ids))
+                .values(status="processed", processed_at=datetime.now(), error=None)
+            )
+            db.commit()
+            if superseded:
+                logger.info(f"Merged {len(superseded)} superseded webhook events")
+            return len(events)
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to apply webhook batch, retrying events one by one")
+
+        # Isolate the poison event(s) so the rest of the batch still lands
+        for event in events:
+            try:
+                _apply_event(db, event.event_type, parse_event_payload(event.event_type, event.payload))
+                db.execute(
+                    update(WebhookEvent)
+                    .where(WebhookEvent.id == event.id)
+                    .values(status="processed", processed_at=datetime.now(), error=None)
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                db.execute(
+                    update(WebhookEvent)
+                    .where(WebhookEvent.id == event.id)
+                    .values(status="failed" if event.attempts >= WEBHOOK_MAX_ATTEMPTS else "pending", error=str(e))
+                )
+                db.commit()
+        return len(events)
+    finally:
+        db.close()
+
+def replay_webhook_events(db: Session, delivery_ids: Optional[list] = None, since: Optional[datetime] = None,
+                          status: Optional[str] = None) -> int:
+    """Put matching outbox events back into the pending state"""
+    stmt = update(WebhookEvent).values(status="pending", attempts=0, error=None, claimed_at=None)
+    if delivery_ids:
+        stmt = stmt.where(WebhookEvent.delivery_id.in_(delivery_ids))
+    if since:
+        stmt = stmt.where(WebhookEvent.received_at >= since)
+    if status:
+        stmt = stmt.where(WebhookEvent.status == status)
+    result = db.execute(stmt)
+    db.commit()
+    return result.rowcount
+
+def prune_webhook_events(db: Session, older_than: timedelta) -> int:
+    """Drop processed outbox rows past the replay retention window"""
+    result = db.execute(
+        delete(WebhookEvent).where(
+            WebhookEvent.status == "processed",
+            WebhookEvent.processed_at < datetime.now() - older_than
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+class WebhookConsumer:
+    """Background task that drains the outbox in batches off the request path"""
+
+    def __init__(self, batch_size: int = WEBHOOK_BATCH_SIZE, poll_interval: float = WEBHOOK_POLL_INTERVAL):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._wakeup = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def notify(self):
+        """Wake the consumer early; new deliveries still get picked up by polling otherwise"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # Keep draining while full batches come back
+                while await asyncio.to_thread(drain_webhook_events, self.batch_size) >= self.batch_size:
+                    pass
+            except Exception:
+                logger.exception("Webhook consumer failed to drain the outbox")
+
+webhook_consumer = WebhookConsumer()
@@ -0,0 +1,24 @@
+import os
+import shutil
+import tempfile
+import pytest
+
+# Tests write rows with fixed ids, so every session gets its own throwaway database. This runs
+# before any test module imports main or config.db, which read these variables when imported;
+# load_dotenv() never overrides variables that are already set, so .env cannot leak in.
+_database_dir = tempfile.mkdtemp(prefix="automerge-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+for name in ("GITHUB_CLIENT_ID", "GITHUB_CLIENT_SECRET", "GITHUB_REDIRECT_URI"):
+    os.environ[name] = "test"
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Create the schema for the session and throw the database away afterwards"""
+    from config.db import Base, engine
+    import main  # noqa: F401  (imports every model)
+
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    shutil.rmtree(_database_dir, ignore_errors=True)
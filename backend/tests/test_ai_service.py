@@ -0,0 +1,109 @@
+import json
+import pytest
+from services import fixabilityClassifier
+from services.fixabilityClassifier import Classification, classify, classify_many
+
+def test_classify_reports_matching_rule():
+    assert classify(json.dumps(["bug"]), None) == Classification(True, "label:bug")
+    assert classify(["docs"], "Traceback (most recent call last):") == Classification(True, "text:traceback")
+    assert classify([], "Build FAILED on CI") == Classification(True, "text:failure")
+    assert classify("not json", "Please add dark mode") == Classification(False, None)
+
+def test_classify_reports_leftmost_text_rule():
+    assert classify(None, "Steps to reproduce: run it. Error: boom").rule == "text:reproduction"
+
+def test_overlapping_text_rules_report_the_earliest_match_not_the_first_rule():
+    # "error" and "exception" come first in TEXT_RULES but match later in the text
+    description = "The nightly build failed. Traceback ends in Exception: and error: lines"
+    assert classify([], description).rule == "text:failure"
+    assert classify([], description[len("The nightly build failed. "):]).rule == "text:traceback"
+
+def test_classify_many_matches_single_calls(monkeypatch):
+    monkeypatch.setattr(fixabilityClassifier, "PROCESS_POOL_MIN_ITEMS", 1)
+    items = [(["bug"], None), ([], "exception: x"), ([], "feature request")] * 5
+
+    assert classify_many(items) == [classify(*item) for item in items]
+    assert classify_many(items, processes=2, chunksize=4) == [classify(*item) for item in items]
+
+def test_reclassify_issues_is_incremental():
+    from config.db import SessionLocal
+    from models.issue import Issue
+    from models.user import User
+    from services.aiService import reclassify_issues
+
+    db = SessionLocal()
+    db.add(User(id=301, github_access_token="e"))
+    db.add_all([
+        Issue(github_issue_id=30100 + index, title=f"Issue {index}", repo_full_name="octo/app",
+              description="Traceback here" if index % 2 else "Feature idea", user_id=301)
+        for index in range(5)
+    ])
+    db.commit()
+
+    assert reclassify_issues(db, user_id=301, chunk_size=2) == 2
+    assert reclassify_issues(db, user_id=301, chunk_size=2) == 0
+
+    issue = db.query(Issue).filter(Issue.github_issue_id == 30100).one()
+    issue.description = "Exception: boom"
+    issue.content_hash = None
+    db.commit()
+
+    assert reclassify_issues(db, user_id=301, chunk_size=2) == 1
+    assert db.query(Issue).filter(Issue.user_id == 301, Issue.is_ai_fixable.is_(True)).count() == 3
+    db.close()
+
+def test_reclassify_issues_notices_edited_labels_and_description():
+    from config.db import SessionLocal
+    from models.issue import Issue
+    from models.label import IssueLabel
+    from models.user import User
+    from services.aiService import reclassify_issues
+
+    db = SessionLocal()
+    db.add(User(id=902, github_access_token="g"))
+    issue = Issue(github_issue_id=90200, title="Idea", repo_full_name="octo/app",
+                  description="Feature idea", user_id=902)
+    db.add(issue)
+    db.commit()
+    assert reclassify_issues(db, user_id=902) == 0
+
+    # Edits that arrive without clearing the stored hash
+    db.add(IssueLabel(issue_id=issue.id, name="bug"))
+    db.commit()
+    assert reclassify_issues(db, user_id=902) == 1
+    db.refresh(issue)
+    assert (issue.is_ai_fixable, issue.ai_fixable_reason) == (True, "label:bug")
+
+    db.query(IssueLabel).filter(IssueLabel.issue_id == issue.id).delete()
+    issue.description = "Exception: boom"
+    db.commit()
+    assert reclassify_issues(db, user_id=902) == 1
+    db.refresh(issue)
+    assert (issue.is_ai_fixable, issue.ai_fixable_reason) == (True, "text:exception")
+    assert reclassify_issues(db, user_id=902) == 0
+    db.close()
+
+@pytest.mark.asyncio
+async def test_update_ai_fixable_status_runs_off_the_event_loop(monkeypatch):
+    import threading
+    from config.db import AsyncSessionLocal
+    from models.issue import Issue
+    from models.user import User
+    from services import aiService
+
+    async with AsyncSessionLocal() as db:
+        db.add(User(id=302, github_access_token="f"))
+        db.add(Issue(github_issue_id=30200, title="Crash", repo_full_name="octo/app",
+                     description="error: boom", user_id=302))
+        await db.commit()
+
+    threads = []
+    reclassify = aiService.reclassify_issues
+
+    def recording(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return reclassify(*args, **kwargs)
+
+    monkeypatch.setattr(aiService, "reclassify_issues", recording)
+    assert await aiService.update_ai_fixable_status(302) == 1
+    assert threads and threads[0] != threading.get_ident()
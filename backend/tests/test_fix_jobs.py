@@ -0,0 +1,212 @@
+import asyncio
+import subprocess
+import httpx
+import pytest
+import pytest_asyncio
+from collections import Counter
+from main import app
+from config.db import SessionLocal
+from models.fix import Fix
+from models.issue import Issue
+from models.user import User
+from services import fixJobs
+from services.codeContext import CodeContext
+from services.fixBackends import StubBackend
+from services.fixJobs import FIX_MAX_ATTEMPTS, fix_worker_pool
+
+def seed(user_id, titles, is_ai_fixable=True, description=None):
+    db = SessionLocal()
+    if db.get(User, user_id) is None:
+        db.add(User(id=user_id, github_access_token=f"fix-{user_id}"))
+        db.flush()
+    first = db.query(Issue).filter(Issue.user_id == user_id).count()
+    issues = [
+        Issue(github_issue_id=user_id * 100 + first + index, title=title, repo_full_name="fixes/app",
+              description=description, is_ai_fixable=is_ai_fixable, state="open", user_id=user_id)
+        for index, title in enumerate(titles)
+    ]
+    db.add_all(issues)
+    db.commit()
+    ids = [issue.id for issue in issues]
+    db.close()
+    return ids
+
+class GatedBackend(StubBackend):
+    """Stub backend whose generations block until released, recording how many overlap"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+        self.running = Counter()
+        self.max_running = Counter()
+
+    async def generate(self, request):
+        user = request.github_issue_id // 100
+        self.running[user] += 1
+        self.running["all"] += 1
+        for key in (user, "all"):
+            self.max_running[key] = max(self.max_running[key], self.running[key])
+        try:
+            await self.release.wait()
+            return await super().generate(request)
+        finally:
+            self.running[user] -= 1
+            self.running["all"] -= 1
+
+@pytest_asyncio.fixture
+async def pool():
+    settings = (fix_worker_pool.workers, fix_worker_pool.per_user, fix_worker_pool.backend)
+    fix_worker_pool.poll_interval = 0.05
+
+    def start(workers, per_user, backend):
+        fix_worker_pool.workers, fix_worker_pool.per_user, fix_worker_pool.backend = workers, per_user, backend
+        fix_worker_pool.start()
+
+    yield start
+    await fix_worker_pool.stop()
+    fix_worker_pool.workers, fix_worker_pool.per_user, fix_worker_pool.backend = settings
+
+@pytest_asyncio.fixture
+async def client():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+async def wait_until_finished(client, user_id, job_id):
+    for _ in range(50):
+        job = (await client.get(f"/api/issues/fix-jobs/{job_id}", params={"user_id": user_id, "wait": 2})).json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+    raise AssertionError(f"Fix job {job_id} did not finish")
+
+@pytest.mark.asyncio
+async def test_generate_fix_collapses_requests_and_long_polls(pool, client):
+    issue_id, = seed(701, ["Crash on save"])
+    other_id, = seed(701, ["Dark mode"], is_ai_fixable=False)
+    pool(2, 2, StubBackend(0.2))
+
+    first = await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": 701})
+    second = await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": 701})
+    assert first.status_code == second.status_code == 202
+    assert first.json()["id"] == second.json()["id"]
+
+    assert (await client.post(f"/api/issues/issues/{other_id}/generate-fix", params={"user_id": 701})).status_code == 400
+    assert (await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": 702})).status_code == 404
+    assert (await client.get(f"/api/issues/fix-jobs/{first.json()['id']}", params={"user_id": 702})).status_code == 404
+
+    # A long-poll returns on the first change instead of waiting out its timeout
+    started = asyncio.get_running_loop().time()
+    polled = await client.get(f"/api/issues/fix-jobs/{first.json()['id']}", params={"user_id": 701, "wait": 30})
+    assert asyncio.get_running_loop().time() - started < 5
+    assert polled.json()["status"] in ("running", "succeeded")
+
+    job = await wait_until_finished(client, 701, first.json()["id"])
+    assert (job["status"], job["progress"], job["attempts"]) == ("succeeded", "done", 1)
+    db = SessionLocal()
+    fix = db.get(Fix, job["fix_id"])
+    assert (fix.issue_id, fix.status) == (issue_id, "pending")
+    assert fix.content.startswith("# Stub fix for fixes/app#70100")
+    db.close()
+
+    # Once the job finished, the next request queues a new one
+    again = await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": 701})
+    assert again.json()["id"] != first.json()["id"]
+    await wait_until_finished(client, 701, again.json()["id"])
+
+@pytest.mark.asyncio
+async def test_pool_respects_global_and_per_user_caps(pool, client):
+    issue_ids = {user_id: seed(user_id, [f"Bug {index}" for index in range(4)]) for user_id in (703, 704)}
+    backend = GatedBackend()
+    pool(3, 2, backend)
+
+    jobs = []
+    for user_id, ids in issue_ids.items():
+        for issue_id in ids:
+            response = await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": user_id})
+            jobs.append((user_id, response.json()["id"]))
+
+    for _ in range(200):
+        if backend.running["all"] == 3:
+            break
+        await asyncio.sleep(0.05)
+    # Idle workers keep polling, but no fourth job may start while three are running
+    await asyncio.sleep(0.5)
+    assert backend.running["all"] == 3
+    assert sorted([backend.running[703], backend.running[704]]) == [1, 2]
+
+    backend.release.set()
+    finished = await asyncio.gather(*(wait_until_finished(client, user_id, job_id) for user_id, job_id in jobs))
+    assert [job["status"] for job in finished] == ["succeeded"] * 8
+    assert backend.max_running["all"] == 3
+    assert max(backend.max_running[703], backend.max_running[704]) == 2
+
+@pytest.mark.asyncio
+async def test_failing_generation_is_retried_then_failed(pool, client, monkeypatch):
+    monkeypatch.setattr(fixJobs, "FIX_RETRY_BACKOFF", 0.2)
+    issue_id, = seed(705, ["[stub-fail] Broken build"])
+    pool(1, 1, StubBackend())
+
+    started = asyncio.get_running_loop().time()
+    response = await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": 705})
+    job = await wait_until_finished(client, 705, response.json()["id"])
+    assert (job["status"], job["attempts"], job["fix_id"]) == ("failed", FIX_MAX_ATTEMPTS, None)
+    assert "refused" in job["error"]
+    # Each retry waits twice as long as the one before
+    assert asyncio.get_running_loop().time() - started >= sum(0.2 * 2 ** attempt for attempt in range(FIX_MAX_ATTEMPTS - 1))
+
+@pytest.mark.asyncio
+async def test_generation_reads_repository_code(pool, client, tmp_path, monkeypatch):
+    repo = tmp_path / "remotes" / "fixes" / "app"
+    repo.mkdir(parents=True)
+    (repo / "store.py").write_text("def save_document(doc):\n    return doc\n")
+    for args in (["init", "-q"], ["add", "-A"], ["commit", "-qm", "Initial commit"]):
+        subprocess.run(["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+                       cwd=repo, check=True, capture_output=True)
+    context = CodeContext(str(tmp_path / "cache"), f"file://{tmp_path}/remotes/{{repo_full_name}}")
+    monkeypatch.setattr(fixJobs, "code_context", context)
+    issue_id, = seed(706, ["`save_document` drops fields"])
+    pool(1, 1, StubBackend())
+
+    response = await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": 706})
+    job = await wait_until_finished(client, 706, response.json()["id"])
+    db = SessionLocal()
+    assert "# context - store.py:1-2 (defines save_document)" in db.get(Fix, job["fix_id"]).content
+    db.close()
+
+@pytest.mark.asyncio
+async def test_duplicates_reuse_the_generated_fix(pool, client):
+    trace = ("Exporting the monthly report to CSV fails for accounts created before the migration.\n\n"
+             'Traceback (most recent call last):\n  File "/srv/app/export.py", line {line}, in export_csv\n'
+             "KeyError: 'created_at' while exporting the report of account {account}")
+    first_id, second_id = seed(707, ["Export crashes", "Export crashes again"], description=trace.format(line=42, account=7))
+    third_id, = seed(707, ["Export crashes"], description=trace.format(line=57, account=912))
+    pool(1, 1, StubBackend())
+
+    response = await client.post(f"/api/issues/issues/{first_id}/generate-fix", params={"user_id": 707})
+    generated = await wait_until_finished(client, 707, response.json()["id"])
+    reused = []
+    for issue_id in (second_id, third_id):
+        response = await client.post(f"/api/issues/issues/{issue_id}/generate-fix", params={"user_id": 707})
+        reused.append(await wait_until_finished(client, 707, response.json()["id"]))
+    assert fix_worker_pool.stats()["reused"] >= 2
+
+    db = SessionLocal()
+    source = db.get(Fix, generated["fix_id"])
+    assert source.reused_from_id is None
+    header = source.content.split("\n", 3)
+    for job, issue_id in zip(reused, (second_id, third_id)):
+        fix = db.get(Fix, job["fix_id"])
+        issue = db.get(Issue, issue_id)
+        assert (fix.issue_id, fix.reused_from_id) == (issue_id, source.id)
+        # Only the body is shared; the header names the duplicate itself
+        assert fix.content.startswith(f"# Stub fix for fixes/app#{issue.github_issue_id}\n# {issue.title}\n")
+        assert fix.content.split("\n", 3)[3] == header[3]
+    db.close()
+
+    # Asking again for an issue that has a fix generates a fresh one
+    response = await client.post(f"/api/issues/issues/{second_id}/generate-fix", params={"user_id": 707})
+    job = await wait_until_finished(client, 707, response.json()["id"])
+    db = SessionLocal()
+    fix = db.get(Fix, job["fix_id"])
+    assert fix.reused_from_id is None
+    assert fix.content.startswith("# Stub fix for fixes/app#70701")
+    db.close()
@@ -0,0 +1,71 @@
+import pytest
+import httpx
+from benchmarks.github_stub import StubGitHub, create_app
+from config.db import SessionLocal
+from models.repository import ForkParent
+from services import githubGraphQL, githubService
+from services.githubClient import GitHubClient
+from services.githubGraphQL import RepoQuery, build_query, graphql_costs
+
+def stub_github():
+    # Start without cached fork parents so lookups are counted
+    db = SessionLocal()
+    db.query(ForkParent).filter(ForkParent.fork_full_name.in_(["me/app", "me/lib"])).delete()
+    db.commit()
+    db.close()
+    stub = StubGitHub([], {})
+    stub.add_repository("up/app", listed=False, issues=5)
+    stub.add_repository("me/app", fork=True, parent="up/app", issues=1)
+    stub.add_repository("me/lib", fork=True, parent="up/app")
+    stub.add_repository("me/tool", issues=3)
+    return stub
+
+def use_stub(monkeypatch, stub):
+    client = GitHubClient(transport=httpx.ASGITransport(app=create_app(stub)))
+    monkeypatch.setattr(githubService, "get_github_client", lambda: client)
+    return client
+
+def test_query_passes_repository_names_as_variables():
+    query, variables = build_query([RepoQuery('evil/repo") { id }', "abc", True, True)])
+    assert "evil" not in query
+    assert variables["o0"] == "evil"
+    assert variables["c0"] == "abc"
+    assert "r0: repository(owner: $o0, name: $n0)" in query
+
+@pytest.mark.asyncio
+async def test_graphql_mode_matches_rest_mode(monkeypatch):
+    monkeypatch.setattr(githubGraphQL, "GITHUB_GRAPHQL_ISSUES_PER_PAGE", 2)
+    monkeypatch.setattr(githubGraphQL, "GITHUB_GRAPHQL_REPOS_PER_QUERY", 2)
+    stub = stub_github()
+    client = use_stub(monkeypatch, stub)
+
+    rest = await githubService.get_all_user_issues("fake_token", mode="rest")
+    rest_requests = stub.requests["rest"]
+    stub.reset()
+    queries = graphql_costs.queries
+    graphql = await githubService.get_all_user_issues("fake_token", mode="graphql")
+
+    assert graphql == rest
+    assert [issue["repository"]["full_name"] for issue in graphql][:3] == ["me/app", "up/app", "up/app"]
+    # REST: repo list, 3 issue lists, 2 fork lookups, 1 parent issue list.
+    # GraphQL: repo list, then 3 repos in 2 batches, me/tool's 2nd page, the parent's 3 pages
+    assert rest_requests == 7
+    assert stub.requests == {"rest": 1, "graphql": 6}
+    assert graphql_costs.queries == queries + 6
+    assert graphql_costs.cost >= stub.graphql_cost
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_missing_repositories_only_fail_their_alias(monkeypatch):
+    stub = stub_github()
+    client = use_stub(monkeypatch, stub)
+
+    fetched = await githubGraphQL.fetch_repositories(client, "fake_token", ["me/tool", "gone/repo"], parents_for=["me/tool"])
+
+    assert [issue["number"] for issue in fetched["me/tool"]["issues"]] == [3, 2, 1]
+    assert fetched["me/tool"]["parent"] is None
+    assert fetched["gone/repo"] == {"issues": [], "parent": None, "found": False}
+
+    sources = await githubService.get_issue_sources("fake_token", stub.repos, mode="graphql")
+    assert [source["full_name"] for source in sources] == ["me/app", "up/app", "me/lib", "me/tool"]
+    await client.aclose()
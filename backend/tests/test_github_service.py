@@ -1,29 +1,305 @@
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+import httpx
+from fastapi.testclient import TestClient
+from main import app
+from benchmarks.github_stub import StubGitHub, create_app
+from services import githubService
+from services.githubClient import GitHubClient
 from services.githubService import get_user_repos
 
+def make_client(handler, **kwargs):
+    return GitHubClient(transport=httpx.MockTransport(handler), **kwargs)
+
+@pytest.mark.asyncio
+async def test_get_user_repos(monkeypatch):
+    # Serve canned GitHub responses from a mock transport
+    def handler(request):
+        assert request.headers["Authorization"] == "Bearer fake_token"
+        if request.url.path == "/user/repos":
+            return httpx.Response(200, json=[{"name": "repo1"}, {"name": "repo2"}])
+        return httpx.Response(200, json={"login": "testuser"})
+
+    client = make_client(handler)
+    monkeypatch.setattr(githubService, "get_github_client", lambda: client)
+
+    # Call the function
+    result = await get_user_repos("fake_token")
+
+    # Check the result
+    assert result["username"] == "testuser"
+    assert len(result["repos"]) == 2
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_client_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr("services.githubClient.RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        if len(calls) == 2:
+            return httpx.Response(502)
+        return httpx.Response(200, json={"login": "testuser"})
+
+    client = make_client(handler, max_retries=2)
+    response = await client.get("/user", "fake_token")
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_client_does_not_retry_post_after_send(monkeypatch):
+    monkeypatch.setattr("services.githubClient.RETRY_BACKOFF_SECONDS", 0)
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(502)
+
+    client = make_client(handler, max_retries=2)
+    response = await client.post("https://github.com/login/oauth/access_token", data={"code": "abc"})
+
+    assert response.status_code == 502
+    assert len(calls) == 1
+    await client.aclose()
+
 @pytest.mark.asyncio
-async def test_get_user_repos():
-    # Mock the requests.get call
-    with patch('requests.get') as mock_get:
-        # Set up mock responses
-        mock_user_response = MagicMock()
-        mock_user_response.json.return_value = {"login": "testuser"}
-        
-        mock_repo_response = MagicMock()
-        mock_repo_response.json.return_value = [{"name": "repo1"}, {"name": "repo2"}]
-        
-        # Set up side effect
-        def side_effect(url, headers):
-            if 'user/repos' in url:
-                return mock_repo_response
-            return mock_user_response
-            
-        mock_get.side_effect = side_effect
-        
-        # Call the function
-        result = await get_user_repos("fake_token")
-        
-        # Check the result
-        assert result["username"] == "testuser"
-        assert len(result["repos"]) == 2
\ No newline at end of file
+async def test_get_all_user_issues_order_and_dedup(monkeypatch):
+    import asyncio
+    in_flight = {"now": 0, "max": 0}
+    repos = [
+        {"name": "app", "full_name": "me/app", "fork": True},
+        {"name": "lib", "full_name": "me/lib", "fork": True},
+        {"name": "tool", "full_name": "me/tool", "fork": False},
+    ]
+    parents = {"/repos/me/app": "up/app", "/repos/me/lib": "up/app"}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        try:
+            await asyncio.sleep(0.01)
+            path = request.url.path
+            if path == "/user/repos":
+                return httpx.Response(200, json=repos)
+            if path in parents:
+                parent = parents[path]
+                return httpx.Response(200, json={"parent": {"name": parent.split("/")[1], "full_name": parent}})
+            repo = path[len("/repos/"):-len("/issues")]
+            return httpx.Response(200, json=[{"id": hash(repo), "title": repo, "number": 1}])
+        finally:
+            in_flight["now"] -= 1
+
+    client = make_client(handler, per_user_concurrency=2)
+    monkeypatch.setattr(githubService, "get_github_client", lambda: client)
+
+    issues = await githubService.get_all_user_issues("fake_token")
+
+    # Parent issues follow the first fork that references them; the duplicate parent is skipped
+    assert [issue["repository"]["full_name"] for issue in issues] == ["me/app", "up/app", "me/lib", "me/tool"]
+    assert issues[1]["repository"]["is_parent_of_fork"] is True
+    assert in_flight["max"] == 2
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_iter_repo_issues_follows_link_header(monkeypatch):
+    import asyncio
+    requested = []
+
+    async def handler(request):
+        page = int(request.url.params["page"])
+        requested.append(page)
+        headers = {}
+        if page == 1:
+            headers["Link"] = (
+                '<https://api.github.com/repositories/1/issues?page=2&per_page=100>; rel="next", '
+                '<https://api.github.com/repositories/1/issues?page=3&per_page=100>; rel="last"'
+            )
+        # Later pages finish first to prove results stay in page order
+        await asyncio.sleep(0.03 if page == 2 else 0)
+        return httpx.Response(200, json=[{"id": page * 10 + i} for i in range(2)], headers=headers)
+
+    client = make_client(handler)
+    monkeypatch.setattr(githubService, "get_github_client", lambda: client)
+
+    issues = [issue async for issue in githubService.iter_repo_issues("fake_token", "me/app")]
+
+    assert [issue["id"] for issue in issues] == [10, 11, 20, 21, 30, 31]
+    assert sorted(requested) == [1, 2, 3]
+    assert await githubService.get_repo_issues("fake_token", "me/app", all_pages=True) == issues
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_client_revalidates_cached_responses():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=[{"id": 1}], headers={"ETag": '"v1"', "Link": '<x?page=2>; rel="next"'})
+
+    client = make_client(handler)
+    first = await client.get("/repos/me/app/issues", "fake_token", params={"page": 1})
+    second = await client.get("/repos/me/app/issues", "fake_token", params={"page": 1})
+    other_user = await client.get("/repos/me/app/issues", "other_token", params={"page": 1})
+
+    assert seen == [None, '"v1"', None]
+    assert second.status_code == 200
+    assert second.json() == first.json() == other_user.json()
+    assert second.links["next"]["url"] == "x?page=2"
+    stats = client.cache.stats()
+    assert (stats["hits"], stats["misses"], stats["revalidations"]) == (1, 2, 1)
+    await client.aclose()
+
+def test_response_cache_evicts_least_recently_used():
+    from services.githubCache import ResponseCache
+    cache = ResponseCache(max_entries=2)
+    request = httpx.Request("GET", "https://api.github.com/x")
+    for name in ("a", "b"):
+        cache.store(cache.key("t", name), httpx.Response(200, content=b"{}", headers={"ETag": name}, request=request))
+
+    cache.get(cache.key("t", "a"))
+    cache.store(cache.key("t", "c"), httpx.Response(200, content=b"{}", headers={"ETag": "c"}, request=request))
+
+    assert cache.get(cache.key("t", "b")) is None
+    assert cache.get(cache.key("t", "a")) is not None
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_priority_semaphore_serves_interactive_first():
+    import asyncio
+    from services.githubRateLimit import PrioritySemaphore, INTERACTIVE, BULK
+    semaphore = PrioritySemaphore(1)
+    await semaphore.acquire(BULK)
+    order = []
+
+    async def worker(name, priority):
+        await semaphore.acquire(priority)
+        order.append(name)
+        semaphore.release()
+
+    tasks = [asyncio.create_task(worker("bulk", BULK)), asyncio.create_task(worker("interactive", INTERACTIVE))]
+    await asyncio.sleep(0)
+    semaphore.release()
+    await asyncio.gather(*tasks)
+
+    assert order == ["interactive", "bulk"]
+
+@pytest.mark.asyncio
+async def test_client_backs_off_on_secondary_rate_limit():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(403, headers={"Retry-After": "0"}, json={"message": "You have exceeded a secondary rate limit"})
+        return httpx.Response(200, json={"login": "testuser"}, headers={"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"})
+
+    client = make_client(handler)
+    response = await client.get("/user", "fake_token")
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert client.rate_limiter.snapshot("fake_token")["remaining"] == 4999
+    assert client.rate_limiter.stats()["secondary_limits"] == 1
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_exhausted_budget_rejects_bulk_with_429():
+    import time
+    from services.githubRateLimit import GitHubRateLimitError, bulk_priority
+
+    def handler(request):
+        return httpx.Response(200, json=[], headers={
+            "X-RateLimit-Remaining": "10",
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Reset": str(int(time.time()) + 600),
+        })
+
+    client = make_client(handler)
+    await client.get("/user/repos", "fake_token")
+
+    # Interactive calls may dip into the reserve, bulk sweeps may not
+    await client.get("/user/repos", "fake_token", use_cache=False)
+    with bulk_priority():
+        with pytest.raises(GitHubRateLimitError) as excinfo:
+            await client.get("/user/repos", "fake_token", use_cache=False)
+    assert excinfo.value.status_code == 429
+    assert int(excinfo.value.headers["Retry-After"]) > 500
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_fork_parents_are_cached_until_invalidated(monkeypatch):
+    from services.webhookService import drain_webhook_events
+
+    stub = StubGitHub([], {})
+    stub.add_repository("fp-up/app", listed=False)
+    stub.add_repository("fp-me/app", fork=True, parent="fp-up/app")
+    stub.add_repository("fp-me/tool")
+    client = GitHubClient(transport=httpx.ASGITransport(app=create_app(stub)))
+    monkeypatch.setattr(githubService, "get_github_client", lambda: client)
+
+    sources = await githubService.get_issue_sources("fake_token", stub.repos)
+    assert [source["full_name"] for source in sources] == ["fp-me/app", "fp-up/app", "fp-me/tool"]
+    assert stub.requests["rest"] == 1
+
+    # Repeat sweeps resolve the parent from fork_parents
+    stub.reset()
+    assert await githubService.get_issue_sources("fake_token", stub.repos) == sources
+    assert stub.requests["rest"] == 0
+
+    webhook = TestClient(app)
+    renamed = {
+        "action": "renamed",
+        "repository": {"name": "app", "full_name": "fp-up/app", "owner": {"login": "fp-up"}},
+        "changes": {"repository": {"name": {"from": "application"}}},
+    }
+    forked = {
+        "forkee": {"name": "app", "full_name": "fp-other/app"},
+        "repository": {"name": "app", "full_name": "fp-up/app"},
+    }
+    assert webhook.post("/api/webhook/github", headers={"X-GitHub-Event": "repository"}, json=renamed).status_code == 200
+    assert webhook.post("/api/webhook/github", headers={"X-GitHub-Event": "fork"}, json=forked).status_code == 200
+    assert drain_webhook_events() == 2
+
+    assert await githubService.get_issue_sources("fake_token", stub.repos) == sources
+    assert stub.requests["rest"] == 1
+    stub.reset()
+    assert await githubService.resolve_fork_parents("fake_token", ["fp-other/app"]) == {
+        "fp-other/app": {"name": "app", "full_name": "fp-up/app"}
+    }
+    assert stub.requests["rest"] == 0
+    await client.aclose()
+
+@pytest.mark.asyncio
+async def test_failed_parent_lookup_stops_repo_fetches(monkeypatch):
+    from services.githubRateLimit import GitHubRateLimitError
+    started, cancelled = asyncio.Event(), []
+
+    async def repositories(*args, **kwargs):
+        return [{"full_name": "rl-me/app", "fork": True}, {"full_name": "rl-me/tool"}]
+
+    async def repo_issues(access_token, repo_full_name, **kwargs):
+        started.set()
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            cancelled.append(repo_full_name)
+            raise
+
+    async def parents(*args, **kwargs):
+        await started.wait()
+        raise GitHubRateLimitError(5)
+
+    monkeypatch.setattr(githubService, "get_user_repositories", repositories)
+    monkeypatch.setattr(githubService, "get_repo_issues", repo_issues)
+    monkeypatch.setattr(githubService, "resolve_fork_parents", parents)
+
+    with pytest.raises(GitHubRateLimitError):
+        await githubService._collect_all_user_issues("fake_token", include_forked_sources=True)
+    assert sorted(cancelled) == ["rl-me/app", "rl-me/tool"]
@@ -0,0 +1,91 @@
+from fastapi.testclient import TestClient
+from main import app
+from config.db import SessionLocal
+from models.fingerprint import IssueLshBand
+from models.issue import Issue
+from models.repository import TrackedRepository
+from models.user import User
+from services.issueClusters import cluster_issues
+from services.issueFingerprint import FINGERPRINT_BANDS, band_buckets, issue_minhash, normalize, similarity
+from services.webhookService import handle_issues_event
+
+client = TestClient(app)
+
+TRACE = '''Uploading a large file fails:
+
+Traceback (most recent call last):
+  File "{root}/app/storage.py", line {line}, in save_document
+  File "{root}/app/blobs.py", line 11, in write_blob
+app.blobs.QuotaExceededError: Storage quota exceeded for bucket 'uploads' (object at {address}, request {request})
+'''
+
+def report(root="/srv/deploy", line=5, address="0x7f3a9c2e1d80", request="3f2a9c1b7e"):
+    return TRACE.format(root=root, line=line, address=address, request=request)
+
+UNRELATED = "The toolbar renders twice after switching themes, and the second copy ignores clicks on every button."
+
+def issues_event(github_issue_id, body, repo="dups/app", action="opened"):
+    return {
+        "action": action,
+        "issue": {"id": github_issue_id, "number": github_issue_id % 100, "title": "Upload fails", "state": "open",
+                  "html_url": f"https://github.com/{repo}/issues/{github_issue_id % 100}", "body": body, "labels": []},
+        "repository": {"full_name": repo},
+    }
+
+def test_normalize_strips_what_varies_between_reports():
+    first = report()
+    second = report(root="C:\\Users\\dev\\src", line=17, address="0x55d0c0ffee00", request="a81c0d2e44")
+    assert normalize(first) == normalize(second)
+    assert "storage py line in save_document" in normalize(first)
+    assert similarity(issue_minhash("Upload fails", first), issue_minhash("Upload fails", second)) == 1.0
+    assert similarity(issue_minhash("Upload fails", first), issue_minhash("Upload fails", UNRELATED)) < 0.2
+    # Too short to tell duplicates apart: never clustered
+    assert issue_minhash("Crash", "It crashes") == b""
+    assert band_buckets("dups/app", issue_minhash("Upload fails", first)) != band_buckets("dups/web", issue_minhash("Upload fails", first))
+
+def test_duplicates_cluster_across_reports_and_user_copies():
+    db = SessionLocal()
+    db.add_all([User(id=801, github_access_token="c1"), User(id=802, github_access_token="c2")])
+    db.flush()
+    db.add_all([
+        TrackedRepository(user_id=801, repo_full_name="dups/app"),
+        TrackedRepository(user_id=802, repo_full_name="dups/app"),
+        TrackedRepository(user_id=801, repo_full_name="dups/web"),
+    ])
+    db.commit()
+    events = [
+        issues_event(80101, report()),
+        issues_event(80102, report(root="/home/ci/build", line=9)),
+        issues_event(80103, report(address="0x1", request="77aa0011ff") + "\nHappens every time since 2.3.1."),
+        issues_event(80104, UNRELATED),
+        issues_event(80105, report(), repo="dups/web"),
+    ]
+    for event in events:
+        handle_issues_event(event, db)
+    ids = {(row.github_issue_id, row.user_id): row.id for row in db.query(Issue).filter(Issue.github_issue_id.between(80101, 80105))}
+    assert db.query(Issue).filter(Issue.id.in_(ids.values()), Issue.minhash.is_(None)).count() == 0
+
+    # Every copy after the first of each group joins: two copies each of 80101-80104, one of 80105
+    assert cluster_issues(db, ids.values()) == 6
+    clusters = {(row.github_issue_id, row.user_id): row.cluster_id for row in db.query(Issue).filter(Issue.id.in_(ids.values()))}
+    assert {clusters[(n, user_id)] for n in (80101, 80102, 80103) for user_id in (801, 802)} == {ids[(80101, 801)]}
+    assert clusters[(80104, 801)] == clusters[(80104, 802)] == ids[(80104, 801)]
+    assert clusters[(80105, 801)] == ids[(80105, 801)]
+    assert db.query(IssueLshBand).filter(IssueLshBand.issue_id == ids[(80101, 801)]).count() == FINGERPRINT_BANDS
+
+    response = client.get(f"/api/issues/issues/{ids[(80102, 801)]}/cluster", params={"user_id": 801})
+    assert response.status_code == 200
+    assert response.json()["cluster_id"] == ids[(80101, 801)]
+    assert sorted(item["id"] for item in response.json()["items"]) == sorted(ids[(n, 801)] for n in (80101, 80102, 80103))
+    assert client.get(f"/api/issues/issues/{ids[(80102, 801)]}/cluster", params={"user_id": 802}).status_code == 404
+
+    # The issue that names the cluster is rewritten: it moves, and the next-oldest member takes the name over
+    handle_issues_event(issues_event(80101, UNRELATED, action="edited"), db)
+    db.commit()
+    assert db.query(Issue).filter(Issue.github_issue_id == 80101, Issue.cluster_id.is_(None)).count() == 2
+    cluster_issues(db, ids.values())
+    clusters = {(row.github_issue_id, row.user_id): row.cluster_id for row in db.query(Issue).filter(Issue.id.in_(ids.values()))}
+    assert clusters[(80101, 801)] == clusters[(80101, 802)] == ids[(80104, 801)]
+    successor = min(ids[(n, user_id)] for n in (80102, 80103) for user_id in (801, 802))
+    assert {clusters[(n, user_id)] for n in (80102, 80103) for user_id in (801, 802)} == {successor}
+    db.close()
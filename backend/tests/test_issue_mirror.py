@@ -0,0 +1,184 @@
+import pytest
+import httpx
+from fastapi.testclient import TestClient
+from benchmarks.github_stub import StubGitHub, create_app
+from sqlalchemy import select
+from main import app
+from config.db import SessionLocal
+from models.issue import Issue
+from models.repository import RepoSyncState, TrackedRepository
+from models.user import User
+from services import githubGraphQL, githubService, issueMirror
+from services.githubClient import GitHubClient
+from services.issueMirror import sync_repositories, sync_repository
+
+client = TestClient(app)
+
+def github_issue(issue_id, number, updated_at, state="open", **extra):
+    return {
+        "id": issue_id,
+        "number": number,
+        "title": f"Issue {number}",
+        "state": state,
+        "html_url": f"https://github.com/mirror/app/issues/{number}",
+        "body": "Typo in the README",
+        "labels": [{"name": "documentation"}],
+        "created_at": "2026-10-01T09:00:00Z",
+        "updated_at": updated_at,
+        **extra,
+    }
+
+def use_github(monkeypatch, handler):
+    github = GitHubClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(githubService, "get_github_client", lambda: github)
+    return github
+
+@pytest.mark.asyncio
+async def test_sync_pulls_only_updates_since_high_water_mark(monkeypatch):
+    db = SessionLocal()
+    db.add(User(id=601, github_access_token="mirror-601"))
+    db.flush()
+    db.add(TrackedRepository(user_id=601, repo_full_name="mirror/app"))
+    db.commit()
+
+    requests = []
+    pages = [
+        [
+            github_issue(60101, 1, "2026-10-01T10:00:00Z"),
+            github_issue(60102, 2, "2026-10-02T10:00:00Z"),
+            github_issue(60103, 3, "2026-10-02T11:00:00Z", pull_request={"url": "x"}),
+        ],
+        [github_issue(60101, 1, "2026-10-03T10:00:00Z", state="closed")],
+        [],
+    ]
+
+    def handler(request):
+        requests.append(dict(request.url.params))
+        return httpx.Response(200, json=pages[len(requests) - 1])
+
+    github = use_github(monkeypatch, handler)
+
+    assert await sync_repository("mirror-601", "mirror/app") == 2
+    assert "since" not in requests[0]
+    # Seeding only needs the open issues; later passes see them close
+    assert (requests[0]["sort"], requests[0]["direction"], requests[0]["state"]) == ("updated", "asc", "open")
+
+    assert await sync_repository("mirror-601", "mirror/app") == 1
+    assert (requests[1]["since"], requests[1]["state"]) == ("2026-10-02T11:00:00Z", "all")
+    rows = db.execute(select(Issue.number, Issue.state).where(Issue.user_id == 601).order_by(Issue.number)).all()
+    assert [tuple(row) for row in rows] == [(1, "closed"), (2, "open")]
+
+    # A new tracker gets copies of the mirrored issues from the database, not from GitHub
+    db.add(User(id=602, github_access_token="mirror-602"))
+    db.flush()
+    db.add(TrackedRepository(user_id=602, repo_full_name="mirror/app"))
+    db.commit()
+    assert await sync_repository("mirror-601", "mirror/app") == 0
+    assert requests[2]["since"] == "2026-10-03T10:00:00Z"
+    db.expire_all()
+    copies = db.scalars(select(Issue).where(Issue.user_id == 602).order_by(Issue.number)).all()
+    assert [(issue.number, issue.state, issue.labels[:]) for issue in copies] == [
+        (1, "closed", ["documentation"]), (2, "open", ["documentation"])
+    ]
+    assert all(issue.cluster_id is None for issue in copies)
+
+    state = db.get(RepoSyncState, "mirror/app")
+    assert (state.since, state.last_status, state.issues_synced) == ("2026-10-03T10:00:00Z", "succeeded", 3)
+    db.close()
+    await github.aclose()
+
+@pytest.mark.asyncio
+async def test_repository_without_issues_is_seeded_once(monkeypatch):
+    db = SessionLocal()
+    db.add(User(id=604, github_access_token="mirror-604"))
+    db.flush()
+    db.add(TrackedRepository(user_id=604, repo_full_name="mirror/empty"))
+    db.commit()
+    requests = []
+
+    def handler(request):
+        requests.append(dict(request.url.params))
+        return httpx.Response(200, json=[])
+
+    github = use_github(monkeypatch, handler)
+    assert await sync_repository("mirror-604", "mirror/empty") == 0
+    assert await sync_repository("mirror-604", "mirror/empty") == 0
+    # The seed found nothing, so the mark starts at the time it ran
+    assert (requests[0]["state"], "since" in requests[0]) == ("open", False)
+    assert requests[1]["state"] == "all"
+    assert requests[1]["since"] == db.get(RepoSyncState, "mirror/empty").since
+    db.close()
+    await github.aclose()
+
+@pytest.mark.asyncio
+async def test_graphql_mode_syncs_repositories_in_batched_queries(monkeypatch):
+    db = SessionLocal()
+    db.add(User(id=901, github_access_token="mirror-901"))
+    db.flush()
+    names = ["batch/one", "batch/two", "batch/three"]
+    db.add_all([TrackedRepository(user_id=901, repo_full_name=name) for name in names + ["batch/gone"]])
+    db.commit()
+    stub = StubGitHub([], {})
+    for issues, name in enumerate(names, 1):
+        stub.add_repository(name, issues=issues)
+    monkeypatch.setattr(issueMirror, "GITHUB_FETCH_MODE", "graphql")
+    monkeypatch.setattr(githubGraphQL, "GITHUB_GRAPHQL_REPOS_PER_QUERY", 4)
+    monkeypatch.setattr(githubGraphQL, "GITHUB_GRAPHQL_ISSUES_PER_PAGE", 2)
+    github = GitHubClient(transport=httpx.ASGITransport(app=create_app(stub)))
+    monkeypatch.setattr(githubService, "get_github_client", lambda: github)
+
+    # One query for all four repositories, one more for the page batch/three still has
+    assert await sync_repositories("mirror-901", names + ["batch/gone"]) == {"batch/one": 1, "batch/two": 2, "batch/three": 3}
+    assert stub.requests == {"graphql": 2}
+    assert db.query(Issue).filter(Issue.user_id == 901).count() == 6
+    assert db.get(RepoSyncState, "batch/gone").last_status == "failed"
+    assert db.get(RepoSyncState, "batch/three").since == "2026-02-04T10:00:00Z"
+
+    # Incremental pass: one query, only issues updated since each mark
+    stub.reset()
+    stub.issues["batch/two"][0]["updated_at"] = "2026-03-01T10:00:00Z"
+    stub.issues["batch/two"][0]["state"] = "closed"
+    assert await sync_repositories("mirror-901", names) == {"batch/one": 1, "batch/two": 1, "batch/three": 1}
+    assert stub.requests == {"graphql": 1}
+    db.expire_all()
+    assert db.scalar(select(Issue.state).where(Issue.user_id == 901, Issue.repo_full_name == "batch/two", Issue.number == 2)) == "closed"
+    db.close()
+    await github.aclose()
+
+def test_all_issues_are_served_from_mirror(monkeypatch):
+    db = SessionLocal()
+    db.add(User(id=603, github_access_token="mirror-603"))
+    db.commit()
+    db.close()
+    issue_requests = []
+
+    def handler(request):
+        path = request.url.path
+        if path == "/user":
+            return httpx.Response(200, json={"login": "mirror-owner"})
+        if path == "/user/repos":
+            return httpx.Response(200, json=[{"name": "tool", "full_name": "mirror-owner/tool", "fork": False}])
+        issue_requests.append(path)
+        return httpx.Response(200, json=[
+            github_issue(60301, 4, "2026-10-01T10:00:00Z"),
+            github_issue(60302, 5, "2026-10-01T11:00:00Z"),
+            github_issue(60303, 6, "2026-10-01T12:00:00Z", state="closed"),
+        ])
+
+    use_github(monkeypatch, handler)
+
+    first = client.get("/api/github/repos/all-issues", params={"user_id": 603})
+    assert first.status_code == 200
+    assert [issue["number"] for issue in first.json()] == [5, 4]
+    assert first.json()[0]["repository"] == {"name": "tool", "full_name": "mirror-owner/tool", "is_fork": False}
+    assert first.headers["X-Mirror-Stale-Repos"] == "0"
+    assert "X-Mirror-Synced-At" in first.headers
+
+    # Fresh mirror: no GitHub issue requests at all
+    second = client.get("/api/github/repos/all-issues", params={"user_id": 603})
+    assert second.json() == first.json()
+    page = client.get("/api/github/repos/issues", params={
+        "user_id": 603, "repo_owner": "mirror-owner", "repo_name": "tool", "per_page": 1, "page": 2
+    })
+    assert page.json() == [{"id": 60301, "title": "Issue 4", "number": 4}]
+    assert issue_requests == ["/repos/mirror-owner/tool/issues"]
@@ -0,0 +1,133 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from config.db import SessionLocal
+from models.issue import Issue
+from models.user import User
+from api.issues.routes import IssueResponse
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def seeded_user():
+    db = SessionLocal()
+    db.add(User(id=401, github_access_token="g"))
+    db.add_all([
+        Issue(github_issue_id=40100, title="Crash on save", repo_full_name="octo/app",
+              labels=["bug"], is_ai_fixable=True, state="open", user_id=401),
+        Issue(github_issue_id=40101, title="Add dark mode", repo_full_name="octo/web",
+              labels=["enhancement", "debug"], is_ai_fixable=False, state="open", user_id=401),
+    ])
+    db.commit()
+    db.close()
+    return 401
+
+def test_list_issues_filters(seeded_user):
+    response = client.get("/api/issues/issues", params={"user_id": seeded_user, "is_ai_fixable": True})
+    assert response.status_code == 200
+    assert [issue["title"] for issue in response.json()["items"]] == ["Crash on save"]
+    assert response.json()["items"][0]["labels"] == ["bug"]
+
+def test_label_filter_matches_exact_names(seeded_user):
+    response = client.get("/api/issues/issues", params={"user_id": seeded_user, "label": "bug"})
+    assert [issue["title"] for issue in response.json()["items"]] == ["Crash on save"]
+
+    response = client.get("/api/issues/issues", params={"user_id": seeded_user, "label": "debug"})
+    assert [issue["title"] for issue in response.json()["items"]] == ["Add dark mode"]
+    assert response.json()["items"][0]["labels"] == ["debug", "enhancement"]
+
+def test_get_issue_is_scoped_to_user(seeded_user):
+    listed = client.get("/api/issues/issues", params={"user_id": seeded_user}).json()["items"][0]
+    issue_id = listed["id"]
+
+    response = client.get(f"/api/issues/issues/{issue_id}", params={"user_id": seeded_user})
+    assert response.status_code == 200
+    assert response.json() == listed
+    assert set(listed) == set(IssueResponse.model_fields)
+    assert client.get(f"/api/issues/issues/{issue_id}", params={"user_id": 999999}).status_code == 404
+
+def test_issue_filters_use_user_scoped_indexes():
+    from sqlalchemy import select, text
+    from api.issues.routes import filter_issues
+
+    db = SessionLocal()
+    try:
+        query = filter_issues(select(Issue), 401, is_ai_fixable=True)
+        sql = str(query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+        plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+    finally:
+        db.close()
+    assert "ix_issues_user_id_is_ai_fixable" in plan
+
+def test_fulltext_search_ranks_title_and_description_matches():
+    db = SessionLocal()
+    db.add(User(id=402, github_access_token="g"))
+    db.add_all([
+        Issue(github_issue_id=40200, title="Upload fails", repo_full_name="octo/app",
+              description="Saving a large file times out", user_id=402),
+        Issue(github_issue_id=40201, title="Timeout when saving drafts", repo_full_name="octo/app",
+              description="Steps to reproduce attached", user_id=402),
+        Issue(github_issue_id=40202, title="Dark mode", repo_full_name="octo/app", user_id=402),
+    ])
+    db.commit()
+    db.close()
+
+    response = client.get("/api/issues/issues", params={"user_id": 402, "search": "sav", "search_mode": "fulltext"})
+    assert response.status_code == 200
+    # Title hits rank above description hits; "sav" prefix-matches "saving"
+    assert [issue["title"] for issue in response.json()["items"]] == ["Timeout when saving drafts", "Upload fails"]
+
+    response = client.get("/api/issues/issues", params={"user_id": 402, "search": "timeout draft", "search_mode": "fulltext"})
+    assert [issue["title"] for issue in response.json()["items"]] == ["Timeout when saving drafts"]
+
+    db = SessionLocal()
+    issue = db.query(Issue).filter(Issue.github_issue_id == 40202).one()
+    issue.title = "Dark mode drafts"
+    db.commit()
+    db.close()
+    response = client.get("/api/issues/issues", params={"user_id": 402, "search": "drafts", "search_mode": "fulltext"})
+    assert len(response.json()["items"]) == 2
+
+def collect_pages(url, params):
+    items, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        items.extend(response.json()["items"])
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return items
+
+def test_issue_and_fix_listing_pages_by_cursor():
+    from datetime import datetime
+    from models.fix import Fix
+
+    db = SessionLocal()
+    db.add(User(id=403, github_access_token="g"))
+    tied = datetime(2026, 1, 1, 12, 0, 0)
+    issues = [
+        Issue(github_issue_id=40300 + n, title=f"Paged issue {n}", repo_full_name="octo/app",
+              description="flaky upload", user_id=403, updated_at=tied if n < 3 else datetime(2026, 1, n, 9))
+        for n in range(5)
+    ]
+    db.add_all(issues)
+    db.flush()
+    db.add_all([Fix(issue_id=issues[0].id, content=f"fix {n}", updated_at=tied) for n in range(3)])
+    db.commit()
+    issue_id = issues[0].id
+    db.close()
+
+    items = collect_pages("/api/issues/issues", {"user_id": 403, "limit": 2})
+    # updated_at desc, then id desc among the three tied rows
+    assert [item["title"] for item in items] == [
+        "Paged issue 4", "Paged issue 3", "Paged issue 2", "Paged issue 1", "Paged issue 0"
+    ]
+
+    ranked = collect_pages("/api/issues/issues", {"user_id": 403, "limit": 2, "search": "upl", "search_mode": "fulltext"})
+    assert sorted(item["title"] for item in ranked) == sorted(item["title"] for item in items)
+
+    fixes = collect_pages(f"/api/issues/issues/{issue_id}/fixes", {"user_id": 403, "limit": 1})
+    assert [fix["content"] for fix in fixes] == ["fix 2", "fix 1", "fix 0"]
+
+    response = client.get("/api/issues/issues", params={"user_id": 403, "cursor": "not-a-cursor"})
+    assert response.status_code == 400
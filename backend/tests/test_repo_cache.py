@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from services.repoListCache import RepoListCache, repo_list_cache
+from services.webhookService import drain_webhook_events
+
+client = TestClient(app)
+
+def repo_list(username, *names):
+    return {"username": username, "repos": [{"full_name": f"{username}/{name}"} for name in names]}
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_refreshing(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("services.repoListCache.time.monotonic", lambda: now[0])
+    cache = RepoListCache(fresh_ttl=10, max_stale=100)
+    versions = iter([repo_list("octo", "app"), repo_list("octo", "app", "cli")])
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return next(versions)
+
+    assert await cache.get("token", fetch) == repo_list("octo", "app")
+    assert await cache.get("token", fetch) == repo_list("octo", "app")
+    assert len(calls) == 1
+
+    now[0] += 11
+    # Stale: the old list comes back at once and the refresh runs in the background
+    assert await cache.get("token", fetch) == repo_list("octo", "app")
+    await asyncio.sleep(0)
+    assert await cache.get("token", fetch) == repo_list("octo", "app", "cli")
+    assert len(calls) == 2
+
+    stats = cache.stats()
+    assert (stats["misses"], stats["hits"], stats["stale_hits"], stats["refreshes"]) == (1, 2, 1, 2)
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch():
+    cache = RepoListCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return repo_list("octo", "app")
+
+    results = await asyncio.gather(*(cache.get("token", fetch) for _ in range(5)))
+    assert results == [repo_list("octo", "app")] * 5
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_serving_stale_entry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("services.repoListCache.time.monotonic", lambda: now[0])
+    cache = RepoListCache(fresh_ttl=10, max_stale=100)
+
+    async def fetch():
+        return repo_list("octo", "app")
+
+    async def failing_fetch():
+        raise RuntimeError("GitHub is down")
+
+    await cache.get("token", fetch)
+    now[0] += 11
+    assert await cache.get("token", failing_fetch) == repo_list("octo", "app")
+    await asyncio.sleep(0)
+    assert await cache.get("token", failing_fetch) == repo_list("octo", "app")
+    assert cache.stats()["refresh_errors"] == 1
+
+@pytest.mark.asyncio
+async def test_repository_webhook_invalidates_cached_lists():
+    repo_list_cache.clear()
+
+    def fetch_for(data):
+        async def fetch():
+            return data
+        return fetch
+
+    await repo_list_cache.get("owner-token", fetch_for(repo_list("octo", "app")))
+    await repo_list_cache.get("member-token", fetch_for({"username": "hubot", "repos": [{"full_name": "octo/app"}]}))
+    await repo_list_cache.get("other-token", fetch_for(repo_list("someone", "else")))
+
+    payload = {
+        "action": "renamed",
+        "repository": {"name": "application", "full_name": "octo/application", "owner": {"login": "octo"}},
+        "changes": {"repository": {"name": {"from": "app"}}},
+    }
+    response = client.post("/api/webhook/github", headers={"X-GitHub-Event": "repository"}, json=payload)
+    assert response.status_code == 200
+    assert drain_webhook_events() == 1
+
+    assert repo_list_cache.stats()["entries"] == 1
+    assert repo_list_cache.invalidate_repository("someone/else") == 1
+
+@pytest.mark.asyncio
+async def test_invalidation_from_another_thread_runs_on_the_loop():
+    cache = RepoListCache()
+
+    async def fetch():
+        return repo_list("octo", "app")
+
+    await cache.get("token", fetch)
+    # The webhook consumer thread only schedules the drop
+    assert await asyncio.to_thread(cache.invalidate_repository, "octo/app") is None
+    await asyncio.sleep(0)
+    assert cache.stats()["entries"] == 0
+    assert cache.invalidate_repository("octo/app") == 0
@@ -0,0 +1,60 @@
+import pytest
+import httpx
+from fastapi.testclient import TestClient
+from main import app
+from config.db import SessionLocal, AsyncSessionLocal
+from models.user import User
+from services import githubService
+from services.githubClient import GitHubClient
+from services.userCache import CachedUser, UserCache, user_cache
+
+client = TestClient(app)
+
+def test_user_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("services.userCache.time.monotonic", lambda: now[0])
+    cache = UserCache(max_entries=2, ttl=10)
+
+    cache.put(CachedUser(1, "a"))
+    cache.put(CachedUser(2, "b"))
+    assert cache.get(1) == CachedUser(1, "a")
+    cache.put(CachedUser(3, "c"))  # evicts 2, the least recently used
+    assert cache.get(2) is None
+
+    now[0] += 11
+    assert cache.get(1) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (1, 2, 1, 1)
+
+def test_requests_resolve_user_from_cache(monkeypatch):
+    db = SessionLocal()
+    db.add(User(id=501, github_access_token="cached"))
+    db.commit()
+    db.close()
+    user_cache.clear()
+
+    def fail_lookup(*args, **kwargs):
+        raise AssertionError("user lookup should be served from the cache")
+
+    assert client.get("/api/issues/issues", params={"user_id": 501}).status_code == 200
+    hits = user_cache.hits
+    monkeypatch.setattr("api.dependencies.AsyncSessionLocal", fail_lookup)
+    assert client.get("/api/issues/issues", params={"user_id": 501}).status_code == 200
+    assert user_cache.hits == hits + 1
+
+    assert client.get("/api/issues/issues", params={"user_id": 0}).status_code == 401
+
+def test_unknown_user_is_not_found():
+    assert client.get("/api/issues/issues", params={"user_id": 999501}).status_code == 404
+
+@pytest.mark.asyncio
+async def test_store_access_token_invalidates_cached_user(monkeypatch):
+    user_cache.put(CachedUser(502, "old-token"))
+    github = GitHubClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"id": 502})))
+    monkeypatch.setattr(githubService, "get_github_client", lambda: github)
+
+    async with AsyncSessionLocal() as db:
+        await githubService.store_access_token(db, "new-token")
+    await github.aclose()
+
+    assert user_cache.get(502) is None
@@ -12,4 +12,193 @@ def test_github_webhook_ping():
         json={"zen": "Test ping event"}
     )
     assert response.status_code == 200
-    assert "message" in response.json()
\ No newline at end of file
+    assert "message" in response.json()
+
+def issues_event(action="opened", labels=("bug",), title="Crash on save", github_issue_id=9001):
+    return {
+        "action": action,
+        "issue": {
+            "id": github_issue_id,
+            "number": 7,
+            "title": title,
+            "state": "open",
+            "html_url": "https://github.com/octo/app/issues/7",
+            "body": "It crashes",
+            "labels": [{"name": name} for name in labels],
+        },
+        "repository": {"full_name": "octo/app"},
+    }
+
+def test_issues_event_upserts_for_tracking_users():
+    from config.db import SessionLocal
+    from services.webhookService import drain_webhook_events
+    from models.issue import Issue
+    from models.user import User
+    from models.repository import TrackedRepository
+
+    db = SessionLocal()
+    db.add_all([User(id=101, github_access_token="a"), User(id=102, github_access_token="b"), User(id=103, github_access_token="c")])
+    db.flush()
+    db.add_all([
+        TrackedRepository(user_id=101, repo_full_name="octo/app"),
+        TrackedRepository(user_id=102, repo_full_name="octo/app"),
+        TrackedRepository(user_id=103, repo_full_name="octo/other"),
+    ])
+    db.commit()
+
+    response = client.post("/api/webhook/github", headers={"X-GitHub-Event": "issues"}, json=issues_event())
+    assert response.status_code == 200
+    assert drain_webhook_events() == 1
+    rows = db.query(Issue).filter(Issue.github_issue_id == 9001).all()
+    assert [list(row.labels) for row in rows] == [["bug"], ["bug"]]
+    db.expire_all()
+    response = client.post(
+        "/api/webhook/github",
+        headers={"X-GitHub-Event": "issues"},
+        json=issues_event(action="edited", labels=(), title="Crash on save (edited)")
+    )
+    assert response.status_code == 200
+    assert drain_webhook_events() == 1
+
+    rows = db.query(Issue).filter(Issue.github_issue_id == 9001).order_by(Issue.user_id).all()
+    assert [row.user_id for row in rows] == [101, 102]
+    assert all(row.title == "Crash on save (edited)" for row in rows)
+    assert all(row.is_ai_fixable is False for row in rows)
+    assert all(list(row.labels) == [] for row in rows)
+    db.close()
+
+def test_outbox_dedups_redeliveries_and_merges_issue_events():
+    from config.db import SessionLocal
+    from models.issue import Issue
+    from models.user import User
+    from models.repository import TrackedRepository
+    from models.webhook import WebhookEvent
+    from services.webhookService import drain_webhook_events
+
+    db = SessionLocal()
+    db.add(User(id=201, github_access_token="d"))
+    db.flush()
+    db.add(TrackedRepository(user_id=201, repo_full_name="octo/app"))
+    db.commit()
+
+    titles = ["first", "second", "third"]
+    for index, title in enumerate(titles):
+        headers = {"X-GitHub-Event": "issues", "X-GitHub-Delivery": f"merge-{index}"}
+        client.post("/api/webhook/github", headers=headers, json=issues_event(action="edited", title=title, github_issue_id=9101))
+    duplicate = client.post(
+        "/api/webhook/github",
+        headers={"X-GitHub-Event": "issues", "X-GitHub-Delivery": "merge-2"},
+        json=issues_event(action="edited", title="third", github_issue_id=9101)
+    )
+    assert "duplicate" in duplicate.json()["message"]
+
+    assert drain_webhook_events() == 3
+    issue = db.query(Issue).filter(Issue.github_issue_id == 9101, Issue.user_id == 201).one()
+    assert issue.title == "third"
+    statuses = {event.status for event in db.query(WebhookEvent).filter(WebhookEvent.delivery_id.like("merge-%"))}
+    assert statuses == {"processed"}
+    db.close()
+
+def test_failing_event_is_isolated_from_its_batch(monkeypatch):
+    from config.db import SessionLocal
+    from models.webhook import WebhookEvent
+    from services import webhookService
+
+    handle = webhookService.handle_issues_event
+
+    def failing(payload, db):
+        if payload["issue"]["title"] == "poison":
+            raise ValueError("cannot apply")
+        return handle(payload, db)
+
+    monkeypatch.setattr(webhookService, "handle_issues_event", failing)
+    for index, title in enumerate(["poison", "fine"]):
+        headers = {"X-GitHub-Event": "issues", "X-GitHub-Delivery": f"isolate-{index}"}
+        client.post("/api/webhook/github", headers=headers, json=issues_event(title=title, github_issue_id=9201 + index))
+    assert webhookService.drain_webhook_events() == 2
+
+    db = SessionLocal()
+    events = db.query(WebhookEvent).filter(WebhookEvent.delivery_id.like("isolate-%")).order_by(WebhookEvent.id).all()
+    assert [(event.status, event.attempts, event.error) for event in events] == [
+        ("pending", 1, "cannot apply"), ("processed", 1, None)
+    ]
+    # Keep the retry out of later drains
+    db.query(WebhookEvent).filter(WebhookEvent.delivery_id.like("isolate-%")).delete(synchronize_session=False)
+    db.commit()
+    db.close()
+
+def test_admin_replay_requeues_events(monkeypatch):
+    from api.admin import routes as admin_routes
+    from services.webhookService import drain_webhook_events
+
+    client.post(
+        "/api/webhook/github",
+        headers={"X-GitHub-Event": "issues", "X-GitHub-Delivery": "replay-1"},
+        json=issues_event(github_issue_id=9201)
+    )
+    drain_webhook_events()
+
+    assert client.post("/api/admin/webhook-events/replay", json={"delivery_ids": ["replay-1"]}).status_code == 403
+    monkeypatch.setattr(admin_routes, "ADMIN_TOKEN", "secret")
+    response = client.post(
+        "/api/admin/webhook-events/replay",
+        headers={"X-Admin-Token": "secret"},
+        json={"delivery_ids": ["replay-1"]}
+    )
+    assert response.json() == {"message": "Replaying 1 events"}
+    assert drain_webhook_events() == 1
+
+def test_webhook_rejects_oversized_payload(monkeypatch):
+    from api.webhook import routes as webhook_routes
+    monkeypatch.setattr(webhook_routes, "WEBHOOK_MAX_BODY_BYTES", 64)
+    response = client.post(
+        "/api/webhook/github",
+        headers={"X-GitHub-Event": "issues"},
+        content=b'{"padding": "' + b"x" * 100 + b'"}'
+    )
+    assert response.status_code == 413
+
+def test_webhook_verifies_signature_over_single_read(monkeypatch):
+    import hmac
+    import hashlib
+    from api.webhook import routes as webhook_routes
+    monkeypatch.setattr(webhook_routes, "WEBHOOK_SECRET", "s3cret")
+    body = json.dumps({"zen": "Signed ping"}).encode()
+    signature = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+
+    good = client.post("/api/webhook/github", headers={"X-GitHub-Event": "ping", "X-Hub-Signature-256": signature}, content=body)
+    bad = client.post("/api/webhook/github", headers={"X-GitHub-Event": "ping", "X-Hub-Signature-256": "sha256=0"}, content=body)
+
+    assert good.status_code == 200
+    assert bad.status_code == 401
+
+def test_extract_issues_event_keeps_only_used_fields():
+    from services.webhookService import parse_event_payload
+    payload = issues_event()
+    payload["sender"] = {"login": "octocat", "avatar_url": "x" * 1000}
+    payload["repository"]["owner"] = {"login": "octo"}
+
+    extracted = parse_event_payload("issues", json.dumps(payload).encode())
+
+    assert "sender" not in extracted
+    assert extracted["repository"] == {"full_name": "octo/app"}
+    assert extracted["issue"]["labels"] == [{"name": "bug"}]
+
+def test_repository_event_drops_fork_parents_in_any_case():
+    from config.db import SessionLocal
+    from models.repository import ForkParent
+    from services.webhookService import drain_webhook_events
+
+    db = SessionLocal()
+    db.add_all([
+        ForkParent(fork_full_name="me/tool", parent_full_name="Octo/Tool", parent_name="Tool"),
+        ForkParent(fork_full_name="me/other", parent_full_name="octo/other", parent_name="other"),
+    ])
+    db.commit()
+
+    payload = {"action": "deleted", "repository": {"name": "tool", "full_name": "octo/tool", "owner": {"login": "octo"}}}
+    client.post("/api/webhook/github", headers={"X-GitHub-Event": "repository"}, json=payload)
+    assert drain_webhook_events() == 1
+    remaining = db.query(ForkParent.fork_full_name).filter(ForkParent.fork_full_name.in_(["me/tool", "me/other"]))
+    assert [row.fork_full_name for row in remaining] == ["me/other"]
+    db.close()
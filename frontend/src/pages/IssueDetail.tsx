@@ -1,8 +1,7 @@
 import { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import axios from 'axios';
 import { motion } from 'framer-motion';
-import { generateFix, submitFix, deleteFix } from '../services/issueService';
+import { fetchFixes, generateFix, submitFix, deleteFix } from '../services/issueService';
 import { fetchIssueDetails } from '../services/apiService';
 
 interface Issue {
@@ -38,6 +37,7 @@ export const IssueDetail: React.FC<IssueDetailProps> = ({ userId }) => {
   
   const [issue, setIssue] = useState<Issue | null>(null);
   const [fixes, setFixes] = useState<Fix[]>([]);
+  const [fixesCursor, setFixesCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
   const [generatingFix, setGeneratingFix] = useState<boolean>(false);
@@ -55,11 +55,9 @@ export const IssueDetail: React.FC<IssueDetailProps> = ({ userId }) => {
         const issueResponse = await fetchIssueDetails(userId, parseInt(issueId));
         setIssue(issueResponse);
 
-        // Fetch fixes for this issue with corrected endpoint
-        const fixesResponse = await axios.get(`/api/issues/${issueId}/fixes`, {
-          params: { user_id: userId }
-        });
-        setFixes(fixesResponse.data);
+        const fixesPage = await fetchFixes(userId, parseInt(issueId));
+        setFixes(fixesPage.items);
+        setFixesCursor(fixesPage.next_cursor);
         
         setError(null);
       } catch (err) {
@@ -85,6 +83,19 @@ export const IssueDetail: React.FC<IssueDetailProps> = ({ userId }) => {
     navigate(-1);
   };
 
+  const handleLoadMoreFixes = async () => {
+    if (!issue || !fixesCursor) return;
+
+    try {
+      const fixesPage = await fetchFixes(userId, issue.id, fixesCursor);
+      setFixes([...fixes, ...fixesPage.items]);
+      setFixesCursor(fixesPage.next_cursor);
+    } catch (err) {
+      console.error('Error fetching fixes:', err);
+      setError('Failed to load more fixes. Please try again.');
+    }
+  };
+
   const handleGenerateFix = async () => {
     if (!issue) return;
     
@@ -358,6 +369,16 @@ export const IssueDetail: React.FC<IssueDetailProps> = ({ userId }) => {
                 )}
               </motion.div>
             ))}
+            {fixesCursor && (
+              <div className="text-center">
+                <button
+                  className="px-4 py-2 bg-[#21262d] border border-[#30363d] rounded-md text-gray-300 hover:bg-[#30363d]"
+                  onClick={handleLoadMoreFixes}
+                >
+                  Show older fixes
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
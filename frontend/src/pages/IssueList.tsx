@@ -12,37 +12,44 @@ interface IssueListProps {
 export const IssueList: React.FC<IssueListProps> = ({ userId }) => {
   const { owner, repoName } = useParams<{ owner: string; repoName: string }>();
   const [issues, setIssues] = useState<Issue[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState<string>('');
   const [labelFilter, setLabelFilter] = useState<string>('');
   const [aiFixableOnly, setAiFixableOnly] = useState<boolean>(false);
 
+  const currentFilters = () => {
+    const filters: {
+      repo_name?: string;
+      search?: string;
+      label?: string;
+      is_ai_fixable?: boolean;
+    } = {};
+
+    if (owner && repoName) filters.repo_name = `${owner}/${repoName}`;
+    if (searchTerm) filters.search = searchTerm;
+    if (labelFilter) filters.label = labelFilter;
+    if (aiFixableOnly) filters.is_ai_fixable = true;
+    return filters;
+  };
+
   useEffect(() => {
     const fetchIssueData = async () => {
       if (!userId) return;
 
       setLoading(true);
       try {
-        const filters: {
-          repo_name?: string;
-          search?: string;
-          label?: string;
-          is_ai_fixable?: boolean;
-        } = {};
-        
-        if (owner && repoName) filters.repo_name = `${owner}/${repoName}`;
-        if (searchTerm) filters.search = searchTerm;
-        if (labelFilter) filters.label = labelFilter;
-        if (aiFixableOnly) filters.is_ai_fixable = true;
-
-        const issueData = await fetchIssues(userId, filters);
-        setIssues(issueData);
+        const page = await fetchIssues(userId, currentFilters());
+        setIssues(page.items);
+        setNextCursor(page.next_cursor);
         setError(null);
       } catch (err) {
         console.error('Error fetching issues:', err);
         setError('Failed to load issues. Please try again.');
         setIssues([]);
+        setNextCursor(null);
       } finally {
         setLoading(false);
       }
@@ -51,6 +58,22 @@ export const IssueList: React.FC<IssueListProps> = ({ userId }) => {
     fetchIssueData();
   }, [userId, owner, repoName, searchTerm, labelFilter, aiFixableOnly]);
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+
+    setLoadingMore(true);
+    try {
+      const page = await fetchIssues(userId, currentFilters(), nextCursor);
+      setIssues([...issues, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      console.error('Error fetching more issues:', err);
+      setError('Failed to load more issues. Please try again.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Format date function
   const formatDate = (dateString: string) => {
     return new Date(dateString).toLocaleDateString('en-US', {
@@ -163,6 +186,18 @@ export const IssueList: React.FC<IssueListProps> = ({ userId }) => {
           ))}
         </ul>
       )}
+
+      {!loading && !error && nextCursor && (
+        <div className="text-center mt-6">
+          <button
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 bg-[#21262d] border border-[#30363d] rounded-md text-gray-300 hover:bg-[#30363d] disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more issues'}
+          </button>
+        </div>
+      )}
     </motion.div>
   );
 };
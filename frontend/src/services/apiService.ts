@@ -26,9 +26,22 @@ export interface Issue {
   html_url: string;
   created_at: string;
   is_ai_fixable: boolean;
+  cluster_id?: number | null;
   labels: string[];
 }
 
+// One page of a list endpoint; pass next_cursor back to get the following page
+export interface IssuePage {
+  items: Issue[];
+  next_cursor: string | null;
+}
+
+export interface IssueCluster {
+  cluster_id: number | null;
+  items: Issue[];
+  next_cursor: string | null;
+}
+
 // User related API calls
 export const fetchUserInfo = async (userId: number): Promise<User> => {
   try {
@@ -71,12 +84,12 @@ export const fetchRepositoryDetails = async (userId: number, owner: string, repo
 // Issue related API calls
 export const fetchIssues = async (
   userId: number, 
-  filters: { repo_name?: string; search?: string; label?: string; is_ai_fixable?: boolean }
-): Promise<Issue[]> => {
+  filters: { repo_name?: string; search?: string; label?: string; is_ai_fixable?: boolean },
+  cursor?: string
+): Promise<IssuePage> => {
   try {
-    const params = { user_id: userId, ...filters };
-    // Updated to match your actual backend endpoint for issues
-    const response = await axios.get('/api/issues', { params });
+    const params = { user_id: userId, ...filters, cursor };
+    const response = await axios.get('/api/issues/issues', { params });
     return response.data;
   } catch (error) {
     console.error('Error fetching issues:', error);
@@ -87,7 +100,7 @@ export const fetchIssues = async (
 export const fetchIssueDetails = async (userId: number, issueId: number): Promise<Issue> => {
   try {
     // Updated to match your actual backend endpoint for issue details
-    const response = await axios.get(`/api/issues/${issueId}`, {
+    const response = await axios.get(`/api/issues/issues/${issueId}`, {
       params: { user_id: userId }
     });
     return response.data;
@@ -95,4 +108,17 @@ export const fetchIssueDetails = async (userId: number, issueId: number): Promis
     console.error('Error fetching issue details:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+
+// Near-duplicates of an issue, the issue itself included
+export const fetchIssueCluster = async (userId: number, issueId: number, cursor?: string): Promise<IssueCluster> => {
+  try {
+    const response = await axios.get(`/api/issues/issues/${issueId}/cluster`, {
+      params: { user_id: userId, cursor }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching issue cluster:', error);
+    throw error;
+  }
+};
@@ -8,17 +8,63 @@ export interface Fix {
   is_submitted: boolean;
   submission_message: string | null;
   pr_url: string | null;
+  reused_from_id: number | null;
 }
 
+export interface FixPage {
+  items: Fix[];
+  next_cursor: string | null;
+}
+
+export interface FixJob {
+  id: number;
+  issue_id: number;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  progress: string | null;
+  attempts: number;
+  fix_id: number | null;
+  error: string | null;
+  created_at: string;
+  available_at: string | null;
+  claimed_at: string | null;
+  finished_at: string | null;
+}
+
+// Fixes of an issue, most recently updated first
+export const fetchFixes = async (userId: number, issueId: number, cursor?: string): Promise<FixPage> => {
+  const response = await axios.get(`/api/issues/issues/${issueId}/fixes`, {
+    params: { user_id: userId, cursor }
+  });
+  return response.data;
+};
+
 export const generateFix = async (userId: number, issueId: number): Promise<Fix> => {
-  const response = await axios.post(`/api/issues/${issueId}/generate-fix`, null, {
+  // Fix generation is queued; long-poll the job until a worker finishes it
+  let response = await axios.post(`/api/issues/issues/${issueId}/generate-fix`, null, {
     params: { user_id: userId }
   });
-  return response.data;
+  let job: FixJob = response.data;
+  while (job.status === 'queued' || job.status === 'running') {
+    response = await axios.get(`/api/issues/fix-jobs/${job.id}`, {
+      params: { user_id: userId, wait: 25 }
+    });
+    job = response.data;
+  }
+  if (job.status === 'failed' || job.fix_id === null) {
+    throw new Error(job.error || 'Fix generation failed');
+  }
+
+  // Fixes are listed most recently updated first, so the new one is on the first page
+  const fixes = await fetchFixes(userId, issueId);
+  const fix = fixes.items.find((item) => item.id === job.fix_id);
+  if (!fix) {
+    throw new Error('Generated fix not found');
+  }
+  return fix;
 };
 
 export const submitFix = async (userId: number, fixId: number, submissionMessage: string): Promise<Fix> => {
-  const response = await axios.post(`/api/fixes/${fixId}/submit`, 
+  const response = await axios.post(`/api/issues/fixes/${fixId}/submit`, 
     { submission_message: submissionMessage },
     { params: { user_id: userId } }
   );
@@ -26,7 +72,7 @@ export const submitFix = async (userId: number, fixId: number, submissionMessage
 };
 
 export const deleteFix = async (userId: number, fixId: number): Promise<void> => {
-  await axios.delete(`/api/fixes/${fixId}`, {
+  await axios.delete(`/api/issues/fixes/${fixId}`, {
     params: { user_id: userId }
   });
 };
\ No newline at end of file